@@ -0,0 +1,126 @@
+"""Bounded caches."""
+
+# Import built-in modules
+import collections
+import threading
+
+_MISSING = object()
+
+
+class LRUCache(object):
+    """Bounded mapping that evicts the least recently used entries.
+
+    Hits, misses and evictions are counted so the cache can be sized for
+    large shows. All methods are thread safe.
+
+    Examples:
+        >>> cache = LRUCache(maxSize=2)
+        >>> cache.put('a', 1)
+        >>> cache.put('b', 2)
+        >>> cache.get('a')
+        1
+        >>> cache.put('c', 3)
+        >>> cache.get('b') is None
+        True
+        >>> cache.stats()['evictions']
+        1
+
+    """
+
+    def __init__(self, maxSize):
+        """
+        Args:
+            maxSize (int): Maximum number of entries to keep.
+
+        """
+        super(LRUCache, self).__init__()
+        self._items = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._maxSize = maxSize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    @property
+    def maxSize(self):
+        """int: Maximum number of entries, shrinking it evicts entries."""
+        return self._maxSize
+
+    @maxSize.setter
+    def maxSize(self, maxSize):
+        with self._lock:
+            self._maxSize = maxSize
+            self._evict()
+
+    def _evict(self):
+        while len(self._items) > self._maxSize:
+            self._items.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, key, default=None):
+        """Return the value for key and mark it as recently used.
+
+        Args:
+            key (hashable): Key to look up.
+            default (object, optional): Returned if key is not cached.
+
+        Returns:
+            object: Cached value or default.
+
+        """
+        with self._lock:
+            value = self._items.get(key, _MISSING)
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self._items.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """Add or replace the value for key, evicting the oldest entries.
+
+        Args:
+            key (hashable): Key to store the value under.
+            value (object): Value to store.
+
+        """
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            self._evict()
+
+    def pop(self, key, default=None):
+        """Remove key from the cache without counting it as an eviction.
+
+        Returns:
+            object: The removed value or default.
+
+        """
+        with self._lock:
+            return self._items.pop(key, default)
+
+    def clear(self):
+        """Evict all entries."""
+        with self._lock:
+            self.evictions += len(self._items)
+            self._items.clear()
+
+    def stats(self):
+        """Return the cache counters.
+
+        Returns:
+            dict: hits, misses, evictions, size and maxSize.
+
+        """
+        return {'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self._items),
+                'maxSize': self._maxSize}
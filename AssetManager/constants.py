@@ -1,11 +1,18 @@
 """Define all constant variables here."""
 
 # pylint: disable=import-error
-import nuke
+# Nuke is optional so the schema can be used by offline tooling.
+NUKE_LOADED = True
+try:
+    import nuke
+except ImportError:
+    NUKE_LOADED = False
 
 PACKAGE_NICE_NAME = 'Asset Manager'
 
 SCHEMA_DEFAULT = '/shows/{@show}/{@sequence}/{@shot}/{#product}/{@role}/{@show}{_@sequence}{_@shot}{_@role}{_@asset}{*_@variant}{_@version}{_@resolution}/{@show}{_@sequence}{_@shot}{_@role}{_@asset}{*_@variant}{_@version}{_@resolution}{*.#padding}{.#extension}'
+# Separates several schemas, i.e. '$CAMERA_SCHEMA;$RENDER_SCHEMA'
+SCHEMA_SEPARATOR = ';'
 SCHEMA_VAR_DELIMETERS = r'(?<=\{@).+?(?=\})'
 SCHEMA_VAR_OPEN_DELIMETER = r'{@'
 SCHEMA_VAR_CLOSE_DELIMETER = r'}'
@@ -28,6 +35,79 @@ TOKEN_EDIT_VAR = 'userEditableVariable'
 TOKEN_HIDDEN_VAR = 'nonEditableVariable'
 TOKEN_ERROR = '<<!!ERROR!!>>'
 TOKEN_NONE = '<<!!NONE!!>>'
+
+# Token value constraints, i.e. {_@shot:digits,len=4} or {@show:lower,alnum,chars=-}
+TOKEN_CONSTRAINT_SEPARATOR = ':'
+TOKEN_CONSTRAINT_DELIMITER = ','
+TOKEN_CONSTRAINT_CHARS = {'digits': '0-9',
+                          'alpha': 'a-zA-Z',
+                          'alnum': 'a-zA-Z0-9'}
+TOKEN_CONSTRAINT_CASES = {'lower': 'A-Z',
+                          'upper': 'a-z'}
+# Color of token values that violate their constraints
+TOKEN_VIOLATION_COLOR = '#FFA500'
+
+# Reasons a file path doesn't match its schema, see diagnostics.Diagnostic.
+# The index of a code is stored per row, 0 means no error.
+DIAGNOSTIC_NONE = ''
+DIAGNOSTIC_DEPTH = 'depth'
+DIAGNOSTIC_LEVEL = 'level'
+DIAGNOSTIC_MISMATCH = 'mismatch'
+DIAGNOSTIC_CODES = (DIAGNOSTIC_NONE, DIAGNOSTIC_DEPTH, DIAGNOSTIC_LEVEL, DIAGNOSTIC_MISMATCH)
+DIAGNOSTIC_MESSAGES = {
+    DIAGNOSTIC_DEPTH: "The file path has {value} levels, the schema has {expected}",
+    DIAGNOSTIC_LEVEL: "Level {level} '{value}' does not match the schema",
+    DIAGNOSTIC_MISMATCH: "Level {level} has '{value}' for token '{key}', the levels before have '{expected}'",
+}
+# Log a summary of the diagnostics at most this often, in seconds.
+DIAGNOSTICS_LOG_INTERVAL = 10.0
+
+# Key of the frame padding token, case insensitive. Its value is parsed in any
+# notation ('%04d', '####', '$F4', '1001') and normalized to '%04d'.
+PADDING_KEY = 'padding'
+
+# Key of the version token, case insensitive, and the non-editable column
+# showing the latest version on disk, see versions.py
+VERSION_KEY = 'version'
+LATEST_VERSION_COLUMN = 'latest'
+# Color of versions that aren't the latest one on disk
+STALE_VERSION_COLOR = '#FF7F50'
+
+# Maximum number of parsed paths cached per schema
+PARSE_CACHE_SIZE = 20000
+# Maximum number of path level matches shared by all schemas
+LEVEL_CACHE_SIZE = 100000
+# Paths sent to a coverage worker process at a time, and example paths kept
+# per outcome, see coverage.py
+COVERAGE_CHUNK_SIZE = 5000
+COVERAGE_EXAMPLES = 5
+# Threads listing directories in a scan, and directory listings queued per
+# thread, see scan.scanPaths
+SCAN_WORKERS = 16
+SCAN_PENDING_PER_WORKER = 4
+# Status of the frames of a row on disk, see frames.checkSequences
+SEQUENCE_COMPLETE = 'complete'
+SEQUENCE_PARTIAL = 'partial'
+SEQUENCE_ABSENT = 'absent'
+# Also find zero-byte frames. Costs one stat per frame outside of Windows,
+# where the directory listing doesn't have the file sizes.
+SEQUENCE_CHECK_SIZES = False
+# Colors of rows with missing or zero-byte frames and of rows without frames
+SEQUENCE_PARTIAL_COLOR = '#FFA500'
+SEQUENCE_ABSENT_COLOR = '#FF4500'
+# Maximum number of directory listings shared by the process, see listings.py
+LISTING_CACHE_SIZE = 10000
+# Seconds a listing is served without checking the directory mtime again,
+# on file systems inotify can't watch
+LISTING_POLL_INTERVAL = 2.0
+# Listings taken this many seconds after the directory changed aren't
+# trusted, changes within the mtime resolution would go unnoticed
+LISTING_MTIME_GRACE = 2.0
+# Watch directories on local file systems with inotify, Linux only
+LISTING_INOTIFY = True
+# File systems whose changes by other hosts inotify doesn't see
+NETWORK_FILE_SYSTEMS = ('nfs', 'nfs4', 'cifs', 'smbfs', 'smb3', 'afs', 'ceph',
+                        'glusterfs', 'lustre', 'gpfs', 'fuse.sshfs')
 # Token colors
 
 colorsMutedList = ['OrangeRed',
@@ -75,7 +155,7 @@ TOKEN_COLORS_DICT = {**colorsMutedDict, **colorsBrightDict}
 READ_ONLY_KNOBS = [
     nuke.Axis_Knob,
     nuke.Transform2d_Knob,
-]
+] if NUKE_LOADED else []
 
 # Colors
 # knob is animated
@@ -106,6 +186,12 @@ EDITOR_DECIMALS = 8
 # Ask for user confirmation before loading more than this many nodes.
 NUM_NODES_WARN_BEFORE_LOAD = 100
 
+# Wait this long after the last keystroke in the schema override before
+# re-tokenizing the nodes.
+SCHEMA_OVERRIDE_DEBOUNCE_MS = 300
+# Re-tokenize this many nodes per event loop iteration.
+RETOKENIZE_CHUNK_SIZE = 250
+
 # Shading mode follows preferences when not in non-commercial mode.
 # Skip checking the preferences node since that counts towards the
 # 10 nodes limit in non-commercial edition.
@@ -0,0 +1,274 @@
+"""Check how well schemas cover a large set of existing paths.
+
+Every path is parsed and formatted back with its schema across a process
+pool. Paths are streamed in chunks with a bounded number of chunks in
+flight, so memory doesn't grow with the number of paths.
+
+Usage:
+    python -m AssetManager.coverage --source inventory.txt
+    python -m AssetManager.coverage --schema '$RENDER_SCHEMA' --source /shows/foo
+    find /shows/foo -type f | python -m AssetManager.coverage --source -
+"""
+
+# Import built-in modules
+import os
+import sys
+import json
+import argparse
+import itertools
+import collections
+import concurrent.futures
+
+# Import internal modules
+from AssetManager import constants
+from AssetManager import registry
+
+COVERAGE_MATCH = 'match'
+COVERAGE_LOSSY = 'lossy'
+COVERAGE_ERROR = 'error'
+COVERAGE_UNKNOWN = 'unknown'
+
+
+# Result of analyzing paths, merged across chunks with mergeSummaries.
+# counts has the number of paths by outcome, errors by diagnostic code,
+# levels by (outcome or code, 1-based level) and examples a few paths per
+# outcome or code.
+CoverageSummary = collections.namedtuple('CoverageSummary', [
+    'counts',
+    'errors',
+    'levels',
+    'examples',
+])
+
+# Registry of the worker process, see _initWorker.
+_workerRegistry = None
+
+
+def iterPaths(source):
+    """Lazily yield the paths of a path list file, a directory or stdin.
+
+    Args:
+        source (str): Path list file with one path per line, a directory to
+            walk or '-' for stdin.
+
+    Yields:
+        str: Paths with '/' separators.
+
+    """
+    if source == '-':
+        lines = sys.stdin
+    elif os.path.isdir(source):
+        stack = [source]
+        while stack:
+            directory = stack.pop()
+            try:
+                entries = sorted(os.scandir(directory), key=lambda entry: entry.name, reverse=True)
+            except OSError:
+                continue
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                else:
+                    yield entry.path.replace('\\', '/')
+        return
+    else:
+        lines = open(source, encoding='utf-8', errors='replace')
+    with lines:
+        for line in lines:
+            line = line.strip()
+            if line:
+                yield line.replace('\\', '/')
+
+
+def firstDifferentLevel(filePathStr, otherPathStr):
+    """Return the 0-based index of the first level two paths differ at."""
+    levels = filePathStr.split('/')[1:]
+    otherLevels = otherPathStr.split('/')[1:]
+    for index, (level, otherLevel) in enumerate(zip(levels, otherLevels)):
+        if level != otherLevel:
+            return index
+    return min(len(levels), len(otherLevels))
+
+
+def emptySummary():
+    return CoverageSummary(collections.Counter(), collections.Counter(), collections.Counter(), {})
+
+
+def addExample(summary, kind, example):
+    examples = summary.examples.setdefault(kind, [])
+    if len(examples) < constants.COVERAGE_EXAMPLES:
+        examples.append(example)
+
+
+def writtenTokens(schemaObj, record):
+    """Return the tokens of a parsed path with the padding as written.
+
+    Parsing normalizes the padding to its canonical notation, paths naming
+    a frame or written with '####' wouldn't format back to themselves.
+
+    Examples:
+        >>> writtenTokens(schemaObj, schemaObj.tokenRecord('/shows/foo/comp/foo_v001.1001.exr'))['padding']
+        '1001'
+
+    """
+    key = schemaObj.compiled.paddingKey
+    if record.sequence is None or key not in record.spans:
+        return record.tokens
+    start, end, delimeter = record.spans[key][-1]
+    tokens = dict(record.tokens)
+    tokens[key] = record.filePath[start + len(delimeter):end]
+    return tokens
+
+
+def analyzePaths(schemaRegistry, filePaths):
+    """Parse and format back every path with its schema.
+
+    Args:
+        schemaRegistry (registry.SchemaRegistry): Schemas of the paths.
+        filePaths (iterable): Paths to check.
+
+    Returns:
+        CoverageSummary: Outcome counts of the paths.
+
+    """
+    summary = emptySummary()
+    for filePathStr in filePaths:
+        summary.counts['total'] += 1
+        schemaObj = schemaRegistry.schemaForPath(filePathStr)
+        record = schemaObj.tokenRecord(filePathStr)
+        if not record.isValid:
+            summary.counts[COVERAGE_ERROR] += 1
+            diagnostic = record.diagnostics[0] if record.diagnostics else None
+            code = diagnostic.code if diagnostic is not None else COVERAGE_UNKNOWN
+            summary.errors[code] += 1
+            if diagnostic is not None and diagnostic.level >= 0:
+                summary.levels[(code, diagnostic.level + 1)] += 1
+            addExample(summary, code, filePathStr)
+            continue
+        formatted = schemaObj.tokensToFilePath(writtenTokens(schemaObj, record))
+        if formatted == filePathStr:
+            summary.counts[COVERAGE_MATCH] += 1
+        else:
+            summary.counts[COVERAGE_LOSSY] += 1
+            summary.levels[(COVERAGE_LOSSY, firstDifferentLevel(filePathStr, formatted) + 1)] += 1
+            addExample(summary, COVERAGE_LOSSY, '{0} -> {1}'.format(filePathStr, formatted))
+    return summary
+
+
+def mergeSummaries(summary, other):
+    """Add the counts and examples of other to summary, in place."""
+    summary.counts.update(other.counts)
+    summary.errors.update(other.errors)
+    summary.levels.update(other.levels)
+    for kind, examples in other.examples.items():
+        for example in examples:
+            addExample(summary, kind, example)
+    return summary
+
+
+def _initWorker(schemasStr):
+    global _workerRegistry
+    _workerRegistry = registry.SchemaRegistry(schemasStr)
+
+
+def _analyzeChunk(filePaths):
+    summary = analyzePaths(_workerRegistry, filePaths)
+    # The parse cache would only grow, paths of a chunk are rarely seen again.
+    for schemaObj in _workerRegistry.schemas:
+        schemaObj.parseCache.clear()
+    return summary
+
+
+def iterChunks(filePaths, chunkSize):
+    filePaths = iter(filePaths)
+    while True:
+        chunk = list(itertools.islice(filePaths, chunkSize))
+        if not chunk:
+            return
+        yield chunk
+
+
+def analyze(schemasStr, filePaths, workers=None, chunkSize=constants.COVERAGE_CHUNK_SIZE):
+    """Check paths against schemas across a process pool.
+
+    At most two chunks per worker are in flight, so paths are read no
+    faster than they are parsed.
+
+    Args:
+        schemasStr (str): Schemas, see registry.SchemaRegistry. Defaults to
+            $ASSET_MANAGER_SCHEMA if empty.
+        filePaths (iterable): Paths to check, consumed lazily.
+        workers (int, optional): Number of processes, defaults to the
+            number of CPUs.
+        chunkSize (int, optional): Paths sent to a worker at a time.
+
+    Returns:
+        CoverageSummary: Outcome counts of all paths.
+
+    """
+    workers = workers or os.cpu_count() or 1
+    summary = emptySummary()
+    chunks = iterChunks(filePaths, chunkSize)
+    with concurrent.futures.ProcessPoolExecutor(workers, initializer=_initWorker,
+                                                initargs=(schemasStr,)) as executor:
+        pending = set()
+        for chunk in chunks:
+            pending.add(executor.submit(_analyzeChunk, chunk))
+            if len(pending) >= workers * 2:
+                done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    mergeSummaries(summary, future.result())
+        for future in concurrent.futures.as_completed(pending):
+            mergeSummaries(summary, future.result())
+    return summary
+
+
+def summaryAsDict(summary):
+    return {'counts': dict(summary.counts),
+            'errors': dict(summary.errors),
+            'levels': {'{0}:{1}'.format(kind, level): count for (kind, level), count in sorted(summary.levels.items())},
+            'examples': summary.examples}
+
+
+def summaryAsString(summary):
+    total = summary.counts['total']
+
+    def share(count):
+        return '{0} ({1:.2f}%)'.format(count, 100.0 * count / total if total else 0.0)
+
+    lines = ['Paths: {0}'.format(total),
+             'Match: {0}'.format(share(summary.counts[COVERAGE_MATCH])),
+             'Lossy: {0}'.format(share(summary.counts[COVERAGE_LOSSY])),
+             'Error: {0}'.format(share(summary.counts[COVERAGE_ERROR]))]
+    for code, count in summary.errors.most_common():
+        lines.append('    {0}: {1}'.format(code or COVERAGE_UNKNOWN, share(count)))
+    if summary.levels:
+        lines.append('By level:')
+        for (kind, level), count in sorted(summary.levels.items()):
+            lines.append('    level {0} {1}: {2}'.format(level, kind, share(count)))
+    for kind, examples in sorted(summary.examples.items()):
+        lines.append('Examples {0}:'.format(kind))
+        lines += ['    {0}'.format(example) for example in examples]
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--schema', default='',
+                        help='schemas separated by {0}, defaults to $ASSET_MANAGER_SCHEMA'.format(constants.SCHEMA_SEPARATOR))
+    parser.add_argument('--source', default='-', help="path list file, directory or '-' for stdin")
+    parser.add_argument('--workers', type=int, default=None, help='number of processes')
+    parser.add_argument('--chunk-size', type=int, default=constants.COVERAGE_CHUNK_SIZE)
+    parser.add_argument('--json', action='store_true', help='print the summary as json')
+    args = parser.parse_args(argv)
+
+    summary = analyze(args.schema, iterPaths(args.source), args.workers, args.chunk_size)
+    if args.json:
+        print(json.dumps(summaryAsDict(summary), indent=2))
+    else:
+        print(summaryAsString(summary))
+    return 0 if summary.counts[COVERAGE_MATCH] == summary.counts['total'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -68,7 +68,8 @@ class ItemDelegate(QtWidgets.QStyledItemDelegate):
             logging.info('AssetManager assetManagerUndo()')
             #print(dir(self.tableView.model()))
 
-            self.tableView.model().sourceModel().setupModelData()
+            sourceModel = self.tableView.model().sourceModel()
+            sourceModel.refreshFromDisk(sourceModel.setupModelData())
             self.tableView.horizontalHeader().setSortIndicatorShown(False)
             self.tableView.resizeColumnsToContents()
             self.tableView.horizontalHeader().setSortIndicatorShown(True)
@@ -79,7 +80,8 @@ class ItemDelegate(QtWidgets.QStyledItemDelegate):
         action = menuItem.action()
         if UNDO_TEXT in action.text():
             logging.info('AssetManager assetManagerRedo()')
-            self.tableView.model().sourceModel().setupModelData()
+            sourceModel = self.tableView.model().sourceModel()
+            sourceModel.refreshFromDisk(sourceModel.setupModelData())
             self.tableView.horizontalHeader().setSortIndicatorShown(False)
             self.tableView.resizeColumnsToContents()
             self.tableView.horizontalHeader().setSortIndicatorShown(True)
@@ -0,0 +1,114 @@
+"""Collect why file paths don't match their schema."""
+
+# Import built-in modules
+import time
+import logging
+import threading
+import collections
+
+# Import internal modules
+from AssetManager import constants
+
+
+# One reason a path doesn't match its schema. level is the 0-based index of
+# the offending path level, -1 if the whole path is in error.
+Diagnostic = collections.namedtuple('Diagnostic', [
+    'code',
+    'level',
+    'key',
+    'value',
+    'expected',
+])
+
+
+def describe(diagnostic):
+    """Return a readable message for a diagnostic.
+
+    Examples:
+        >>> describe(Diagnostic(constants.DIAGNOSTIC_LEVEL, 2, None, '0080x', None))
+        "Level 3 '0080x' does not match the schema"
+
+    Args:
+        diagnostic (Diagnostic): The diagnostic.
+
+    Returns:
+        str: The message.
+
+    """
+    return constants.DIAGNOSTIC_MESSAGES[diagnostic.code].format(
+        level=diagnostic.level + 1,
+        key=diagnostic.key,
+        value=diagnostic.value,
+        expected=diagnostic.expected)
+
+
+class DiagnosticsCollector():
+    """Count diagnostics by code and log a rate-limited summary of them.
+
+    Parsing only records diagnostics, nothing is formatted or logged per
+    path. logSummary writes one line for everything recorded since the
+    last summary, at most once per logInterval.
+
+    Examples:
+        >>> collector = DiagnosticsCollector()
+        >>> collector.add(record.diagnostics)
+        >>> collector.logSummary()
+
+    """
+
+    def __init__(self, logInterval=constants.DIAGNOSTICS_LOG_INTERVAL):
+        """
+        Args:
+            logInterval (float, optional): Minimum seconds between two
+                summaries.
+
+        """
+        super(DiagnosticsCollector, self).__init__()
+        self.logInterval = logInterval
+        self.counts = collections.Counter()
+        self._pending = collections.Counter()
+        self._lastLogTime = None
+        self._lock = threading.Lock()
+
+    def add(self, diagnostics):
+        """Record the diagnostics of one path.
+
+        Args:
+            diagnostics (tuple): Diagnostic per error of the path.
+
+        """
+        if not diagnostics:
+            return
+        with self._lock:
+            for diagnostic in diagnostics:
+                self.counts[diagnostic.code] += 1
+                self._pending[diagnostic.code] += 1
+
+    def logSummary(self, force=False):
+        """Log the diagnostics recorded since the last summary.
+
+        Args:
+            force (bool, optional): Log even if the last summary is more
+                recent than logInterval.
+
+        Returns:
+            bool: True if a summary was logged.
+
+        """
+        now = time.monotonic()
+        with self._lock:
+            if not self._pending:
+                return False
+            if not force and self._lastLogTime is not None and now - self._lastLogTime < self.logInterval:
+                return False
+            summary = ', '.join('{0} x{1}'.format(code, count) for code, count in sorted(self._pending.items()))
+            self._pending.clear()
+            self._lastLogTime = now
+        logging.info('File paths that do not match the schema: {0}'.format(summary))
+        return True
+
+    def clear(self):
+        """Forget all recorded diagnostics."""
+        with self._lock:
+            self.counts.clear()
+            self._pending.clear()
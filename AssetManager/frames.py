@@ -0,0 +1,177 @@
+"""Find missing and zero-byte frames of many file paths with few directory listings."""
+
+# Import built-in modules
+import re
+import collections
+import concurrent.futures
+
+# Import internal modules
+from AssetManager import constants
+from AssetManager import listings
+from AssetManager import sequence
+
+
+# Frames of a row on disk. status is one of constants.SEQUENCE_COMPLETE,
+# SEQUENCE_PARTIAL or SEQUENCE_ABSENT, missing, empty (zero-byte), expected
+# and found are sequence.FrameRanges. Paths without padding have frame
+# ranges of frame 0 only.
+SequenceStatus = collections.namedtuple('SequenceStatus', [
+    'status',
+    'missing',
+    'empty',
+    'expected',
+    'found',
+])
+
+
+def splitDirectory(filePathStr):
+    """Return the directory and the name of a path."""
+    index = filePathStr.rfind('/')
+    return filePathStr[:index] or '/', filePathStr[index + 1:]
+
+
+def sequenceQuery(record):
+    """Return where to look for the frames of a parsed path.
+
+    Examples:
+        >>> sequenceQuery(schema.tokenRecord('/shows/foo/comp/foo_v001.%04d.exr'))
+        ('/shows/foo/comp', 'foo_v001\\\\.([0-9]{4,})\\\\.exr')
+
+    Args:
+        record (schema.TokenRecord): Parse result of the path.
+
+    Returns:
+        tuple: (str directory, str pattern), the pattern matches the names of
+            the frames and captures the frame number. Paths without padding
+            have a pattern matching their own name.
+
+    """
+    fileSequence = record.sequence
+    if fileSequence is None:
+        directory, name = splitDirectory(record.filePath)
+        return directory, re.escape(name)
+    directory, headName = splitDirectory(fileSequence.head)
+    frames = '([0-9]{{{0},}})'.format(fileSequence.width) if fileSequence.width > 1 else '([0-9]+)'
+    return directory, re.escape(headName) + frames + re.escape(fileSequence.tail)
+
+
+def framesInEntries(pattern, entries):
+    """Return the frames and zero-byte frames among a directory listing.
+
+    Args:
+        pattern (str): See sequenceQuery.
+        entries (list): scan.DirEntry objects of the directory.
+
+    Returns:
+        tuple: (sequence.FrameRanges found, sequence.FrameRanges empty).
+            Names without a frame number are frame 0.
+
+    """
+    matcher = re.compile(pattern).fullmatch
+    found = []
+    empty = []
+    for entry in entries:
+        if entry.isDir:
+            continue
+        match = matcher(entry.name)
+        if match is None:
+            continue
+        frame = int(match.group(1)) if match.groups() else 0
+        found.append(frame)
+        if entry.size == 0:
+            empty.append(frame)
+    return sequence.FrameRanges.fromFrames(found), sequence.FrameRanges.fromFrames(empty)
+
+
+def sequenceStatus(record, frameRange, found, empty):
+    """Compare the frames on disk with the frames a row reads.
+
+    Args:
+        record (schema.TokenRecord): Parse result of the path.
+        frameRange (tuple|None): (first, last) frame the row reads, None for
+            every frame found on disk.
+        found (sequence.FrameRanges): Frames on disk, see framesInEntries.
+        empty (sequence.FrameRanges): Zero-byte frames on disk.
+
+    Returns:
+        SequenceStatus: Status of the row.
+
+    """
+    fileSequence = record.sequence
+    if fileSequence is None:
+        expected = sequence.FrameRanges.fromRange(0, 0)
+    elif fileSequence.frame is not None:
+        # The path names a single frame.
+        expected = sequence.FrameRanges.fromRange(fileSequence.frame, fileSequence.frame)
+    elif frameRange is not None:
+        expected = sequence.FrameRanges.fromRange(*frameRange)
+    elif found:
+        expected = sequence.FrameRanges.fromRange(found.ranges[0][0], found.ranges[-1][1])
+    else:
+        expected = sequence.FrameRanges()
+
+    missing = expected.difference(found)
+    empty = expected.intersection(empty)
+    found = expected.intersection(found)
+    if not found:
+        status = constants.SEQUENCE_ABSENT
+    elif missing or empty:
+        status = constants.SEQUENCE_PARTIAL
+    else:
+        status = constants.SEQUENCE_COMPLETE
+    return SequenceStatus(status, missing, empty, expected, found)
+
+
+def checkSequences(rows, scandir=listings.scanDirectory, workers=constants.SCAN_WORKERS,
+                   checkSizes=constants.SEQUENCE_CHECK_SIZES):
+    """Find the missing and zero-byte frames of many parsed paths.
+
+    Rows are grouped by the directory of their frames, every directory is
+    listed once and the directories are listed in parallel. Frames are
+    found by name in the listings, no frame is looked up on its own.
+
+    Examples:
+        >>> statuses = checkSequences({'Read1': (record, (1001, 1100))})
+        >>> str(statuses['Read1'].missing)
+        '1050-1052'
+
+    Args:
+        rows (dict): (schema.TokenRecord, (first, last) frame range or None)
+            by any row key, i.e. node name.
+        scandir (callable, optional): Lists a directory as scan.DirEntry
+            objects, takes sizes as a keyword argument. Defaults to the
+            listings shared by the process.
+        workers (int, optional): Number of threads listing directories.
+        checkSizes (bool, optional): Find zero-byte frames, see
+            constants.SEQUENCE_CHECK_SIZES.
+
+    Returns:
+        dict: SequenceStatus by row key, rows with invalid paths are left out.
+
+    """
+    queries = {}
+    directories = collections.defaultdict(list)
+    for rowKey, (record, frameRange) in rows.items():
+        if not record.isValid:
+            continue
+        query = sequenceQuery(record)
+        queries[rowKey] = (record, frameRange, query[1])
+        directories[query[0]].append(rowKey)
+
+    def listEntries(directory):
+        try:
+            return directory, scandir(directory, sizes=checkSizes)
+        except OSError:
+            return directory, []
+
+    statuses = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        for directory, entries in executor.map(listEntries, directories):
+            framesByPattern = {}
+            for rowKey in directories[directory]:
+                record, frameRange, pattern = queries[rowKey]
+                if pattern not in framesByPattern:
+                    framesByPattern[pattern] = framesInEntries(pattern, entries)
+                found, empty = framesByPattern[pattern]
+                statuses[rowKey] = sequenceStatus(record, frameRange, found, empty)
+    return statuses
@@ -0,0 +1,377 @@
+"""Directory listings shared by the whole process.
+
+Latest versions, missing frames and scans list the same version and
+sequence directories over and over. Listings are cached by directory and
+validated by the directory mtime. On Linux, directories on local file
+systems are watched with inotify instead, so a cached listing costs no
+system call until the directory changes.
+"""
+
+# Import built-in modules
+import os
+import sys
+import time
+import errno
+import ctypes
+import ctypes.util
+import struct
+import logging
+import threading
+import collections
+
+# Import internal modules
+from AssetManager import cache
+from AssetManager import constants
+from AssetManager import scan
+
+LOG = logging.getLogger(__name__)
+
+# inotify event masks, see inotify(7).
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_CLOEXEC = 0o2000000
+# Entries added, removed or renamed, and files written, which changes
+# their size.
+WATCH_MASK = (IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_CLOSE_WRITE | IN_MODIFY
+              | IN_ATTRIB | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+INOTIFY_EVENT = struct.Struct('iIII')
+
+
+# A cached listing. entries are scan.DirEntry objects, with sizes if
+# hasSizes. mtime is the directory mtime in nanoseconds when it was listed
+# and checked the time it was last found unchanged. trusted is False if
+# the mtime can't tell later changes apart, see
+# constants.LISTING_MTIME_GRACE. version counts the changes of the
+# directory and of all directories when it was listed, see
+# DirectoryCache.invalidate.
+Listing = collections.namedtuple('Listing', [
+    'entries',
+    'hasSizes',
+    'mtime',
+    'checked',
+    'trusted',
+    'version',
+])
+
+
+def readFileSystemTypes(mountInfoPath='/proc/self/mountinfo'):
+    """Return the file system type of every mount by device number.
+
+    Returns:
+        dict: File system type, i.e. 'ext4' or 'nfs4', by (major, minor)
+            device number. Empty if the mounts can't be read.
+
+    """
+    fileSystemTypes = {}
+    try:
+        with open(mountInfoPath) as mountInfo:
+            for line in mountInfo:
+                fields, _, superFields = line.partition(' - ')
+                major, minor = fields.split()[2].split(':')
+                fileSystemTypes[(int(major), int(minor))] = superFields.split()[0]
+    except (OSError, IndexError, ValueError):
+        pass
+    return fileSystemTypes
+
+
+class InotifyWatcher():
+    """Watches directories with inotify and reports changes from a thread.
+
+    Args:
+        callback (callable): Called with the directory of every change, or
+            None if events were lost and every directory may have changed.
+
+    Raises:
+        OSError: If inotify isn't available.
+
+    """
+
+    def __init__(self, callback):
+        super(InotifyWatcher, self).__init__()
+        if not sys.platform.startswith('linux'):
+            raise OSError(errno.ENOSYS, 'inotify is only available on Linux')
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self._libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        self._fd = self._libc.inotify_init1(IN_CLOEXEC)
+        if self._fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+        self._callback = callback
+        self._lock = threading.Lock()
+        self._descriptors = {}
+        # Paths that lead to the same directory share a watch descriptor.
+        self._directories = collections.defaultdict(set)
+        thread = threading.Thread(target=self._readEvents, name='AssetManagerInotify')
+        thread.daemon = True
+        thread.start()
+
+    def __len__(self):
+        return len(self._descriptors)
+
+    def __contains__(self, directory):
+        return directory in self._descriptors
+
+    @property
+    def directories(self):
+        """list: Watched directories."""
+        with self._lock:
+            return list(self._descriptors)
+
+    def watch(self, directory):
+        """Start watching a directory.
+
+        Returns:
+            bool: True if the directory is watched, False if inotify refused,
+                i.e. because the watch limit of the user is reached.
+
+        """
+        with self._lock:
+            if directory in self._descriptors:
+                return True
+            descriptor = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), WATCH_MASK)
+            if descriptor < 0:
+                return False
+            self._descriptors[directory] = descriptor
+            self._directories[descriptor].add(directory)
+            return True
+
+    def unwatch(self, directory):
+        """Stop watching a directory."""
+        with self._lock:
+            descriptor = self._descriptors.pop(directory, None)
+            if descriptor is None:
+                return
+            directories = self._directories[descriptor]
+            directories.discard(directory)
+            if not directories:
+                del self._directories[descriptor]
+                self._libc.inotify_rm_watch(self._fd, descriptor)
+
+    def _readEvents(self):
+        while True:
+            try:
+                data = os.read(self._fd, 65536)
+            except OSError as error:
+                LOG.warning('Stopped watching directories: %s', error)
+                self._callback(None)
+                return
+            offset = 0
+            while offset < len(data):
+                descriptor, mask, cookie, length = INOTIFY_EVENT.unpack_from(data, offset)
+                offset += INOTIFY_EVENT.size + length
+                if mask & IN_Q_OVERFLOW:
+                    self._callback(None)
+                    continue
+                with self._lock:
+                    directories = list(self._directories.get(descriptor, ()))
+                    if mask & IN_IGNORED:
+                        # The directory is gone or no longer watched.
+                        for directory in directories:
+                            if self._descriptors.get(directory) == descriptor:
+                                del self._descriptors[directory]
+                        self._directories.pop(descriptor, None)
+                for directory in directories:
+                    self._callback(directory)
+
+
+class DirectoryCache():
+    """Bounded cache of directory listings, see scanDirectory.
+
+    Directories on local file systems are watched with inotify if possible,
+    cached listings of watched directories are served until inotify reports
+    a change. Other listings are served for up to
+    constants.LISTING_POLL_INTERVAL seconds, then only if the directory
+    mtime is unchanged. inotify doesn't see changes made by other hosts, so
+    network file systems are always polled.
+
+    Examples:
+        >>> directoryCache = DirectoryCache(maxSize=1000)
+        >>> entries = directoryCache.scanDirectory('/shows/foo/comp')
+        >>> entries = directoryCache.scanDirectory('/shows/foo/comp')
+        >>> directoryCache.stats()['hits']
+        1
+
+    """
+
+    def __init__(self, maxSize=constants.LISTING_CACHE_SIZE, inotify=constants.LISTING_INOTIFY):
+        """
+        Args:
+            maxSize (int, optional): Maximum number of listings to keep.
+            inotify (bool, optional): Watch directories on local file systems
+                with inotify, where available.
+
+        """
+        super(DirectoryCache, self).__init__()
+        self._listings = cache.LRUCache(maxSize=maxSize)
+        self._lock = threading.Lock()
+        self._versions = collections.Counter()
+        self._epoch = 0
+        self._inotify = inotify
+        self._watcher = None
+        self._fileSystemTypes = {}
+        self.hits = 0
+        self.revalidations = 0
+        self.listings = 0
+        self.invalidations = 0
+
+    @property
+    def listingCache(self):
+        """cache.LRUCache: Listing by directory."""
+        return self._listings
+
+    def _watcherForDevice(self, device):
+        """Return the watcher if the device can be watched, None otherwise."""
+        if not self._inotify:
+            return None
+        deviceNumber = (os.major(device), os.minor(device))
+        if deviceNumber not in self._fileSystemTypes:
+            # A mount that is new since the mounts were last read.
+            self._fileSystemTypes = readFileSystemTypes()
+        if self._fileSystemTypes.get(deviceNumber, constants.NETWORK_FILE_SYSTEMS[0]) in constants.NETWORK_FILE_SYSTEMS:
+            return None
+        with self._lock:
+            if self._watcher is None:
+                try:
+                    self._watcher = InotifyWatcher(self.invalidate)
+                except (OSError, AttributeError) as error:
+                    LOG.info('Polling directories, inotify is not available: %s', error)
+                    self._inotify = False
+                    return None
+            return self._watcher
+
+    def _pruneWatches(self):
+        """Stop watching directories whose listing was evicted."""
+        maxSize = self._listings.maxSize
+        if len(self._watcher) <= maxSize + maxSize // 4:
+            return
+        for directory in self._watcher.directories:
+            if directory not in self._listings:
+                self._watcher.unwatch(directory)
+                with self._lock:
+                    self._versions.pop(directory, None)
+
+    def _isWatched(self, directory, listing):
+        watcher = self._watcher
+        return (watcher is not None and directory in watcher
+                and listing.version == (self._epoch, self._versions[directory]))
+
+    def scanDirectory(self, directory, sizes=False):
+        """List a directory, see scan.scanDirectory.
+
+        Args:
+            directory (str): Directory to list.
+            sizes (bool, optional): Also get the size of files.
+
+        Returns:
+            list: scan.DirEntry objects, shared by every caller, don't
+                modify them.
+
+        Raises:
+            OSError: If the directory can't be listed.
+
+        """
+        listing = self._listings.get(directory)
+        if listing is not None and (listing.hasSizes or not sizes):
+            now = time.time()
+            if self._isWatched(directory, listing) or \
+                    (listing.trusted and now - listing.checked < constants.LISTING_POLL_INTERVAL):
+                with self._lock:
+                    self.hits += 1
+                return listing.entries
+            if listing.trusted:
+                try:
+                    mtime = os.stat(directory).st_mtime_ns
+                except OSError:
+                    mtime = None
+                if mtime == listing.mtime:
+                    self._listings.put(directory, listing._replace(checked=now))
+                    with self._lock:
+                        self.revalidations += 1
+                    return listing.entries
+        return self._list(directory, sizes)
+
+    def _list(self, directory, sizes):
+        with self._lock:
+            self.listings += 1
+        stat = os.stat(directory)
+        watcher = self._watcherForDevice(stat.st_dev)
+        # Watch before listing, changes during the listing invalidate it.
+        watched = watcher is not None and watcher.watch(directory)
+        version = (self._epoch, self._versions[directory])
+        entries = scan.scanDirectory(directory, sizes)
+        now = time.time()
+        trusted = now - stat.st_mtime_ns / 1e9 >= constants.LISTING_MTIME_GRACE
+        if sizes and not watched:
+            # Files still being written don't change the directory mtime.
+            trusted = trusted and not any(entry.size == 0 for entry in entries)
+        self._listings.put(directory, Listing(entries, sizes, stat.st_mtime_ns, now, trusted, version))
+        if watched:
+            self._pruneWatches()
+        return entries
+
+    def listdir(self, directory):
+        """List the entry names of a directory, see os.listdir."""
+        return [entry.name for entry in self.scanDirectory(directory)]
+
+    def invalidate(self, directory=None):
+        """Drop the listing of a directory.
+
+        Args:
+            directory (str, optional): Directory that changed, None for every
+                directory.
+
+        """
+        with self._lock:
+            if directory is None:
+                self._epoch += 1
+                self.invalidations += len(self._listings)
+                self._listings.clear()
+                return
+            self._versions[directory] += 1
+            if self._listings.pop(directory) is not None:
+                self.invalidations += 1
+
+    def stats(self):
+        """Return the cache counters.
+
+        Returns:
+            dict: hits (served from memory), revalidations (served after an
+                mtime check), listings (listed from disk), invalidations,
+                evictions, size, maxSize and watched directories.
+
+        """
+        listingStats = self._listings.stats()
+        return {'hits': self.hits,
+                'revalidations': self.revalidations,
+                'listings': self.listings,
+                'invalidations': self.invalidations,
+                'evictions': listingStats['evictions'],
+                'size': listingStats['size'],
+                'maxSize': listingStats['maxSize'],
+                'watched': len(self._watcher) if self._watcher is not None else 0}
+
+
+# The listings of the process, see scanDirectory.
+directoryCache = DirectoryCache()
+
+
+def scanDirectory(directory, sizes=False):
+    """List a directory through the process wide cache, see
+    DirectoryCache.scanDirectory."""
+    return directoryCache.scanDirectory(directory, sizes)
+
+
+def listdir(directory):
+    """List the entry names of a directory through the process wide cache."""
+    return directoryCache.listdir(directory)
@@ -0,0 +1,148 @@
+"""Translate paths from one schema to another."""
+
+# Import built-in modules
+import collections
+
+# Import internal modules
+from AssetManager import constants
+
+
+# Outcome of migrating one path. targetPath is None and error describes why
+# if the path could not be migrated.
+MigrationResult = collections.namedtuple('MigrationResult', [
+    'sourcePath',
+    'targetPath',
+    'error',
+])
+
+
+class Migration():
+    """Migrate paths from a source schema to a target schema.
+
+    Paths are parsed with the source schema, their tokens are mapped to the
+    keys of the target schema and rendered with the target schema. Paths
+    are streamed one at a time, so any number of paths can be migrated in
+    constant memory.
+
+    Examples:
+        Rename {@role} to {@task} and add an {@episode} level:
+
+        >>> migration = Migration(oldSchema, newSchema,
+        ...                       keyMap={'task': 'role'},
+        ...                       defaults={'episode': '101'})
+        >>> for result in migration.migrateMany(paths):
+        ...     if result.error:
+        ...         print(result.sourcePath, result.error)
+
+    """
+
+    def __init__(self, source, target, keyMap=None, defaults=None):
+        """
+        Args:
+            source (schema.Schema|registry.SchemaRegistry): Schema the
+                paths follow now. With a registry every path is parsed
+                with the schema it belongs to, see
+                registry.SchemaRegistry.schemaForPath.
+            target (schema.Schema): Schema the paths should follow.
+            keyMap (dict, optional): Target key to source key, for renamed
+                keys. Keys with the same name in both schemas map to
+                themselves.
+            defaults (dict, optional): Target key to value, or to a callable
+                that returns the value given the source tokens, for keys
+                the source schema doesn't have.
+
+        """
+        super(Migration, self).__init__()
+        self.source = source
+        self.target = target
+        self.keyMap = keyMap or {}
+        self.defaults = defaults or {}
+        self.migrated = 0
+        self.failed = 0
+
+        compiled = target.compiled
+        self._targetKeys = compiled.keys
+        self._requiredKeys = frozenset(compiled.keys) - frozenset(compiled.keysOptional)
+
+    def _targetTokens(self, tokens):
+        targetTokens = {}
+        for key in self._targetKeys:
+            sourceKey = self.keyMap.get(key, key)
+            if sourceKey in tokens:
+                value = tokens[sourceKey]
+            elif key in self.defaults:
+                value = self.defaults[key]
+                if callable(value):
+                    value = value(tokens)
+            else:
+                value = None
+            if not value and key in self._requiredKeys:
+                raise KeyError(key)
+            targetTokens[key] = value
+        return targetTokens
+
+    def sourceForPath(self, filePathStr):
+        """Return the schema to parse a source path with.
+
+        Args:
+            filePathStr (str): Path following the source schema.
+
+        Returns:
+            schema.Schema: The source schema, or the schema of the source
+                registry the path belongs to.
+
+        """
+        schemaForPath = getattr(self.source, 'schemaForPath', None)
+        if schemaForPath is None:
+            return self.source
+        return schemaForPath(filePathStr)
+
+    def migrate(self, filePathStr):
+        """Migrate one path.
+
+        Args:
+            filePathStr (str): Path following the source schema.
+
+        Returns:
+            MigrationResult: The migrated path or the reason it failed.
+
+        """
+        error = None
+        targetPath = None
+        source = self.sourceForPath(filePathStr)
+        editableTokens = source.filePathToEditableTokens(filePathStr)
+        if constants.TOKEN_ERROR in editableTokens.values():
+            error = 'Does not match the source schema'
+        else:
+            tokens = source.filePathToTokens(filePathStr)
+            try:
+                targetTokens = self._targetTokens(tokens)
+            except KeyError as key:
+                error = 'No value for target key {0}'.format(key)
+            else:
+                targetPath = self.target.tokensToFilePath(targetTokens)
+                # Values that contain a delimeter of the target schema
+                # render paths that don't parse back.
+                parsedTokens = self.target.filePathToEditableTokens(targetPath)
+                if constants.TOKEN_ERROR in parsedTokens.values():
+                    error = 'Does not round trip through the target schema: {0}'.format(targetPath)
+                    targetPath = None
+
+        if error:
+            self.failed += 1
+        else:
+            self.migrated += 1
+        return MigrationResult(filePathStr, targetPath, error)
+
+    def migrateMany(self, filePaths):
+        """Lazily migrate paths.
+
+        Args:
+            filePaths (iterable): Paths following the source schema.
+
+        Yields:
+            MigrationResult: One result per path, in order.
+
+        """
+        for filePathStr in filePaths:
+            yield self.migrate(filePathStr)
@@ -11,6 +11,7 @@ except NameError:
 import sys
 import re
 import os
+import concurrent.futures
 
 # Import third-party modules
 import nuke  # pylint: disable=import-error
@@ -19,7 +20,11 @@ from Qt import QtCore, QtGui, QtWidgets  # pylint: disable=no-name-in-module
 # Import local modules
 from AssetManager import constants
 from AssetManager import schema
+from AssetManager import registry
+from AssetManager import diagnostics
 from AssetManager import nukeUtils
+from AssetManager import versions
+from AssetManager import frames
 
 
 def scalar(tpl, multiplier):
@@ -288,11 +293,22 @@ class EmptyColumnFilterModel(QtCore.QSortFilterProxyModel):
 
 
 class NodeWrapper():
-    def __init__(self, node, schema) -> None:
+    """A node and the parse result of its file path.
+
+    Args:
+        node (nuke.Node): Node with a 'file' knob.
+        schema (schema.Schema|registry.SchemaRegistry): Parses the path.
+        record (schema.TokenRecord, optional): Parse result, if the path was
+            already parsed.
+
+    """
+    def __init__(self, node, schema, record=None) -> None:
         super(NodeWrapper, self).__init__()
         self._node = node
         self._schema = schema
-        self._tokens = self._schema.filePathToEditableTokens(self.file)
+        if record is None:
+            record = self._schema.tokenRecord(self.file)
+        self._record = record
 
     @property
     def node(self):
@@ -311,19 +327,30 @@ class NodeWrapper():
         undo = nuke.Undo()
         undo.begin("Change value of {0}['file']".format(self.name))
         self._node['file'].setValue(path)
-        self._tokens = self._schema.filePathToEditableTokens(path)
+        self._record = self._schema.tokenRecord(path)
         undo.end()
-       
+
+    @property
+    def record(self):
+        """schema.TokenRecord: Shared parse result of the file path."""
+        return self._record
+
     @property
     def tokens(self):
-        return self._tokens
-    
+        return self._record.editableTokens
+
     @property
     def isValid(self):
-        for key in self.tokens.keys():
-            if self.tokens[key] == constants.TOKEN_ERROR:
-                return False
-        return True
+        return self._record.isValid
+
+    @property
+    def frameRange(self):
+        """tuple|None: (first, last) frame the node reads, None if it has no
+        frame range knobs."""
+        knobs = self._node.knobs()
+        if 'first' not in knobs or 'last' not in knobs:
+            return None
+        return int(self._node['first'].value()), int(self._node['last'].value())
 
 
 
@@ -332,6 +359,16 @@ class NodeWrapper():
 class NodeTableModel(QtCore.QAbstractTableModel):
     """Digest and store nodes and serve their data."""
 
+    # Role of frames.SequenceStatus of a row, on every column.
+    SequenceStatusRole = QtCore.Qt.UserRole + 1
+
+    # Generation of the request and versions.LatestVersion by node name,
+    # emitted from the worker thread, see resolveLatestVersions.
+    latestVersionsResolved = QtCore.Signal(int, object)
+    # Generation of the request and frames.SequenceStatus by node name,
+    # emitted from the worker thread, see checkSequences.
+    sequenceStatusResolved = QtCore.Signal(int, object)
+
     def __init__(self, nodes=None, schemaStr=''):
         """
 
@@ -342,19 +379,36 @@ class NodeTableModel(QtCore.QAbstractTableModel):
         """
         super(NodeTableModel, self).__init__()
 
-        self._schema = schema.Schema(schemaStr)
+        self._registry = registry.SchemaRegistry(schemaStr)
 
         self._nodeList = nodes or []  # type: list
-        self._nodeWrapperDict = {node.name(): NodeWrapper(node, self._schema) for index, node in enumerate(self._nodeList)} or {}  # type: dict
+        self._nodeWrapperDict = {node.name(): NodeWrapper(node, self._registry) for index, node in enumerate(self._nodeList)} or {}  # type: dict
 
         self.palette = get_palette()  # type: QtGui.QPalette
 
+        self._latestVersions = {}
+        self._latestGeneration = 0
+        # Generation of the latest request of every pending row.
+        self._latestRequests = {}
+        self._sequenceStatus = {}
+        self._sequenceGeneration = 0
+        # Generation of the latest request of every pending row.
+        self._sequenceRequests = {}
+        # Background requests run one at a time, each lists its directories
+        # on threads of its own.
+        self._backgroundExecutor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        self.latestVersionsResolved.connect(self._setLatestVersions)
+        self.sequenceStatusResolved.connect(self._setSequenceStatus)
+
     @property
     def schema(self):
-        """
-        TODO: Document
-        """
-        return self._schema
+        """schema.Schema: The primary (first) schema of the registry."""
+        return self._registry.primary
+
+    @property
+    def registry(self):
+        """registry.SchemaRegistry: Schemas used to parse the file paths."""
+        return self._registry
 
     @property
     def nodeList(self):
@@ -379,9 +433,129 @@ class NodeTableModel(QtCore.QAbstractTableModel):
 
     @property
     def columnHeaders(self):
-        headers = self.schema.keysEditable
-        headers.append('file')
-        return headers
+        """tuple: Editable token keys followed by 'file', and the latest
+        version if any schema has a version token, see
+        registry.compileRegistry."""
+        return self._registry.compiled.columnHeaders
+
+    @property
+    def latestVersions(self):
+        """dict: versions.LatestVersion by node name, see
+        resolveLatestVersions."""
+        return self._latestVersions
+
+    def resolveLatestVersions(self, names=None):
+        """Find the latest version on disk of rows in the background.
+
+        Rows are grouped by the directory their version varies in and each
+        directory is listed once. The latest version column is filled in
+        when all directories are listed. Rows that have been requested again
+        in the meantime keep waiting for the newer request, a request whose
+        rows were all requested again doesn't list anything.
+
+        Args:
+            names (iterable, optional): Node names of the rows to resolve,
+                i.e. the rows that were edited or inserted. Defaults to all
+                rows.
+
+        """
+        self._latestGeneration += 1
+        generation = self._latestGeneration
+        if names is None:
+            names = self._nodeWrapperDict.keys()
+        records = {name: self._nodeWrapperDict[name].record for name in names if name in self._nodeWrapperDict}
+        if not records:
+            return
+        for name in records:
+            self._latestRequests[name] = generation
+
+        def resolve():
+            if not any(self._latestRequests.get(name) == generation for name in records):
+                return
+            self.latestVersionsResolved.emit(generation, versions.resolveLatestVersions(records))
+
+        self._backgroundExecutor.submit(resolve)
+
+    def _setLatestVersions(self, generation, latestVersions):
+        names = [name for name, requested in self._latestRequests.items() if requested == generation]
+        if not names:
+            return
+        for name in names:
+            del self._latestRequests[name]
+            if name in latestVersions:
+                self._latestVersions[name] = latestVersions[name]
+            else:
+                self._latestVersions.pop(name, None)
+        column = self._registry.compiled.columnIndex.get(constants.LATEST_VERSION_COLUMN)
+        if column is not None and self.nodeList:
+            self.dataChanged.emit(self.index(0, column), self.index(len(self.nodeList) - 1, column))
+
+    def refreshFromDisk(self, names=None):
+        """Read what is on disk for rows again, in the background.
+
+        Call it once after the rows were loaded, re-tokenized or migrated,
+        and with the names of the changed rows after edits and inserts.
+        setupModelData doesn't, so structural edits and undo don't list
+        every directory again.
+
+        Args:
+            names (iterable, optional): Node names of the rows to refresh.
+                Defaults to all rows.
+
+        """
+        if names is not None:
+            names = list(names)
+        self.resolveLatestVersions(names)
+        self.checkSequences(names)
+
+    @property
+    def sequenceStatus(self):
+        """dict: frames.SequenceStatus by node name, see checkSequences."""
+        return self._sequenceStatus
+
+    def checkSequences(self, names=None):
+        """Find the missing and zero-byte frames of rows in the background.
+
+        The padding of each row is expanded against the frame range of its
+        node and compared with one listing per sequence directory, shared by
+        the rows reading from it. Like resolveLatestVersions, rows that have
+        been requested again wait for the newer request.
+
+        Args:
+            names (iterable, optional): Node names of the rows to check.
+                Defaults to all rows.
+
+        """
+        self._sequenceGeneration += 1
+        generation = self._sequenceGeneration
+        if names is None:
+            names = self._nodeWrapperDict.keys()
+        rows = {name: (self._nodeWrapperDict[name].record, self._nodeWrapperDict[name].frameRange)
+                for name in names if name in self._nodeWrapperDict}
+        if not rows:
+            return
+        for name in rows:
+            self._sequenceRequests[name] = generation
+
+        def check():
+            if not any(self._sequenceRequests.get(name) == generation for name in rows):
+                return
+            self.sequenceStatusResolved.emit(generation, frames.checkSequences(rows))
+
+        self._backgroundExecutor.submit(check)
+
+    def _setSequenceStatus(self, generation, sequenceStatus):
+        names = [name for name, requested in self._sequenceRequests.items() if requested == generation]
+        if not names:
+            return
+        for name in names:
+            del self._sequenceRequests[name]
+            if name in sequenceStatus:
+                self._sequenceStatus[name] = sequenceStatus[name]
+            else:
+                self._sequenceStatus.pop(name, None)
+        if self.nodeList:
+            self.dataChanged.emit(self.index(0, 0), self.index(len(self.nodeList) - 1, len(self.columnHeaders) - 1))
 
     @nodeList.setter
     def nodeList(self, nodes):
@@ -447,13 +621,22 @@ class NodeTableModel(QtCore.QAbstractTableModel):
 
         return len(self.columnHeaders)
 
-    def setupModelData(self):
+    def setupModelData(self, records=None):
         """Read all knob names from set self.node_list to define header.
 
         First all knobs to display are collected. To match this list, all
         knobs to remove and to add are collected and removed and inserted as
         needed.
 
+        Nothing is read from disk, see refreshFromDisk.
+
+        Args:
+            records (dict, optional): schema.TokenRecord by node name, for
+                nodes that were already parsed. Other nodes are parsed.
+
+        Returns:
+            list: Names of the nodes that are new or whose file path changed.
+
         """
 
         # Collect all knobs to display.
@@ -472,7 +655,13 @@ class NodeTableModel(QtCore.QAbstractTableModel):
                 # Continue with the next node, since we removed this node.
                 continue
 
-        self._nodeWrapperDict = {node.name(): NodeWrapper(node, self._schema) for index, node in enumerate(self._nodeList)}
+        if records is None:
+            # Parse every file path in one call, nodes that read the same path
+            # share its parse result.
+            parsed = self._registry.parseMany(node['file'].value() for node in self._nodeList)
+            records = {node.name(): parsed.record(row) for row, node in enumerate(self._nodeList)}
+        previousFiles = {name: nodeWrapper.record.filePath for name, nodeWrapper in self._nodeWrapperDict.items()}
+        self._nodeWrapperDict = {node.name(): NodeWrapper(node, self._registry, records.get(node.name())) for node in self._nodeList}
 
         # This is dirty. Removing each column and then re-creatng it
         self.removeColumns(parent=QtCore.QModelIndex(),
@@ -484,6 +673,73 @@ class NodeTableModel(QtCore.QAbstractTableModel):
                             count=len(self.columnHeaders),
                             items=self.columnHeaders)
 
+        return [name for name, nodeWrapper in self._nodeWrapperDict.items()
+                if previousFiles.get(name) != nodeWrapper.record.filePath]
+
+    def iterSetupModelData(self, chunkSize=constants.RETOKENIZE_CHUNK_SIZE):
+        """Re-tokenize the nodes in chunks, then set up the model.
+
+        A generator that yields the number of nodes done after every chunk,
+        so the caller can spread the work over several event loop iterations
+        and cancel it by dropping the generator. Paths are parsed level by
+        level, so levels that didn't change since the last schema are read
+        from the level cache. The model is only changed once all nodes are
+        parsed, and not at all if the schemas change in the meantime.
+
+        Args:
+            chunkSize (int, optional): Nodes to parse per chunk.
+
+        Yields:
+            int: Number of nodes parsed so far.
+
+        """
+        registry = self._registry
+        generation = registry.generation
+        records = {}
+        for index, node in enumerate(list(self._nodeList)):
+            if index and index % chunkSize == 0:
+                yield index
+                if registry.generation != generation:
+                    return
+            if nukeUtils.node_exists(node):
+                records[node.name()] = registry.tokenRecordFromLevels(node['file'].value())
+
+        if registry.generation == generation:
+            registry.diagnostics.logSummary()
+            self.setupModelData(records)
+            self.refreshFromDisk()
+
+    def migrateNodes(self, migration):
+        """Migrate the file paths of all loaded nodes in one undo group.
+
+        The model is not set up again, the rows keep their old records. The
+        caller switches the registry to the target schema, then calls
+        setupModelData and refreshFromDisk once.
+
+        Args:
+            migration (migration.Migration): Source to target schema
+                migration.
+
+        Returns:
+            list: migration.MigrationResult of the paths that could not be
+                migrated.
+
+        """
+        failures = []
+        nodes = [node for node in self.nodeList if nukeUtils.node_exists(node)]
+        undo = nuke.Undo()
+        undo.begin("Migrate ['file'] of {0} nodes via Asset Manager".format(len(nodes)))
+        try:
+            for node, result in zip(nodes, migration.migrateMany(node['file'].value() for node in nodes)):
+                if result.error:
+                    failures.append(result)
+                elif result.targetPath != result.sourcePath:
+                    node['file'].setValue(result.targetPath)
+        finally:
+            undo.end()
+
+        return failures
+
     def insertColumns(self, column, count, parent, items):
         """Add items to header.
 
@@ -545,7 +801,7 @@ class NodeTableModel(QtCore.QAbstractTableModel):
             self._nodeList.insert(row + i, item)
         self.endInsertRows()
 
-        self.setupModelData()
+        self.refreshFromDisk(self.setupModelData())
 
         return True
 
@@ -586,6 +842,7 @@ class NodeTableModel(QtCore.QAbstractTableModel):
                 QtCore.Qt.EditRole: value of knob at current index
                 QtCore.Qt.DisplayRole: current value of knob as str
                 QtCore.Qt.UserRole: the knob itself at current index
+                SequenceStatusRole: frames.SequenceStatus of the row
 
         Returns:
             str|bool|tuple|list|nuke.Knob: The value of the current knob or the
@@ -608,13 +865,32 @@ class NodeTableModel(QtCore.QAbstractTableModel):
                             count=1)
             return
 
+        if role == self.SequenceStatusRole:
+            return self._sequenceStatus.get(nodeWrapper.name)
         if role == QtCore.Qt.CheckStateRole:
             return None
         if role == QtCore.Qt.TextAlignmentRole:
             return None
-        
-        if self.columnHeaders[col] != 'file':
-            key = self.schema.keysEditable[col]
+        if role == QtCore.Qt.ToolTipRole and nodeWrapper.record.diagnostics:
+            return '\n'.join(diagnostics.describe(diagnostic) for diagnostic in nodeWrapper.record.diagnostics)
+
+        key = self._registry.compiled.columnHeaders[col]
+        if key == constants.LATEST_VERSION_COLUMN:
+            latest = self._latestVersions.get(nodeWrapper.name)
+            if role == QtCore.Qt.DisplayRole:
+                if latest is not None:
+                    return latest.value
+                return '...' if nodeWrapper.name in self._latestRequests else ''
+            if role == QtCore.Qt.ForegroundRole and latest is not None and not latest.isLatest:
+                return QtGui.QColor(constants.STALE_VERSION_COLOR)
+            if role == QtCore.Qt.ToolTipRole and latest is not None:
+                return latest.filePath
+            # Not editable, see flags.
+            return None
+        if key != 'file':
+            # The row's schema doesn't have this column.
+            if key not in nodeWrapper.tokens:
+                return None
             data = nodeWrapper.tokens[key]
             if not data:
                 if role == QtCore.Qt.ForegroundRole:
@@ -627,10 +903,28 @@ class NodeTableModel(QtCore.QAbstractTableModel):
                         return QtGui.QColor(QtCore.Qt.red)
                     if role == QtCore.Qt.DisplayRole:
                         return 'ERROR'
+                constraintStr = nodeWrapper.record.violations.get(key)
+                if constraintStr is not None:
+                    if role == QtCore.Qt.ForegroundRole:
+                        return QtGui.QColor(constants.TOKEN_VIOLATION_COLOR)
+                    if role == QtCore.Qt.ToolTipRole:
+                        return "'{0}' doesn't satisfy the constraints of {1}: {2}".format(data, key, constraintStr)
         else:
             data = nodeWrapper.file
+            status = self._sequenceStatus.get(nodeWrapper.name)
             if role == QtCore.Qt.ForegroundRole:
+                if status is not None and status.status == constants.SEQUENCE_PARTIAL:
+                    return QtGui.QColor(constants.SEQUENCE_PARTIAL_COLOR)
+                if status is not None and status.status == constants.SEQUENCE_ABSENT:
+                    return QtGui.QColor(constants.SEQUENCE_ABSENT_COLOR)
                 return QtGui.QColor('#777777')
+            if role == QtCore.Qt.ToolTipRole and status is not None and status.status != constants.SEQUENCE_COMPLETE:
+                lines = ['{0}: {1} of {2} frames found'.format(status.status, len(status.found), len(status.expected))]
+                if status.missing:
+                    lines.append('Missing: {0}'.format(status.missing))
+                if status.empty:
+                    lines.append('Empty: {0}'.format(status.empty))
+                return '\n'.join(lines)
 
         '''
         if role == QtCore.Qt.FontRole:
@@ -653,7 +947,7 @@ class NodeTableModel(QtCore.QAbstractTableModel):
         elif role == QtCore.Qt.UserRole:
             if not nodeWrapper.isValid:
                 return None
-            if self.columnHeaders[col] != 'file':
+            if key != 'file':
                 return data
 
         
@@ -705,16 +999,20 @@ class NodeTableModel(QtCore.QAbstractTableModel):
             col = index.column()
             nodeWrapper = self.nodeWrapperDict[self.nodeList[row].name()]
 
-            key = self.schema.keysEditable[col]
-            tokens = self.schema.filePathToTokens(nodeWrapper.file)
-            tokens[key] = value
-            path = self.schema.tokensToFilePath(tokens)
+            if not nodeWrapper.isValid:
+                return True
 
-            for key in nodeWrapper.tokens.keys():
-                if nodeWrapper.tokens[key] == constants.TOKEN_ERROR:
-                    return True
+            # Only splice the edited token into the path, every other
+            # character of the path stays as it is.
+            key = self._registry.compiled.columnHeaders[col]
+            if key == constants.LATEST_VERSION_COLUMN:
+                return False
+            path = schema.spliceFilePath(nodeWrapper.file,
+                                         nodeWrapper.record.spans,
+                                         {key: value})
 
             nodeWrapper.file = path
+            self.refreshFromDisk([nodeWrapper.name])
 
             return True
         return False
@@ -757,24 +1055,26 @@ class NodeTableModel(QtCore.QAbstractTableModel):
 
         """
         if orientation == QtCore.Qt.Horizontal:
-            if section >= len(self.columnHeaders):
+            compiled = self._registry.compiled
+            columnHeaders = compiled.columnHeaders
+            if section >= len(columnHeaders):
                 return None
 
+            key = columnHeaders[section]
             if role == QtCore.Qt.DisplayRole:
-                key = self.columnHeaders[section]
+                if key == constants.LATEST_VERSION_COLUMN:
+                    return key
                 if key != 'file':
                     return '@{0}    '.format(key)
                 else:
                     return key
             elif role == QtCore.Qt.UserRole:
-                return self.columnHeaders[section]
+                return key
             elif role == QtCore.Qt.ForegroundRole:
-                key = self.columnHeaders[section]
-                if key != 'file':
-                    if bool(os.environ.get('ASSET_MANAGER_ENABLE_COLOR', True)):
-                        return QtGui.QColor(self.schema.tokenColors[key])   
+                if key in compiled.tokenColors:
+                    if compiled.enableColor:
+                        return QtGui.QColor(compiled.tokenColors[key])
             elif role == QtCore.Qt.BackgroundRole:
-                key = self.columnHeaders[section]
                 if key == 'file':
                     return QtGui.QColor('#444444')
             return None
@@ -305,3 +305,40 @@ def ask(prompt=""):
         reply = reply == QtWidgets.QMessageBox.Yes
 
     return reply
+
+
+def getInput(prompt="", default=""):
+    """Ask user for a line of text.
+
+    Args:
+        prompt (str, optional): Question to display.
+        default (str, optional): Initial text.
+
+    Returns:
+        str|None: Users text, None if cancelled.
+
+    """
+    if NUKE_LOADED:
+        reply = nuke.getInput(prompt, default)
+    else:
+        reply, accepted = QtWidgets.QInputDialog.getText(None,
+                                                         constants.PACKAGE_NICE_NAME,
+                                                         prompt,
+                                                         text=default)
+        if not accepted:
+            reply = None
+
+    return reply or None
+
+
+def message(prompt=""):
+    """Show user a message.
+
+    Args:
+        prompt (str, optional): Message to display.
+
+    """
+    if NUKE_LOADED:
+        nuke.message(prompt)
+    else:
+        QtWidgets.QMessageBox.information(None, constants.PACKAGE_NICE_NAME, prompt)
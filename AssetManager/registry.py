@@ -0,0 +1,308 @@
+"""Several schemas side by side, each path is parsed by its own schema."""
+
+# Import built-in modules
+import os
+import types
+import collections
+
+# Import internal modules
+from AssetManager import constants
+from AssetManager import schema
+from AssetManager import diagnostics as schemaDiagnostics
+
+
+def schemaStringsFromString(schemasStr):
+    """Split a schema override into schema strings.
+
+    Schemas are separated by ``constants.SCHEMA_SEPARATOR`` and environment
+    variables are expanded, i.e. ``$CAMERA_SCHEMA;$RENDER_SCHEMA``.
+
+    Args:
+        schemasStr (str): One or more schemas.
+
+    Returns:
+        list: Schema strings, in order of priority.
+
+    """
+    schemaStrs = []
+    for schemaStr in schemasStr.split(constants.SCHEMA_SEPARATOR):
+        schemaStr = os.path.expandvars(schemaStr.strip())
+        if schemaStr:
+            schemaStrs.append(schemaStr)
+    return schemaStrs
+
+
+def constantPrefix(tokensList):
+    """Return the leading path levels of a schema that are constant.
+
+    Args:
+        tokensList (tuple): Tokens per path level.
+
+    Returns:
+        tuple: Level strings up to the first level with a variable token.
+
+    """
+    prefix = []
+    for tokens in tokensList:
+        if any(token['type'] != constants.TOKEN_CONST for token in tokens):
+            break
+        prefix.append(''.join(token['key'] for token in tokens))
+    return tuple(prefix)
+
+
+class DispatchTrie():
+    """Route paths to schemas by their constant leading levels and depth.
+
+    Every schema is stored at the trie node of its constant prefix, keyed
+    by its number of levels. Looking up a path walks its leading levels once
+    and collects the schemas of matching depth on the way, most specific
+    prefix first.
+
+    """
+
+    def __init__(self):
+        super(DispatchTrie, self).__init__()
+        self._root = ({}, {})
+
+    def insert(self, prefix, depth, item):
+        """Add an item for paths that start with prefix and have depth levels.
+
+        Args:
+            prefix (tuple): Constant leading levels.
+            depth (int): Number of levels.
+            item (object): Item to return for matching paths.
+
+        """
+        children, items = self._root
+        for level in prefix:
+            children, items = children.setdefault(level, ({}, {}))
+        items.setdefault(depth, []).append(item)
+
+    def candidates(self, filePathStr):
+        """Return the items that may parse a path, most specific first.
+
+        Args:
+            filePathStr (str): Path to route.
+
+        Returns:
+            list: Candidate items.
+
+        """
+        levels = filePathStr.split('/')[1:]
+        depth = len(levels)
+        children, items = self._root
+        found = list(items.get(depth, ()))
+        for level in levels:
+            node = children.get(level)
+            if node is None:
+                break
+            children, items = node
+            found[0:0] = items.get(depth, ())
+        return found
+
+
+# Union of the columns of all schemas of a registry, swapped as a whole
+# when the schemas change. See schema.CompiledSchema. columnHeaders end
+# with the latest version column if any schema has a version token.
+CompiledRegistry = collections.namedtuple('CompiledRegistry', [
+    'schemas',
+    'trie',
+    'keys',
+    'keysEditable',
+    'columnHeaders',
+    'columnIndex',
+    'tokenColors',
+    'enableColor',
+])
+
+
+def compileRegistry(schemas):
+    """Build the dispatch trie and union columns of several schemas.
+
+    Args:
+        schemas (list): schema.Schema objects, in order of priority.
+
+    Returns:
+        CompiledRegistry: The compiled registry.
+
+    """
+    trie = DispatchTrie()
+    keys = []
+    keysEditable = []
+    for item in schemas:
+        compiled = item.compiled
+        trie.insert(constantPrefix(compiled.tokensList), len(compiled.tokensList), item)
+        keys += [key for key in compiled.keys if key not in keys]
+        keysEditable += [key for key in compiled.keysEditable if key not in keysEditable]
+
+    # Keys of the primary schema keep the colors of its schema string, the
+    # keys only other schemas have get the next colors.
+    colors = constants.TOKEN_COLORS_LIST
+    tokenColors = dict(schemas[0].compiled.tokenColors) if schemas else {}
+    for key in keysEditable:
+        if key not in tokenColors:
+            tokenColors[key] = colors[len(tokenColors) % len(colors)]
+    columnHeaders = tuple(keysEditable) + ('file',)
+    if any(key.lower() == constants.VERSION_KEY for key in keys):
+        columnHeaders += (constants.LATEST_VERSION_COLUMN,)
+    return CompiledRegistry(
+        schemas=tuple(schemas),
+        trie=trie,
+        keys=tuple(keys),
+        keysEditable=tuple(keysEditable),
+        columnHeaders=columnHeaders,
+        columnIndex=types.MappingProxyType({key: col for col, key in enumerate(columnHeaders)}),
+        tokenColors=types.MappingProxyType(tokenColors),
+        enableColor=bool(os.environ.get('ASSET_MANAGER_ENABLE_COLOR', True)),
+    )
+
+
+class SchemaRegistry():
+    """Load several schemas and parse every path with the schema it matches.
+
+    Provides the same parse interface as schema.Schema (tokenRecord,
+    parseMany), so a model can hold either.
+
+    Examples:
+        >>> registry = SchemaRegistry('$CAMERA_SCHEMA;$RENDER_SCHEMA')
+        >>> registry.schemaForPath('/shows/foo/cameras/foo_cam_v001.abc')
+
+    """
+
+    def __init__(self, schemasStr=''):
+        """
+        Args:
+            schemasStr (str, optional): Schemas separated by
+                constants.SCHEMA_SEPARATOR. Defaults to
+                $ASSET_MANAGER_SCHEMA.
+
+        """
+        super(SchemaRegistry, self).__init__()
+        self._generation = 0
+        # One collector for all schemas, so there is one summary per parse.
+        self._diagnostics = schemaDiagnostics.DiagnosticsCollector()
+        self._schemaStrs = self._schemaStrsFromString(schemasStr)
+        self._compiled = compileRegistry([schema.Schema(schemaStr, diagnostics=self._diagnostics)
+                                          for schemaStr in self._schemaStrs])
+
+    @staticmethod
+    def _schemaStrsFromString(schemasStr):
+        schemaStrs = schemaStringsFromString(schemasStr)
+        if not schemaStrs:
+            schemaStrs = schemaStringsFromString(
+                str(os.environ.get('ASSET_MANAGER_SCHEMA', constants.SCHEMA_DEFAULT)))
+        return tuple(schemaStrs)
+
+    def updateSchemasFromString(self, schemasStr):
+        """Replace all schemas, see __init__.
+
+        Schemas whose string didn't change are kept along with their parse
+        caches. An edited schema is updated in place with
+        schema.Schema.updateSchemaFromString, so only an actual change of its
+        tokens clears its parse cache, and the levels that didn't change keep
+        their matches in schema.levelCache.
+
+        Returns:
+            bool: True if any schema changed.
+
+        """
+        schemaStrs = self._schemaStrsFromString(schemasStr)
+        if schemaStrs == self._schemaStrs:
+            return False
+
+        kept = dict(zip(self._schemaStrs, self._compiled.schemas))
+        # Schemas whose string is gone, by position, to be edited into the
+        # new string at the same position.
+        edited = {index: schemaObj
+                  for index, (schemaStr, schemaObj) in enumerate(zip(self._schemaStrs, self._compiled.schemas))
+                  if schemaStr not in schemaStrs}
+        schemas = []
+        for index, schemaStr in enumerate(schemaStrs):
+            if schemaStr in kept:
+                schemaObj = kept[schemaStr]
+            elif index in edited:
+                schemaObj = edited.pop(index)
+                schemaObj.updateSchemaFromString(schemaStr)
+            else:
+                schemaObj = schema.Schema(schemaStr, diagnostics=self._diagnostics)
+            schemas.append(schemaObj)
+        compiled = compileRegistry(schemas)
+        self._schemaStrs = schemaStrs
+        self._compiled = compiled
+        self._generation += 1
+        return True
+
+    @property
+    def compiled(self):
+        """CompiledRegistry: Current snapshot of the registry."""
+        return self._compiled
+
+    @property
+    def generation(self):
+        """int: Incremented every time the schemas change."""
+        return self._generation
+
+    @property
+    def diagnostics(self):
+        """diagnostics.DiagnosticsCollector: Shared by all schemas."""
+        return self._diagnostics
+
+    @property
+    def schemas(self):
+        """tuple: schema.Schema objects in order of priority."""
+        return self._compiled.schemas
+
+    @property
+    def primary(self):
+        """schema.Schema: The first, highest priority schema."""
+        return self._compiled.schemas[0]
+
+    def schemaForPath(self, filePathStr):
+        """Return the schema a path belongs to.
+
+        Only the schemas whose constant leading levels and depth fit the path
+        are tried. If none of them matches, the most specific candidate is
+        returned so the errors are reported against the likeliest schema.
+
+        Args:
+            filePathStr (str): Path to route.
+
+        Returns:
+            schema.Schema: Schema to parse the path with.
+
+        """
+        compiled = self._compiled
+        candidates = compiled.trie.candidates(filePathStr)
+        if not candidates:
+            return compiled.schemas[0]
+        if len(candidates) > 1:
+            for candidate in candidates:
+                if candidate.compiled.pathMatcher(filePathStr):
+                    return candidate
+        return candidates[0]
+
+    def tokenRecord(self, filePathStr):
+        """Parse a path with its own schema, see schema.Schema.tokenRecord."""
+        return self.schemaForPath(filePathStr).tokenRecord(filePathStr)
+
+    def tokenRecordFromLevels(self, filePathStr):
+        """Parse a path with its own schema, see schema.Schema.tokenRecordFromLevels."""
+        return self.schemaForPath(filePathStr).tokenRecordFromLevels(filePathStr)
+
+    def parseMany(self, filePaths):
+        """Parse many paths with their own schemas into one columnar result.
+
+        Columns are the union of the keys of all schemas, a row has None for
+        keys its schema doesn't have. See schema.Schema.parseMany.
+
+        """
+        compiled = self._compiled
+        parsed = schema.ParsedPaths(compiled.keys, compiled.keysEditable)
+        records = {}
+        for filePathStr in filePaths:
+            record = records.get(filePathStr)
+            if record is None:
+                record = records[filePathStr] = self.tokenRecord(filePathStr)
+            parsed.append(record)
+        self._diagnostics.logSummary()
+        return parsed
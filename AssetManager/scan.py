@@ -0,0 +1,215 @@
+"""Plan and run file system searches for paths that follow a schema."""
+
+# Import built-in modules
+import os
+import collections
+import concurrent.futures
+
+# Import internal modules
+from AssetManager import constants
+from AssetManager import sequence
+
+
+# An entry of a directory listing, see scanDirectory. size is None unless
+# sizes were asked for.
+DirEntry = collections.namedtuple('DirEntry', [
+    'name',
+    'isDir',
+    'size',
+])
+
+
+def walkPlan(plan, listdir=os.listdir):
+    """Lazily list the paths a scan plan may match.
+
+    Only the roots and the directories matching the plan are listed. Paths
+    still have to be parsed to check tokens that repeat across levels, see
+    findPaths.
+
+    Args:
+        plan (schema.ScanPlan): The plan, see schema.Schema.scanPlan.
+        listdir (callable, optional): Lists the entry names of a directory.
+
+    Yields:
+        str: Paths whose every level matches the plan.
+
+    """
+    lastLevel = len(plan.levelMatchers) - 1
+    stack = [(root, 0) for root in reversed(plan.roots)]
+    while stack:
+        directory, level = stack.pop()
+        try:
+            names = listdir(directory)
+        except OSError:
+            continue
+        matcher = plan.levelMatchers[level]
+        matches = [name for name in sorted(names) if matcher(name)]
+        prefix = directory.rstrip('/')
+        if level == lastLevel:
+            for name in matches:
+                yield prefix + '/' + name
+        else:
+            stack += [(prefix + '/' + name, level + 1) for name in reversed(matches)]
+
+
+def recordMatchesTokens(record, tokens):
+    """Return True if a parsed path has one of the known values of every token.
+
+    Args:
+        record (schema.TokenRecord): Parse result of the path.
+        tokens (dict): Key to tuple of values, see
+            schema.tokenAlternatives.
+
+    Returns:
+        bool: True if the path is valid and matches tokens.
+
+    """
+    if not record.isValid:
+        return False
+    for key, values in tokens.items():
+        value = record.tokens.get(key) or ''
+        if value in values:
+            continue
+        # Records hold the canonical padding, compare any notation by width.
+        if record.sequence is not None and key.lower() == constants.PADDING_KEY:
+            widths = [sequence.parsePadding(item) for item in values if item]
+            if any(width is not None and width[0] == record.sequence.width for width in widths):
+                continue
+        return False
+    return True
+
+
+def findPaths(schemaObj, partialTokens, listdir=os.listdir):
+    """Lazily find the paths of a schema that have some known tokens.
+
+    Examples:
+        >>> for path in findPaths(schema, {'show': 'foo', 'shot': '0080', 'role': 'precomp'}):
+        ...     print(path)
+
+    Args:
+        schemaObj (schema.Schema): Schema the paths follow.
+        partialTokens (dict): Known tokens, see schema.Schema.scanPlan.
+        listdir (callable, optional): Lists the entry names of a directory.
+
+    Yields:
+        str: Paths that match the schema and the known tokens.
+
+    """
+    plan = schemaObj.scanPlan(partialTokens)
+    for filePathStr in walkPlan(plan, listdir):
+        if recordMatchesTokens(schemaObj.tokenRecord(filePathStr), plan.tokens):
+            yield filePathStr
+
+
+def scanDirectory(directory, sizes=False):
+    """List a directory with os.scandir.
+
+    The entry type comes with the listing on most file systems, telling
+    directories from files costs no extra stat call per entry.
+
+    Args:
+        directory (str): Directory to list.
+        sizes (bool, optional): Also get the size of files. Free on Windows,
+            where the listing has them, one stat per file elsewhere.
+
+    Returns:
+        list: DirEntry per entry.
+
+    Raises:
+        OSError: The directory can't be listed.
+
+    """
+    with os.scandir(directory) as entries:
+        if not sizes:
+            return [DirEntry(entry.name, entry.is_dir(), None) for entry in entries]
+        listing = []
+        for entry in entries:
+            isDir = entry.is_dir()
+            try:
+                size = None if isDir else entry.stat().st_size
+            except OSError:
+                size = None
+            listing.append(DirEntry(entry.name, isDir, size))
+        return listing
+
+
+def scanPaths(plan, scandir=scanDirectory, workers=constants.SCAN_WORKERS):
+    """Lazily list the paths a scan plan may match on a thread pool.
+
+    Like walkPlan, but up to workers directories are listed at once, which
+    hides the latency of network file systems. Only directories whose name
+    matches their level are descended into, files on directory levels are
+    skipped. Paths are yielded as their directory listings complete, in no
+    particular order.
+
+    Args:
+        plan (schema.ScanPlan): The plan, see schema.Schema.scanPlan.
+        scandir (callable, optional): Lists a directory as DirEntry objects.
+        workers (int, optional): Number of threads listing directories.
+
+    Yields:
+        str: Paths whose every level matches the plan.
+
+    """
+    lastLevel = len(plan.levelMatchers) - 1
+    maxPending = workers * constants.SCAN_PENDING_PER_WORKER
+    # Depth first, so the directories waiting to be listed stay few.
+    stack = [(root, 0) for root in reversed(plan.roots)]
+    pending = {}
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+    try:
+        while stack or pending:
+            while stack and len(pending) < maxPending:
+                directory, level = stack.pop()
+                pending[executor.submit(scandir, directory)] = (directory, level)
+            done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                directory, level = pending.pop(future)
+                try:
+                    entries = future.result()
+                except OSError:
+                    continue
+                matcher = plan.levelMatchers[level]
+                prefix = directory.rstrip('/')
+                if level == lastLevel:
+                    for entry in entries:
+                        if matcher(entry.name):
+                            yield prefix + '/' + entry.name
+                else:
+                    stack += [(prefix + '/' + entry.name, level + 1) for entry in entries
+                              if entry.isDir and matcher(entry.name)]
+    finally:
+        # A consumer that stops early leaves listings queued. Cancel them
+        # one by one, shutdown has no cancel_futures before Python 3.9.
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=False)
+
+
+def scanRecords(schemaObj, partialTokens=None, scandir=scanDirectory, workers=constants.SCAN_WORKERS):
+    """Lazily find and parse the paths of a schema on disk.
+
+    Walks the levels of the schema from its constant or known leading
+    directories, see schema.Schema.scanPlan, pruning every entry whose name
+    can't match its level.
+
+    Examples:
+        >>> for record in scanRecords(schema, {'show': 'foo'}):
+        ...     print(record.filePath, record.tokens['shot'])
+
+    Args:
+        schemaObj (schema.Schema): Schema the paths follow.
+        partialTokens (dict, optional): Known tokens, i.e. the show.
+        scandir (callable, optional): Lists a directory as DirEntry objects.
+        workers (int, optional): Number of threads listing directories.
+
+    Yields:
+        schema.TokenRecord: Parse result of every path that matches the
+            schema and the known tokens.
+
+    """
+    plan = schemaObj.scanPlan(partialTokens or {})
+    for filePathStr in scanPaths(plan, scandir, workers):
+        record = schemaObj.tokenRecord(filePathStr)
+        if recordMatchesTokens(record, plan.tokens):
+            yield record
@@ -4,10 +4,16 @@
 # pylint: disable=import-error
 import os
 import re
-import logging
+import array
+import types
+import itertools
+import collections
 
 # Import internal modules
 from AssetManager import constants
+from AssetManager import cache
+from AssetManager import sequence
+from AssetManager import diagnostics as schemaDiagnostics
 
 def splitStringComponents(inputString):
     # This regex will match parts inside the curly braces and parts outside them
@@ -31,7 +37,7 @@ def schematokensListFromString(schemaStr):
 
         tokens = []
         for component in pathItemComponents:
-            token = {'key': component, 'type': constants.TOKEN_CONST, 'delimeter': '', 'isOptional': False}
+            token = {'key': component, 'type': constants.TOKEN_CONST, 'delimeter': '', 'isOptional': False, 'constraints': ()}
 
             if component[0] == '*':
                 token['isOptional'] = True
@@ -62,321 +68,1213 @@ def schematokensListFromString(schemaStr):
                 if component[0] == '#':
                     token['type'] = constants.TOKEN_HIDDEN_VAR
                 component = component[1:]
-                token['key'] = component
+                key, separator, constraintStr = component.partition(constants.TOKEN_CONSTRAINT_SEPARATOR)
+                token['key'] = key
+                if separator:
+                    if not constraintStr:
+                        raise Exception("A token contains a constraint separator without constraints")
+                    token['constraints'] = tuple(constraintStr.split(constants.TOKEN_CONSTRAINT_DELIMITER))
 
             tokens.append(token)
         tokensList.append(tokens)
     return tokensList
 
 
-def tokenizePathComponent (tokens, pathComponent):
-    tokenizedComponents = []
+def tokenValueExcludedChars(tokens):
+    """Return the characters a token value can't contain on a level.
 
-    containsOptionalToken = False
-    optionalIndex = None
-    paddingOptional = False
+    Values can't contain the path separator or any delimeter used by the
+    tokens of the same level, which keeps every token boundary unambiguous.
 
-    baseDelimeters = []
-    extensionDelimeters = []
+    Args:
+        tokens (list): Tokens of one path level.
 
-    i = 0
-    for token in tokens:
-        if token['isOptional'] == True and token['delimeter'] != '.':
-            containsOptionalToken = True
-            optionalIndex = i
-        i+=1
+    Returns:
+        str: Excluded characters.
 
+    """
+    excluded = {'/'}
     for token in tokens:
-        if token['isOptional'] == True and token['delimeter'] == '.':
-            paddingOptional = True
-
-    base = pathComponent
-    extension = ''
-    if '.' in pathComponent:
-        if pathComponent.count('.') > 2:
-            raise Exception("There should not be more than two '.' characters in filename")
-        if pathComponent.count('.') == 2 and paddingOptional != True:
-            raise Exception("Padding is not optional in this pipeline. There should not be more than one '.' characters in filename")
-        extension = pathComponent.split('.', 1)[1]
-        base = pathComponent.split('.', 1)[0]
-        
-    # Fetch the delimeters
-    for token in tokens:
-        if token['type'] == constants.TOKEN_CONST:
-            baseDelimeters.append(token['type'])
+        if token['type'] != constants.TOKEN_CONST and token['delimeter']:
+            excluded.add(token['delimeter'])
+    return ''.join(sorted(excluded))
+
+
+def tokenValuePattern(tokens):
+    """Return the regex character class a token value may contain on a level.
+
+    Args:
+        tokens (list): Tokens of one path level.
+
+    Returns:
+        str: Regex character class, see tokenValueExcludedChars.
+
+    """
+    return '[^{0}]*'.format(re.escape(tokenValueExcludedChars(tokens)))
+
+
+def constraintValuePattern(constraints, excluded):
+    """Compile the constraints of a token into the regex its value must match.
+
+    Constraints are ``digits``, ``alpha``, ``alnum`` and ``chars=<chars>``
+    for the allowed characters, ``lower`` or ``upper`` for the case and
+    ``len=<n>`` or ``len=<min>-<max>`` for the length.
+
+    Examples:
+        >>> constraintValuePattern(('digits', 'len=4'), '/_')
+        '[0-9]{4}'
+
+    Args:
+        constraints (tuple): Constraint strings of the token.
+        excluded (str): Characters no token value may contain on the level,
+            see tokenValueExcludedChars.
+
+    Returns:
+        str: Regex source.
+
+    """
+    charSets = ''
+    extraChars = ''
+    case = ''
+    repeat = '*'
+    for constraint in constraints:
+        name, _, argument = constraint.partition('=')
+        if name in constants.TOKEN_CONSTRAINT_CHARS:
+            charSets += constants.TOKEN_CONSTRAINT_CHARS[name]
+        elif name in constants.TOKEN_CONSTRAINT_CASES:
+            case = name
+        elif name == 'len':
+            minimum, _, maximum = argument.partition('-')
+            if not minimum.isdigit() or not (maximum.isdigit() or maximum == ''):
+                raise Exception("Invalid length constraint '{0}'".format(constraint))
+            repeat = '{' + minimum + (',' + maximum if maximum else '') + '}'
+        elif name == 'chars' and argument:
+            extraChars += ''.join(char for char in argument if char not in excluded)
         else:
-            if token['delimeter'] != '.':
-                baseDelimeters.append(token['delimeter'])
-            if token['delimeter'] == '.':
-                extensionDelimeters.append(token['delimeter'])
-
-    # Fetch the number of the tokens in the base part, split by delimeters (or constant tokens)
-    # We need to know the count, in case we have variants in the token list
-    i = 1
-    base2 = base
+            raise Exception("Unknown token constraint '{0}'".format(constraint))
+
+    if charSets or extraChars:
+        if case:
+            charSets = charSets.replace(constants.TOKEN_CONSTRAINT_CASES[case], '')
+        return '[' + charSets + re.escape(extraChars) + ']' + repeat
+    caseRange = constants.TOKEN_CONSTRAINT_CASES[case] if case else ''
+    return '[^' + re.escape(excluded) + caseRange + ']' + repeat
+
+
+def compileLevelPattern(tokens):
+    """Compile the tokens of one path level into a regex source.
+
+    Every variable token becomes one capturing group for its value. Optional
+    tokens become optional non-capturing groups that include their
+    delimeter, preceded by an empty marker group that records where the
+    token would be inserted if it is absent.
+
+    The value group of a token with constraints tries the constrained value
+    first, marked by an empty check group, and falls back to any value. The
+    check group only participates if the value satisfies the constraints,
+    so constraints are validated by the same match that tokenizes the path.
+
+    Args:
+        tokens (list): Tokens of one path level.
+
+    Returns:
+        tuple: (str regex source,
+            list of (key, delimeter, valueGroup, markerGroup) per variable
+            token with group numbers relative to this level,
+            int number of groups in the level,
+            list of (key, valueGroup, checkGroup, constraintStr) per token
+            with constraints)
+
+    """
+    excluded = tokenValueExcludedChars(tokens)
+    valuePattern = tokenValuePattern(tokens)
+    pattern = ''
+    groups = []
+    checks = []
+    groupCount = 0
     for token in tokens:
         if token['type'] == constants.TOKEN_CONST:
-            base2 = base2.replace(token['key'], '')
-            i+=1
+            pattern += re.escape(token['key'])
+            continue
+        markerGroup = None
+        if token['isOptional']:
+            groupCount += 1
+            markerGroup = groupCount
+        groupCount += 1
+        valueGroup = groupCount
+        if token['constraints']:
+            groupCount += 1
+            strictPattern = constraintValuePattern(token['constraints'], excluded)
+            tokenPattern = '(()' + strictPattern + '|' + valuePattern + ')'
+            checks.append((token['key'], valueGroup, groupCount,
+                           constants.TOKEN_CONSTRAINT_DELIMITER.join(token['constraints'])))
         else:
-            try:
-                base2 = base2.split(token['delimeter'],1)[1]
-                i+=1
-            except:
-                pass
-
-    # Fetch the values for token keys for the base part of the path compontent
-    for j in range(0,len(baseDelimeters),1):
-        component = {'key':tokens[j]['key'], 'value':''}
-        if tokens[j]['type'] == constants.TOKEN_CONST:
-            base = base.replace(tokens[j]['key'], '', 1)
-            tokenizedComponents.append(component)
+            tokenPattern = '(' + valuePattern + ')'
+        tokenPattern = re.escape(token['delimeter']) + tokenPattern
+        if token['isOptional']:
+            tokenPattern = '()(?:' + tokenPattern + ')?'
+        pattern += tokenPattern
+        groups.append((token['key'], token['delimeter'], valueGroup, markerGroup))
+    return pattern, groups, groupCount, checks
+
+
+def compileFormatter(tokensList):
+    """Compile a tokens list into a path template.
+
+    Constants and level separators are merged into literal strings, so
+    rendering a path only has to look up each variable token once.
+
+    Args:
+        tokensList (list): Tokens per path level.
+
+    Returns:
+        tuple: (tuple of (literal, key, delimeter) per variable token,
+            str literal after the last variable token)
+
+    """
+    parts = []
+    literal = ''
+    for tokens in tokensList:
+        literal += '/'
+        for token in tokens:
+            if token['type'] == constants.TOKEN_CONST:
+                literal += token['key']
+            else:
+                parts.append((literal, token['key'], token['delimeter']))
+                literal = ''
+    return tuple(parts), literal
+
+
+def renderFilePath(formatParts, formatTail, userTokens):
+    """Render a path from a compiled template, see compileFormatter.
+
+    Variable tokens without a value are left out along with their delimeter.
+
+    """
+    get = userTokens.get
+    pieces = []
+    for literal, key, delimeter in formatParts:
+        value = get(key)
+        if value:
+            pieces += (literal, delimeter, value)
+        else:
+            pieces.append(literal)
+    pieces.append(formatTail)
+    return ''.join(pieces)
+
+
+def tokenSpans(compiled, regs):
+    """Return where each token of a matched path sits in the path.
+
+    Args:
+        compiled (CompiledSchema): Schema the path was matched with.
+        regs (tuple): (start, end) per group of the path match, with the
+            whole match first like ``re.Match.regs``. (-1, -1) for groups
+            that didn't participate.
+
+    Returns:
+        dict: key to tuple of (start, end, delimeter) per occurrence of the
+            key. A span includes the token's delimeter, absent optional
+            tokens have an empty span where they would be inserted.
+
+    """
+    spans = {}
+    for key, delimeter, valueGroup, markerGroup in compiled.tokenGroups:
+        start, end = regs[valueGroup]
+        if start == -1:
+            start = end = regs[markerGroup][0]
         else:
-            if j != optionalIndex:
-                try:
-                    value = base.split(tokens[j+1]['delimeter'],1)[0]
-                    base = base.split(tokens[j+1]['delimeter'],1)[1]
-                except:
-                    value = base
-                component['value'] = value
+            start -= len(delimeter)
+        spans.setdefault(key, []).append((start, end, delimeter))
+    return {key: tuple(keySpans) for key, keySpans in spans.items()}
+
+
+def spliceFilePath(filePathStr, spans, userTokens):
+    """Replace only the spans of the edited tokens in a path.
+
+    Every occurrence of an edited key is replaced, the rest of the path is
+    kept as it is. Like tokensToFilePath, a token without a value is left
+    out along with its delimeter.
+
+    Args:
+        filePathStr (str): Path the spans were taken from.
+        spans (dict): Token spans, see tokenSpans.
+        userTokens (dict): New values by key.
+
+    Returns:
+        str: The edited path.
+
+    """
+    edits = []
+    for key, value in userTokens.items():
+        for start, end, delimeter in spans.get(key, ()):
+            edits.append((start, end, delimeter + value if value else ''))
+    edits.sort()
+
+    pieces = []
+    position = 0
+    for start, end, replacement in edits:
+        pieces += (filePathStr[position:start], replacement)
+        position = end
+    pieces.append(filePathStr[position:])
+    return ''.join(pieces)
+
+
+def diffTokensList(oldTokensList, newTokensList):
+    """Return the path levels that differ between two tokens lists.
+
+    Args:
+        oldTokensList (tuple): Tokens per path level before the change.
+        newTokensList (tuple): Tokens per path level after the change.
+
+    Returns:
+        tuple: Indices of the levels that changed, were added or were
+            removed. Empty if both tokens lists are the same.
+
+    """
+    depth = min(len(oldTokensList), len(newTokensList))
+    changed = [index for index in range(depth)
+               if tuple(oldTokensList[index]) != tuple(newTokensList[index])]
+    changed += range(depth, max(len(oldTokensList), len(newTokensList)))
+    return tuple(changed)
+
+
+# Matches of single path levels, shared by all schemas. Keyed by the compiled
+# pattern of the level, so levels that are the same before and after a schema
+# change keep their matches. Schema.updateSchemaFromString uses
+# diffTokensList to only clear its parse cache if any level changed.
+levelCache = cache.LRUCache(maxSize=constants.LEVEL_CACHE_SIZE)
+
+
+def matchLevel(pattern, matcher, pathItem):
+    """Match one path level, reusing the result of earlier identical matches.
+
+    Args:
+        pattern (str): Regex source of the level, see compileLevelPattern.
+        matcher (callable): Compiled fullmatch of pattern.
+        pathItem (str): Path level to match.
+
+    Returns:
+        tuple|None: (start, end) per group relative to the level, None if
+            the level doesn't match.
+
+    """
+    key = (pattern, pathItem)
+    regs = levelCache.get(key, False)
+    if regs is False:
+        match = matcher(pathItem)
+        regs = None if match is None else match.regs[1:]
+        levelCache.put(key, regs)
+    return regs
+
+
+def constraintsStr(token):
+    """Return the constraints of a token as written in the schema, i.e. ':digits,len=4'."""
+    if not token['constraints']:
+        return ''
+    return constants.TOKEN_CONSTRAINT_SEPARATOR + constants.TOKEN_CONSTRAINT_DELIMITER.join(token['constraints'])
+
+
+def schemaPathItemsAsStringList(tokensList, tokenColors, asHtmlWithColor=False, enableColor=True):
+    pathItems = []
+    colorPathItems = []
+    for tokens in tokensList:
+        pathItem = ''
+        colorPathItem = ''
+        for token in tokens:
+            tokenStr = ''
+            colorTokenStr = ''
+            if token['type'] == constants.TOKEN_CONST:
+                # for constants the token and delimeter are one and same
+                tokenStr = token['key']
+                colorTokenStr = tokenStr
+            elif token['type'] == constants.TOKEN_HIDDEN_VAR:
+                tokenStr = token['delimeter'] + '#' + token['key'] + constraintsStr(token)
+                colorTokenStr = '<font color="{0}"><b>{1}</b></font>'.format('SlateGray',tokenStr)
             else:
-                if i == len(baseDelimeters):
-                    try:
-                        value = base.split(tokens[j+1]['delimeter'],1)[0]
-                        base = base.split(tokens[j+1]['delimeter'],1)[1]
-                    except:
-                        value = base
-                    component['value'] = value
-                    tokenizedComponents.append(component)
+                if token['type'] == constants.TOKEN_EDIT_VAR:
+                    tokenStr = '@' + token['key'] + constraintsStr(token)
+                    colorTokenStr = tokenStr
+                colorName = tokenColors[token['key']]
+                if not enableColor: colorName = 'Silver'
+                colorTokenStr = '<font color="{0}"><b>{1}</b></font>'.format(colorName,tokenStr)
+
+                tokenStr = token['delimeter'] + tokenStr
+                colorTokenStr = token['delimeter'] + colorTokenStr
+
+            if token['isOptional']:
+                tokenStr = '[' + tokenStr + ']'
+                colorTokenStr = '[' + colorTokenStr + ']'
+
+            pathItem += tokenStr
+            colorPathItem += colorTokenStr
+
+        colorPathItems.append(colorPathItem)
+        pathItems.append(pathItem)
+    if asHtmlWithColor:
+        return colorPathItems
+    else:
+        return pathItems
+
+
+# Everything derived from a tokens list. Built once by compileSchema, read by
+# the model on every paint, so none of the fields may be mutated.
+CompiledSchema = collections.namedtuple('CompiledSchema', [
+    'tokensList',
+    'keys',
+    'keysEditable',
+    'keysHidden',
+    'keysOptional',
+    'columnHeaders',
+    'columnIndex',
+    'tokenColors',
+    'enableColor',
+    'isValid',
+    'schemaPathHead',
+    'schemaPathTail',
+    'schemaPathHeadColor',
+    'schemaPathTailColor',
+    'pathMatcher',
+    'levelPatterns',
+    'levelMatchers',
+    'levelKeys',
+    'groupLevels',
+    'tokenGroups',
+    'checkGroups',
+    'editableGroups',
+    'lastGroups',
+    'emptyTokens',
+    'formatParts',
+    'formatTail',
+    'paddingKey',
+])
+
+
+def compileSchema(tokensList):
+    """Compile a tokens list into an immutable CompiledSchema.
+
+    The whole path is matched by one anchored regex with a capturing group
+    per variable token, so a path is tokenized in a single linear pass.
+    The per level matchers are only used to find out which level of a path
+    did not match the schema.
+
+    Args:
+        tokensList (list): Tokens per path level, see
+            schematokensListFromString.
+
+    Returns:
+        CompiledSchema: The compiled schema.
+
+    """
+    tokensList = tuple(tuple(types.MappingProxyType(dict(token)) for token in tokens)
+                       for tokens in tokensList)
+    allKeys = []
+    keys = []
+    keysEditable = []
+    keysHidden = []
+    keysOptional = []
+    tokenColors = {}
+    for tokens in tokensList:
+        for token in tokens:
+            key = token['key']
+            allKeys.append(key)
+            if token['isOptional']:
+                keysOptional.append(key)
+            if token['type'] == constants.TOKEN_CONST:
+                continue
+            if key not in keys:
+                keys.append(key)
+            if token['type'] == constants.TOKEN_EDIT_VAR and key not in keysEditable:
+                keysEditable.append(key)
+                # Up to 18 token colors you crazy son of a gun (18 is a stupid amount of tokens)
+                tokenColors[key] = constants.TOKEN_COLORS_LIST[len(tokenColors) % len(constants.TOKEN_COLORS_LIST)]
+            if token['type'] == constants.TOKEN_HIDDEN_VAR and key not in keysHidden:
+                keysHidden.append(key)
+
+    #basic validation, need to do this better
+    isValid = len(tokensList) > 1
+    enableColor = bool(os.environ.get('ASSET_MANAGER_ENABLE_COLOR', True))
+    schemaPathHead = schemaPathTail = schemaPathHeadColor = schemaPathTailColor = ''
+    if isValid:
+        items = schemaPathItemsAsStringList(tokensList, tokenColors)
+        colorItems = schemaPathItemsAsStringList(tokensList, tokenColors,
+                                                 asHtmlWithColor=True,
+                                                 enableColor=enableColor)
+        schemaPathHead = '/'+'/'.join(items[:-1])+'/'
+        schemaPathTail = items[-1]
+        schemaPathHeadColor = '/'+'/'.join(colorItems[:-1])+'/'
+        schemaPathTailColor = colorItems[-1]
+
+    patterns = []
+    levelMatchers = []
+    levelKeys = []
+    groupLevels = []
+    tokenGroups = []
+    checkGroups = []
+    groupOffset = 0
+    for tokens in tokensList:
+        pattern, levelGroups, groupCount, levelChecks = compileLevelPattern(tokens)
+        patterns.append(pattern)
+        levelMatchers.append(re.compile(pattern).fullmatch)
+        levelKeys.append(tuple((key, valueGroup - 1) for key, delimeter, valueGroup, markerGroup in levelGroups))
+        for key, delimeter, valueGroup, markerGroup in levelGroups:
+            if markerGroup is not None:
+                markerGroup += groupOffset
+            tokenGroups.append((key, delimeter, valueGroup + groupOffset, markerGroup))
+        for key, valueGroup, checkGroup, constraintStr in levelChecks:
+            # Indices into match.groups()
+            checkGroups.append((key, valueGroup + groupOffset - 1, checkGroup + groupOffset - 1, constraintStr))
+        groupLevels += [len(levelMatchers) - 1] * groupCount
+        groupOffset += groupCount
+
+    if patterns:
+        # Anything before the first '/' is ignored, i.e. a drive letter.
+        pathMatcher = re.compile('[^/]*/' + '/'.join(patterns)).fullmatch
+    else:
+        pathMatcher = lambda filePathStr: None
+
+    # Indices into match.groups() of every value of a key
+    groups = {}
+    for key, delimeter, valueGroup, markerGroup in tokenGroups:
+        groups.setdefault(key, []).append(valueGroup - 1)
+
+    columnHeaders = tuple(keysEditable) + ('file',)
+    formatParts, formatTail = compileFormatter(tokensList)
+    return CompiledSchema(
+        tokensList=tokensList,
+        keys=tuple(keys),
+        keysEditable=tuple(keysEditable),
+        keysHidden=tuple(keysHidden),
+        keysOptional=tuple(keysOptional),
+        columnHeaders=columnHeaders,
+        columnIndex=types.MappingProxyType({key: col for col, key in enumerate(columnHeaders)}),
+        tokenColors=types.MappingProxyType(tokenColors),
+        enableColor=enableColor,
+        isValid=isValid,
+        schemaPathHead=schemaPathHead,
+        schemaPathTail=schemaPathTail,
+        schemaPathHeadColor=schemaPathHeadColor,
+        schemaPathTailColor=schemaPathTailColor,
+        pathMatcher=pathMatcher,
+        levelPatterns=tuple(patterns),
+        levelMatchers=tuple(levelMatchers),
+        levelKeys=tuple(levelKeys),
+        groupLevels=tuple(groupLevels),
+        tokenGroups=tuple(tokenGroups),
+        checkGroups=tuple(checkGroups),
+        editableGroups=tuple((key, groups[key][0], tuple(groups[key][1:])) for key in keysEditable),
+        lastGroups=tuple((key, indices[-1]) for key, indices in groups.items()),
+        emptyTokens=types.MappingProxyType(dict.fromkeys(allKeys, '')),
+        formatParts=formatParts,
+        formatTail=formatTail,
+        paddingKey=next((key for key in keys if key.lower() == constants.PADDING_KEY), None),
+    )
+
+
+# Parse result of one path, shared by every node that reads the same path.
+# The token mappings are read-only, copy them before modifying. The padding
+# token is normalized to its canonical notation and sequence is set if the
+# path has one, see sequence.Sequence. diagnostics tells why an invalid path
+# doesn't match, see diagnostics.Diagnostic.
+TokenRecord = collections.namedtuple('TokenRecord', [
+    'filePath',
+    'editableTokens',
+    'tokens',
+    'isValid',
+    'spans',
+    'violations',
+    'sequence',
+    'diagnostics',
+])
+
+
+class ParsedPaths():
+    """Columnar parse result of many paths, see Schema.parseMany.
+
+    Every schema key is stored as a dictionary-encoded column: an array of
+    integer codes per row plus a table of the distinct values. Rows that
+    read the same path share one TokenRecord. Validity is kept as a bitmap
+    with one bit per row, constraint violations as one such bitmap per key.
+    The error code and level of the first diagnostic of every row are kept
+    in byte arrays.
+
+    Examples:
+        >>> parsed = schema.parseMany(paths)
+        >>> parsed.value(0, 'shot')
+        '0080'
+        >>> parsed.values['shot'][parsed.codes['shot'][0]]
+        '0080'
+
+    """
+
+    def __init__(self, keys, editableKeys):
+        """
+        Args:
+            keys (tuple): Schema keys, one column is created per key.
+            editableKeys (tuple): Keys that are read from the editable
+                tokens, so repeated values that mismatch are errors.
+
+        """
+        super(ParsedPaths, self).__init__()
+        self.keys = keys
+        self.codes = {key: array.array('l') for key in keys}
+        self.values = {key: [] for key in keys}
+        self.records = []
+        self.recordIndices = array.array('l')
+        self.validBits = bytearray()
+        self.violationBits = {key: bytearray() for key in keys}
+        # First diagnostic per row, see constants.DIAGNOSTIC_CODES
+        self.errorCodes = array.array('B')
+        self.errorLevels = array.array('b')
+        self._editableKeys = frozenset(editableKeys)
+        self._valueCodes = {key: {} for key in keys}
+        self._recordCodes = []
+        self._recordIndexByPath = {}
+
+    def __len__(self):
+        return len(self.recordIndices)
+
+    def append(self, record):
+        """Add a row for a parsed path.
+
+        Args:
+            record (TokenRecord): Parse result of the row's path.
+
+        """
+        recordIndex = self._recordIndexByPath.get(record.filePath)
+        if recordIndex is None:
+            recordIndex = len(self.records)
+            self._recordIndexByPath[record.filePath] = recordIndex
+            self.records.append(record)
+            recordCodes = []
+            for key in self.keys:
+                if key in self._editableKeys:
+                    value = record.editableTokens.get(key)
                 else:
-                    component['value'] = None
-            tokenizedComponents.append(component)
+                    value = record.tokens.get(key)
+                valueCodes = self._valueCodes[key]
+                code = valueCodes.get(value)
+                if code is None:
+                    code = valueCodes[value] = len(self.values[key])
+                    self.values[key].append(value)
+                recordCodes.append(code)
+            self._recordCodes.append(recordCodes)
+
+        row = len(self.recordIndices)
+        self.recordIndices.append(recordIndex)
+        for key, code in zip(self.keys, self._recordCodes[recordIndex]):
+            self.codes[key].append(code)
+        record = self.records[recordIndex]
+        if row % 8 == 0:
+            self.validBits.append(0)
+            for bits in self.violationBits.values():
+                bits.append(0)
+        if record.isValid:
+            self.validBits[row >> 3] |= 1 << (row & 7)
+        if record.diagnostics:
+            diagnostic = record.diagnostics[0]
+            self.errorCodes.append(constants.DIAGNOSTIC_CODES.index(diagnostic.code))
+            self.errorLevels.append(diagnostic.level)
+        else:
+            self.errorCodes.append(0)
+            self.errorLevels.append(-1)
+        for key in record.violations:
+            bits = self.violationBits.get(key)
+            if bits is not None:
+                bits[row >> 3] |= 1 << (row & 7)
+
+    def isValid(self, row):
+        """bool: True if the path of the row matched the schema."""
+        return bool(self.validBits[row >> 3] & (1 << (row & 7)))
+
+    def errorCode(self, row):
+        """str: Code of the first diagnostic of the row, DIAGNOSTIC_NONE if valid."""
+        return constants.DIAGNOSTIC_CODES[self.errorCodes[row]]
+
+    def violates(self, row, key):
+        """bool: True if the row's value of key violates its constraints."""
+        return bool(self.violationBits[key][row >> 3] & (1 << (row & 7)))
+
+    def value(self, row, key):
+        """Return the decoded value of key for a row."""
+        return self.values[key][self.codes[key][row]]
+
+    def column(self, key):
+        """Return the decoded values of key for every row.
+
+        Returns:
+            list: One value per row.
+
+        """
+        values = self.values[key]
+        return [values[code] for code in self.codes[key]]
+
+    def record(self, row):
+        """TokenRecord: Shared parse result of the row's path."""
+        return self.records[self.recordIndices[row]]
+
+
+# What to list to find every path of a schema with some known tokens. Only
+# the roots and the entries matching the level patterns below them need to
+# be listed, in order: levelMatchers[0] filters the entries of a root,
+# levelMatchers[-1] the file names.
+ScanPlan = collections.namedtuple('ScanPlan', [
+    'roots',
+    'levelPatterns',
+    'levelMatchers',
+    'tokens',
+])
+
+
+def tokenAlternatives(partialTokens):
+    """Normalize known token values to tuples of alternatives.
 
-    # Fetch the values for token keys for the extension part of the path compontent
-    if len(extensionDelimeters) == 0:
-        return tokenizedComponents
+    Args:
+        partialTokens (dict): Key to a value or an iterable of values. An
+            empty value or None means an optional token is absent.
 
-    # Fetch the number of the tokens in the base part, split by delimeters (or constant tokens)
-    # We need to know the count, in case we have variants in the token list
-    padding = None
-    if '.' in extension:
-        padding = extension.split('.')[0]
-        extension = extension.split('.')[1]
+    Returns:
+        dict: Key to tuple of values, '' for absent.
 
-    component = {'key':tokens[-2]['key'], 'value':padding}
-    tokenizedComponents.append(component)
-    component = {'key':tokens[-1]['key'], 'value':extension}
-    tokenizedComponents.append(component)
-    return tokenizedComponents
+    """
+    alternatives = {}
+    for key, value in partialTokens.items():
+        if value is None or isinstance(value, str):
+            value = (value or '',)
+        alternatives[key] = tuple(item or '' for item in value)
+    return alternatives
+
+
+def tokenLiterals(token, values):
+    """Return every literal a known token can be written as, with delimeter."""
+    return tuple(token['delimeter'] + value if value else '' for value in values)
+
+
+def scanTokenPattern(token, values, valuePattern, paddingKey=None):
+    """Return the regex source of a token on a level.
+
+    Args:
+        token (dict): The token.
+        values (tuple|None): Known values, None if unknown.
+        valuePattern (str): Regex of an unknown value, see
+            tokenValuePattern.
+        paddingKey (str, optional): Key of the padding token. A known
+            padding matches the frame numbers of its width too.
+
+    Returns:
+        str: Regex source.
+
+    """
+    if token['type'] == constants.TOKEN_CONST:
+        return re.escape(token['key'])
+    if values is None:
+        pattern = re.escape(token['delimeter']) + valuePattern
+        if token['isOptional']:
+            pattern = '(?:' + pattern + ')?'
+        return pattern
+
+    alternatives = []
+    for value in values:
+        alternatives.append(re.escape(token['delimeter'] + value) if value else '')
+        padding = sequence.parsePadding(value) if token['key'] == paddingKey and value else None
+        if padding is not None and padding[1] is None:
+            frames = '[0-9]{{{0},}}'.format(padding[0]) if padding[0] > 1 else '[0-9]+'
+            alternatives.append(re.escape(token['delimeter']) + frames)
+    return '(?:' + '|'.join(alternatives) + ')'
+
+
+def compileScanPlan(compiled, partialTokens):
+    """Compile the smallest file system search for paths with known tokens.
+
+    The leading levels whose tokens are all known are rendered into
+    concrete directories, one per combination of alternatives. Every
+    following level gets a pattern with the known values filled in, so a
+    search only lists the roots and descends into matching entries.
+
+    Examples:
+        >>> plan = compileScanPlan(schema.compiled, {'show': 'foo', 'shot': '0080'})
+        >>> plan.roots
+        ('/shows/foo',)
+
+    Args:
+        compiled (CompiledSchema): Schema the paths follow.
+        partialTokens (dict): Known tokens, see tokenAlternatives.
+
+    Returns:
+        ScanPlan: The plan.
+
+    """
+    unknownKeys = set(partialTokens) - set(compiled.keys)
+    if unknownKeys:
+        raise Exception("The schema has no tokens: {0}".format(', '.join(sorted(unknownKeys))))
+    known = tokenAlternatives(partialTokens)
+
+    # The file level is always matched, so at most every directory level
+    # can be concrete.
+    prefixLevels = []
+    for tokens in compiled.tokensList[:-1]:
+        literals = []
+        for token in tokens:
+            if token['type'] == constants.TOKEN_CONST:
+                literals.append((token['key'],))
+            elif token['key'] in known:
+                literals.append(tokenLiterals(token, known[token['key']]))
+            else:
+                break
+        else:
+            prefixLevels.append(tuple(''.join(parts) for parts in itertools.product(*literals)))
+            continue
+        break
+
+    roots = tuple('/' + '/'.join(levels) for levels in itertools.product(*prefixLevels))
+
+    levelPatterns = []
+    for tokens in compiled.tokensList[len(prefixLevels):]:
+        valuePattern = tokenValuePattern(tokens)
+        levelPatterns.append(''.join(scanTokenPattern(token, known.get(token['key']), valuePattern, compiled.paddingKey)
+                                     for token in tokens))
+
+    return ScanPlan(
+        roots=roots,
+        levelPatterns=tuple(levelPatterns),
+        levelMatchers=tuple(re.compile(pattern).fullmatch for pattern in levelPatterns),
+        tokens=known,
+    )
 
 
 class Schema():
-    def __init__(self, schemaStr=''):
+    def __init__(self, schemaStr='', cacheSize=constants.PARSE_CACHE_SIZE, diagnostics=None):
         super(Schema, self).__init__()
 
         if schemaStr == '':
             schemaStr = str(os.environ.get('ASSET_MANAGER_SCHEMA', constants.SCHEMA_DEFAULT))
-        self.tokensList = schematokensListFromString(schemaStr)
+        self._compiled = compileSchema(schematokensListFromString(schemaStr))
+        self._generation = 0
+        self._parseCache = cache.LRUCache(maxSize=cacheSize)
+        self._diagnostics = diagnostics or schemaDiagnostics.DiagnosticsCollector()
 
     def updateSchemaFromString(self, schemaStr):
-        self.tokensList = schematokensListFromString(schemaStr)
+        """Replace the schema.
+
+        Args:
+            schemaStr (str): New schema.
+
+        Returns:
+            tuple: Indices of the path levels that changed, see
+                diffTokensList. Nothing is invalidated if it is empty.
+
+        """
+        # Build the new snapshot completely before swapping it in, readers
+        # either see the old or the new schema, never a mix of both.
+        compiled = compileSchema(schematokensListFromString(schemaStr))
+        changedLevels = diffTokensList(self._compiled.tokensList, compiled.tokensList)
+        if changedLevels:
+            self._compiled = compiled
+            self._generation += 1
+            self._parseCache.clear()
+        return changedLevels
+
+    @property
+    def generation(self):
+        """int: Incremented every time the schema changes."""
+        return self._generation
+
+    @property
+    def parseCache(self):
+        """cache.LRUCache: Token records of recently parsed paths.
+
+        Use ``parseCache.stats()`` for hit/miss/eviction counters and set
+        ``parseCache.maxSize`` to resize it.
+
+        """
+        return self._parseCache
+
+    @property
+    def diagnostics(self):
+        """diagnostics.DiagnosticsCollector: Counts why paths didn't match."""
+        return self._diagnostics
+
+    @property
+    def compiled(self):
+        """CompiledSchema: Current immutable snapshot of the schema.
+
+        Hot paths should fetch this once and read everything from it.
+
+        """
+        return self._compiled
+
+    @property
+    def tokensList(self):
+        return self._compiled.tokensList
 
     @property
     def keys(self):
-        keys = []
-        for tokens in self.tokensList:
-            for token in tokens:
-                if token['type'] != constants.TOKEN_CONST:
-                    if token['key'] not in keys:
-                        keys.append(token['key'])
-        return keys
+        return self._compiled.keys
 
     @property
     def keysEditable(self):
-        keys = []
-        for tokens in self.tokensList:
-            for token in tokens:
-                if token['key'] != token['delimeter']:
-                    if token['key'] not in keys:
-                        if token['type'] == constants.TOKEN_EDIT_VAR:
-                            keys.append(token['key'])
-        return keys
+        return self._compiled.keysEditable
 
     @property
     def keysHidden(self):
-        keys = []
-        for tokens in self.tokensList:
-            for token in tokens:
-                if token['key'] != token['delimeter']:
-                    if token['key'] not in keys:
-                        if token['type'] == constants.TOKEN_HIDDEN_VAR:
-                            keys.append(token['key'])
-        return keys
+        return self._compiled.keysHidden
 
     @property
     def keysOptional(self):
-        keys = []
-        for tokens in self.tokensList:
-            for token in tokens:
-                if token['optional']:
-                    keys.append(token['key'])
-        return keys
+        return self._compiled.keysOptional
 
     @property
     def schemaPathHead(self):
-        if len(self.tokensList) > 0:
-            items = self.schemaPathItemsAsStringList()
-            if self.isValid:
-                return '/'+'/'.join(items[:-1])+'/'
-        return ''
-        #return 'invalid schema'
+        return self._compiled.schemaPathHead
 
     @property
     def schemaPathTail(self):
-        if len(self.tokensList) > 0:
-            items = self.schemaPathItemsAsStringList()
-            if self.isValid:
-                return items[-1]
-        return ''
-        #return 'invalid schema'
+        return self._compiled.schemaPathTail
 
     @property
     def schemaPathHeadColor(self):
-        if len(self.tokensList) > 0:
-            items = self.schemaPathItemsAsStringList(asHtmlWithColor=True)
-            if self.isValid:
-                return '/'+'/'.join(items[:-1])+'/'
-        return ''
-        #return '<font color="Red"><b>invalid schema</b></font>'
+        return self._compiled.schemaPathHeadColor
 
     @property
     def schemaPathTailColor(self):
-        if len(self.tokensList) > 0:
-            items = self.schemaPathItemsAsStringList(asHtmlWithColor=True)
-            if self.isValid:
-                return items[-1]
-        return ''            
-        #return '<font color="Red"><b>invalid schema</b></font>'
-    
+        return self._compiled.schemaPathTailColor
+
     @property
     def tokenColors(self):
-        tokenColors = {}
-        availableColors = constants.TOKEN_COLORS_LIST.copy()
-        for tokens in self.tokensList:
-            for token in tokens:
-                if token['type'] == constants.TOKEN_EDIT_VAR:
-                    if token['key'] not in tokenColors.keys():
-                        tokenColors[token['key']] = availableColors.pop(0)
-        return tokenColors
-    
+        return self._compiled.tokenColors
+
     @property
     def isValid(self):
-        #basic validation, need to do this better
-        if len(self.tokensList) > 1:
-            return True
-        return False
+        return self._compiled.isValid
 
     def schemaPathItemsAsStringList(self, asHtmlWithColor=False):
-        pathItems = []
-        colorPathItems = []
-        # Up to 18 token colors you crazy son of a gun (18 is a stupid amount of tokens)
-        availableColors = constants.TOKEN_COLORS_LIST
-        for tokens in self.tokensList:
-            pathItem = ''
-            colorPathItem = ''
-            for token in tokens:
-                tokenStr = ''
-                colorTokenStr = ''
-                if token['type'] == constants.TOKEN_CONST:
-                    # for constants the token and delimeter are one and same
-                    tokenStr = token['key']
-                    colorTokenStr = tokenStr
-                elif token['type'] == constants.TOKEN_HIDDEN_VAR:
-                    tokenStr = token['delimeter'] + '#' + token['key']
-                    colorTokenStr = '<font color="{0}"><b>{1}</b></font>'.format('SlateGray',tokenStr)
-                else:
-                    if token['type'] == constants.TOKEN_EDIT_VAR:
-                        tokenStr = '@' + token['key']
-                        colorTokenStr = tokenStr
-                    colorName = self.tokenColors[token['key']]
-                    enableColor = bool(os.environ.get('ASSET_MANAGER_ENABLE_COLOR', True))
-                    if not enableColor: colorName = 'Silver'
-                    colorTokenStr = '<font color="{0}"><b>{1}</b></font>'.format(colorName,tokenStr)
-
-                    tokenStr = token['delimeter'] + tokenStr
-                    colorTokenStr = token['delimeter'] + colorTokenStr
-
-                if token['isOptional']:
-                    tokenStr = '[' + tokenStr + ']'
-                    colorTokenStr = '[' + colorTokenStr + ']'
-
-                pathItem += tokenStr
-                colorPathItem += colorTokenStr
-
-            colorPathItems.append(colorPathItem)
-            pathItems.append(pathItem)
-        if asHtmlWithColor:
-            return colorPathItems
-        else:
-            return pathItems
+        compiled = self._compiled
+        return schemaPathItemsAsStringList(compiled.tokensList,
+                                           compiled.tokenColors,
+                                           asHtmlWithColor=asHtmlWithColor,
+                                           enableColor=compiled.enableColor)
 
+    def _tokenizeLevels(self, compiled, filePathStr, diagnostics=None):
+        """Tokenize a path that doesn't match the schema one level at a time.
 
-    def filePathToEditableTokens(self, filePathStr):
+        This is the slow path, it only runs for paths that failed the whole
+        path matcher, to narrow down which tokens are in error.
+
+        Args:
+            diagnostics (list, optional): Receives a diagnostics.Diagnostic
+                per error found.
+
+        Returns:
+            tuple: (tokens, editableTokens) dicts of the path.
+
+        """
         splitPath = filePathStr.split('/')[1:]
+        keysEditable = compiled.keysEditable
+
+        if len(splitPath) != len(compiled.tokensList):
+            if diagnostics is not None:
+                diagnostics.append(schemaDiagnostics.Diagnostic(
+                    constants.DIAGNOSTIC_DEPTH, -1, None, len(splitPath), len(compiled.tokensList)))
+            editableTokens = dict.fromkeys(keysEditable, constants.TOKEN_ERROR)
+            return dict(editableTokens), editableTokens
+
+        tokens = dict(compiled.emptyTokens)
+        editableTokens = {}
+        for level, (pathItem, matcher, keys) in enumerate(zip(splitPath, compiled.levelMatchers, compiled.levelKeys)):
+            match = matcher(pathItem)
+            if match is None:
+                if diagnostics is not None:
+                    diagnostics.append(schemaDiagnostics.Diagnostic(
+                        constants.DIAGNOSTIC_LEVEL, level, None, pathItem, None))
+            else:
+                values = match.groups()
+            for key, index in keys:
+                value = constants.TOKEN_ERROR if match is None else values[index]
+                tokens[key] = value
+                if key not in keysEditable:
+                    continue
+                if key in editableTokens and value != editableTokens[key]:
+                    if diagnostics is not None and constants.TOKEN_ERROR not in (value, editableTokens[key]):
+                        diagnostics.append(schemaDiagnostics.Diagnostic(
+                            constants.DIAGNOSTIC_MISMATCH, level, key, value, editableTokens[key]))
+                    value = constants.TOKEN_ERROR
+                editableTokens[key] = value
+        return tokens, editableTokens
+
+    @staticmethod
+    def _editableTokensFromValues(compiled, values, diagnostics=None):
         tokenDict = {}
+        for key, index, repeatIndices in compiled.editableGroups:
+            value = values[index]
+            for repeatIndex in repeatIndices:
+                if values[repeatIndex] != value:
+                    if diagnostics is not None:
+                        diagnostics.append(schemaDiagnostics.Diagnostic(
+                            constants.DIAGNOSTIC_MISMATCH, compiled.groupLevels[repeatIndex],
+                            key, values[repeatIndex], value))
+                    value = constants.TOKEN_ERROR
+                    break
+            tokenDict[key] = value
+        return tokenDict
 
-        if len (splitPath) != len (self.tokensList):
-            logging.info("The number of components in the file path should match the number of components in the schema when file path is split by '/'")
-            for key in self.keysEditable:
-                tokenDict[key] = constants.TOKEN_ERROR
-            return tokenDict
-
-        i = 0
-        for pathItem in splitPath:
-            tokens = tokenizePathComponent (self.tokensList[i], pathItem)
-            for token in tokens:
-                key = token['key']
-                value = token['value']
-                if key in self.keysEditable:
-                    for key2 in tokenDict.keys():
-                        if key == key2 and value != tokenDict[key2]:
-                            logging.info('Mis-matched tokens in the filename. Setting key: {0} to value: {1}'.format(key, constants.TOKEN_ERROR))
-                            value = constants.TOKEN_ERROR
-                    tokenDict[key] = value
-            i+=1
+    @staticmethod
+    def _tokensFromValues(compiled, values):
+        tokenDict = dict(compiled.emptyTokens)
+        for key, index in compiled.lastGroups:
+            tokenDict[key] = values[index]
         return tokenDict
 
+    def filePathToEditableTokens(self, filePathStr):
+        compiled = self._compiled
+        match = compiled.pathMatcher(filePathStr)
+        if match is None:
+            return self._tokenizeLevels(compiled, filePathStr)[1]
+        return self._editableTokensFromValues(compiled, match.groups())
+
     def filePathToTokens(self, filePathStr):
-        splitPath = filePathStr.split('/')[1:]
-        tokenDict = {}
+        compiled = self._compiled
+        match = compiled.pathMatcher(filePathStr)
+        if match is None:
+            return self._tokenizeLevels(compiled, filePathStr)[0]
+        return self._tokensFromValues(compiled, match.groups())
 
-        if len (splitPath) != len (self.tokensList):
-            logging.info("The number of components in the file path should match the number of components in the schema when file path is split by '/'")
-            for key in self.keysEditable:
-                tokenDict[key] = constants.TOKEN_ERROR
-            return tokenDict
-
-        i = 0
-        for pathItem in splitPath:
-            tokens = tokenizePathComponent (self.tokensList[i], pathItem)
-            for token in tokens:
-                key = token['key']
-                value = token['value']
-                tokenDict[key] = value
-            i+=1
-        return tokenDict
+    def tokenRecord(self, filePathStr):
+        """Return the shared, read-only parse result of a path.
 
-    def tokensToFilePath(self, userTokens):
-        path = ''
-        for tokens in self.tokensList:
-            path = path + '/'
-            for token in tokens:
-                if token['type'] == constants.TOKEN_CONST:
-                    path = path + token['key']
+        Identical paths are only parsed once per schema generation.
+
+        Args:
+            filePathStr (str): Path to parse.
+
+        Returns:
+            TokenRecord: Parse result of the path.
+
+        """
+        record = self._parseCache.get(filePathStr)
+        if record is not None:
+            return record
+
+        compiled = self._compiled
+        match = compiled.pathMatcher(filePathStr)
+        if match is None:
+            return self._buildRecord(compiled, filePathStr, None, None)
+        return self._buildRecord(compiled, filePathStr, match.groups(), match.regs)
+
+    def tokenRecordFromLevels(self, filePathStr):
+        """Parse a path one level at a time, see tokenRecord.
+
+        Every level is looked up in the level cache shared by all schemas,
+        so after a schema change only the levels that changed are matched
+        again. Slower than tokenRecord for a path that has never been seen,
+        use it to re-tokenize paths while a schema is being edited.
+
+        Args:
+            filePathStr (str): Path to parse.
+
+        Returns:
+            TokenRecord: Parse result of the path.
+
+        """
+        record = self._parseCache.get(filePathStr)
+        if record is not None:
+            return record
+
+        compiled = self._compiled
+        splitPath = filePathStr.split('/')
+        if len(splitPath) - 1 != len(compiled.levelPatterns):
+            return self._buildRecord(compiled, filePathStr, None, None)
+
+        # Anything before the first '/' is ignored, see compileSchema.
+        offset = len(splitPath[0]) + 1
+        regs = [(0, len(filePathStr))]
+        for pathItem, pattern, matcher in zip(splitPath[1:], compiled.levelPatterns, compiled.levelMatchers):
+            levelRegs = matchLevel(pattern, matcher, pathItem)
+            if levelRegs is None:
+                return self._buildRecord(compiled, filePathStr, None, None)
+            for start, end in levelRegs:
+                if start == -1:
+                    regs.append((start, end))
                 else:
-                    for key in userTokens.keys():
-                        if userTokens[key] and key == token['key']:
-                            path = path + token['delimeter'] + userTokens[key]
-            
-        return path
-        
\ No newline at end of file
+                    regs.append((start + offset, end + offset))
+            offset += len(pathItem) + 1
+        values = tuple(None if start == -1 else filePathStr[start:end] for start, end in regs[1:])
+        return self._buildRecord(compiled, filePathStr, values, regs)
+
+    @staticmethod
+    def _sequenceFromTokens(compiled, filePathStr, spans, tokens, editableTokens):
+        """Type the padding token of a matched path.
+
+        Normalizes the padding value in tokens and editableTokens to its
+        canonical notation, so paths that only differ by their padding
+        notation or frame have the same token values.
+
+        Returns:
+            sequence.Sequence|None: The path split around its padding.
+
+        """
+        key = compiled.paddingKey
+        if key is None or not tokens.get(key):
+            return None
+        # The padding of the file name, the last occurrence of the key.
+        start, end, delimeter = spans[key][-1]
+        fileSequence = sequence.sequenceFromSpan(filePathStr, start + len(delimeter), end, tokens[key])
+        if fileSequence is not None:
+            tokens[key] = sequence.canonicalPadding(fileSequence.width)
+            if key in editableTokens and editableTokens[key] != constants.TOKEN_ERROR:
+                editableTokens[key] = tokens[key]
+        return fileSequence
+
+    def _buildRecord(self, compiled, filePathStr, values, regs):
+        """Build and cache the TokenRecord of a path.
+
+        Args:
+            compiled (CompiledSchema): Schema the path was matched with.
+            filePathStr (str): The path.
+            values (tuple|None): Value per group of the path match, None if
+                the path doesn't match the schema.
+            regs (tuple|None): (start, end) per group of the path match, see
+                tokenSpans.
+
+        """
+        diagnostics = []
+        if values is None:
+            tokens, editableTokens = self._tokenizeLevels(compiled, filePathStr, diagnostics)
+            spans = {}
+            violations = {}
+            fileSequence = None
+        else:
+            editableTokens = self._editableTokensFromValues(compiled, values, diagnostics)
+            tokens = self._tokensFromValues(compiled, values)
+            spans = tokenSpans(compiled, regs)
+            # The check group of a present token only participates if its
+            # value satisfied the constraints, see compileLevelPattern.
+            violations = {}
+            for key, valueIndex, checkIndex, constraintStr in compiled.checkGroups:
+                if values[valueIndex] is not None and values[checkIndex] is None:
+                    violations[key] = constraintStr
+            fileSequence = self._sequenceFromTokens(compiled, filePathStr, spans, tokens, editableTokens)
+
+        record = TokenRecord(
+            filePath=filePathStr,
+            editableTokens=types.MappingProxyType(editableTokens),
+            tokens=types.MappingProxyType(tokens),
+            isValid=constants.TOKEN_ERROR not in editableTokens.values(),
+            spans=types.MappingProxyType(spans),
+            violations=types.MappingProxyType(violations),
+            sequence=fileSequence,
+            diagnostics=tuple(diagnostics))
+        self._diagnostics.add(record.diagnostics)
+        # Don't cache a record parsed against a schema that has been
+        # replaced in the meantime.
+        if compiled is self._compiled:
+            self._parseCache.put(filePathStr, record)
+        return record
+
+    def parseMany(self, filePaths):
+        """Parse many paths in one call into a columnar result.
+
+        Each distinct path is parsed once, see tokenRecord.
+
+        Args:
+            filePaths (iterable): Paths to parse.
+
+        Returns:
+            ParsedPaths: One row per path, in the order of filePaths.
+
+        """
+        compiled = self._compiled
+        parsed = ParsedPaths(compiled.keys, compiled.keysEditable)
+        records = {}
+        for filePathStr in filePaths:
+            record = records.get(filePathStr)
+            if record is None:
+                record = records[filePathStr] = self.tokenRecord(filePathStr)
+            parsed.append(record)
+        self._diagnostics.logSummary()
+        return parsed
+
+    def scanPlan(self, partialTokens):
+        """Plan the smallest file system search for paths with known tokens.
+
+        Args:
+            partialTokens (dict): Key to a known value or an iterable of
+                alternative values, i.e. {'show': 'foo', 'shot': ['0080',
+                '0090']}.
+
+        Returns:
+            ScanPlan: Directories to list and patterns to filter their
+                entries with, see compileScanPlan and scan.walkPlan.
+
+        """
+        return compileScanPlan(self._compiled, partialTokens)
+
+    def editFilePath(self, filePathStr, userTokens):
+        """Set token values in a path, keeping the rest of the path intact.
+
+        Only the characters of the edited tokens are replaced, including every
+        repeated occurrence of a key across directory and file levels.
+
+        Args:
+            filePathStr (str): Path to edit.
+            userTokens (dict): New values by key.
+
+        Returns:
+            str|None: The edited path, None if the path doesn't match the
+                schema.
+
+        """
+        record = self.tokenRecord(filePathStr)
+        if not record.isValid:
+            return None
+        return spliceFilePath(filePathStr, record.spans, userTokens)
+
+    def editMany(self, filePaths, userTokens):
+        """Set the same token values in many paths, see editFilePath.
+
+        Args:
+            filePaths (iterable): Paths to edit.
+            userTokens (dict): New values by key.
+
+        Returns:
+            list: One edited path (or None) per path.
+
+        """
+        return [self.editFilePath(filePathStr, userTokens) for filePathStr in filePaths]
+
+    def tokensToFilePath(self, userTokens):
+        compiled = self._compiled
+        return renderFilePath(compiled.formatParts, compiled.formatTail, userTokens)
+
+    def renderMany(self, rows):
+        """Render many paths in one call.
+
+        Args:
+            rows (iterable): Token dicts, see tokensToFilePath.
+
+        Returns:
+            list: One path per row.
+
+        """
+        compiled = self._compiled
+        formatParts = compiled.formatParts
+        formatTail = compiled.formatTail
+        return [renderFilePath(formatParts, formatTail, userTokens) for userTokens in rows]
+
+    def framePaths(self, filePathStr, first, last, step=1):
+        """Lazily generate the paths of a frame range, see sequence.framePaths.
+
+        Args:
+            filePathStr (str): Path of the sequence in any padding notation,
+                or the path of one of its frames.
+            first (int): First frame.
+            last (int): Last frame, inclusive.
+            step (int, optional): Frame increment.
+
+        Returns:
+            generator: Path of every frame in the range.
+
+        """
+        fileSequence = self.tokenRecord(filePathStr).sequence
+        if fileSequence is None:
+            raise Exception("The file path has no '{0}' token: {1}".format(constants.PADDING_KEY, filePathStr))
+        return sequence.framePaths(fileSequence, first, last, step)
@@ -0,0 +1,245 @@
+"""Frame padding notations and frame sequences."""
+
+# Import built-in modules
+import re
+import bisect
+import collections
+
+# Every notation a padding token may be written in, i.e. '%04d', '####',
+# '$F4' or a literal frame number like '1001'.
+PADDING_PRINTF = re.compile(r'%0?(\d*)d').fullmatch
+PADDING_HASHES = re.compile(r'#+').fullmatch
+PADDING_HOUDINI = re.compile(r'\$F(\d*)').fullmatch
+PADDING_FRAME = re.compile(r'\d+').fullmatch
+
+
+# A path with a padding token, split around the padding. frame is the frame
+# number if the path named a single frame, None for a padding notation.
+Sequence = collections.namedtuple('Sequence', [
+    'head',
+    'width',
+    'tail',
+    'frame',
+])
+
+
+def parsePadding(paddingStr):
+    """Parse any padding notation into its width.
+
+    Examples:
+        >>> parsePadding('####')
+        (4, None)
+        >>> parsePadding('1001')
+        (4, 1001)
+        >>> parsePadding('v001') is None
+        True
+
+    Args:
+        paddingStr (str): Value of a padding token.
+
+    Returns:
+        tuple|None: (int width, int frame or None), None if paddingStr is
+            not a padding notation.
+
+    """
+    match = PADDING_PRINTF(paddingStr) or PADDING_HOUDINI(paddingStr)
+    if match is not None:
+        return int(match.group(1) or 0), None
+    if PADDING_HASHES(paddingStr) is not None:
+        return len(paddingStr), None
+    if PADDING_FRAME(paddingStr) is not None:
+        return len(paddingStr), int(paddingStr)
+    return None
+
+
+def canonicalPadding(width):
+    """Return the canonical notation of a padding width.
+
+    Examples:
+        >>> canonicalPadding(4)
+        '%04d'
+        >>> canonicalPadding(1)
+        '%d'
+
+    """
+    if width > 1:
+        return '%0{0}d'.format(width)
+    return '%d'
+
+
+def sequenceFromSpan(filePathStr, start, end, paddingStr):
+    """Split a path around the value of its padding token.
+
+    Args:
+        filePathStr (str): The path.
+        start (int): Start of the padding value in the path.
+        end (int): End of the padding value in the path.
+        paddingStr (str): The padding value.
+
+    Returns:
+        Sequence|None: The sequence, None if paddingStr is not a padding
+            notation.
+
+    """
+    padding = parsePadding(paddingStr)
+    if padding is None:
+        return None
+    width, frame = padding
+    return Sequence(filePathStr[:start], width, filePathStr[end:], frame)
+
+
+def sequencePath(sequence):
+    """Return the path of a sequence with its padding in canonical notation.
+
+    Paths that only differ by their padding notation or frame number have
+    the same sequence path.
+
+    Args:
+        sequence (Sequence): The sequence.
+
+    Returns:
+        str: Path of the sequence, i.e. '/shows/foo/foo_comp_v001.%04d.exr'.
+
+    """
+    return sequence.head + canonicalPadding(sequence.width) + sequence.tail
+
+
+def framePath(sequence, frame):
+    """Return the path of a single frame of a sequence.
+
+    Args:
+        sequence (Sequence): The sequence.
+        frame (int): Frame number.
+
+    Returns:
+        str: Path of the frame.
+
+    """
+    return '{0}{1:0{2}d}{3}'.format(sequence.head, frame, sequence.width, sequence.tail)
+
+
+def framePaths(sequence, first, last, step=1):
+    """Lazily generate the paths of a frame range of a sequence.
+
+    Nothing is computed until the paths are consumed, so iterating a part
+    of a long frame range only costs the frames that are read.
+
+    Examples:
+        >>> paths = framePaths(sequence, 1001, 11000)
+        >>> next(paths)
+        '/shows/foo/foo_comp_v001.1001.exr'
+
+    Args:
+        sequence (Sequence): The sequence.
+        first (int): First frame.
+        last (int): Last frame, inclusive.
+        step (int, optional): Frame increment.
+
+    Yields:
+        str: Path of every frame in the range.
+
+    """
+    head = sequence.head
+    tail = sequence.tail
+    frameFormat = '{0:0' + str(sequence.width) + 'd}'
+    for frame in range(first, last + 1, step):
+        yield head + frameFormat.format(frame) + tail
+
+
+class FrameRanges():
+    """Immutable set of frames stored as sorted, inclusive frame ranges.
+
+    A complete sequence of any length is a single range, so checking
+    thousands of frames stays compact.
+
+    Examples:
+        >>> missing = FrameRanges.fromRange(1001, 1010).difference(FrameRanges.fromFrames([1001, 1002, 1005]))
+        >>> str(missing)
+        '1003-1004,1006-1010'
+        >>> len(missing)
+        7
+
+    """
+
+    def __init__(self, ranges=()):
+        """
+        Args:
+            ranges (iterable): Sorted, disjoint (first, last) frame ranges.
+
+        """
+        super(FrameRanges, self).__init__()
+        self._ranges = tuple(ranges)
+        self._firsts = [first for first, last in self._ranges]
+
+    @classmethod
+    def fromFrames(cls, frames):
+        """Return the frame ranges of any frame numbers."""
+        ranges = []
+        for frame in sorted(set(frames)):
+            if ranges and ranges[-1][1] == frame - 1:
+                ranges[-1][1] = frame
+            else:
+                ranges.append([frame, frame])
+        return cls(tuple(item) for item in ranges)
+
+    @classmethod
+    def fromRange(cls, first, last):
+        """Return the frames from first to last, inclusive."""
+        return cls(((first, last),) if first <= last else ())
+
+    @property
+    def ranges(self):
+        """tuple: Sorted, disjoint (first, last) frame ranges."""
+        return self._ranges
+
+    def __len__(self):
+        return sum(last - first + 1 for first, last in self._ranges)
+
+    def __bool__(self):
+        return bool(self._ranges)
+
+    def __contains__(self, frame):
+        index = bisect.bisect_right(self._firsts, frame) - 1
+        return index >= 0 and frame <= self._ranges[index][1]
+
+    def __iter__(self):
+        for first, last in self._ranges:
+            for frame in range(first, last + 1):
+                yield frame
+
+    def __eq__(self, other):
+        return isinstance(other, FrameRanges) and self._ranges == other._ranges
+
+    def __hash__(self):
+        return hash(self._ranges)
+
+    def __str__(self):
+        return ','.join('{0}-{1}'.format(first, last) if first != last else str(first)
+                        for first, last in self._ranges)
+
+    def __repr__(self):
+        return "FrameRanges('{0}')".format(self)
+
+    def difference(self, other):
+        """Return the frames that are not in other."""
+        result = []
+        otherRanges = other.ranges
+        index = 0
+        for first, last in self._ranges:
+            start = first
+            while index < len(otherRanges) and otherRanges[index][1] < start:
+                index += 1
+            otherIndex = index
+            while otherIndex < len(otherRanges) and otherRanges[otherIndex][0] <= last:
+                otherFirst, otherLast = otherRanges[otherIndex]
+                if otherFirst > start:
+                    result.append((start, otherFirst - 1))
+                start = max(start, otherLast + 1)
+                otherIndex += 1
+            if start <= last:
+                result.append((start, last))
+        return FrameRanges(result)
+
+    def intersection(self, other):
+        """Return the frames that are in other as well."""
+        return self.difference(self.difference(other))
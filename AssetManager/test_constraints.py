@@ -0,0 +1,61 @@
+"""Tests of token value constraints."""
+
+# Import built-in modules
+import unittest
+
+# Import internal modules
+from AssetManager import schema
+
+SCHEMA_STR = '/shows/{@show:lower,alnum,chars=-}/{@shot:digits,len=4}/{@show}{_@shot}{_@asset:alpha,len=2-8}{.#extension}'
+
+
+class ConstraintsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.schemaObj = schema.Schema(SCHEMA_STR)
+
+    def test_valid_values(self):
+        record = self.schemaObj.tokenRecord('/shows/foo-1/0080/foo-1_0080_bg.exr')
+        self.assertTrue(record.isValid)
+        self.assertEqual(record.violations, {})
+
+    def test_violations_keep_the_path_valid(self):
+        record = self.schemaObj.tokenRecord('/shows/Foo/80/Foo_80_b.exr')
+        self.assertTrue(record.isValid)
+        self.assertEqual(record.violations, {'show': 'lower,alnum,chars=-',
+                                             'shot': 'digits,len=4',
+                                             'asset': 'alpha,len=2-8'})
+        self.assertEqual(record.tokens['shot'], '80')
+
+    def test_each_constraint(self):
+        cases = (('/shows/foo/0080/foo_0080_bg.exr', set()),
+                 ('/shows/foo/00800/foo_00800_bg.exr', {'shot'}),
+                 ('/shows/foo/008a/foo_008a_bg.exr', {'shot'}),
+                 ('/shows/foo+1/0080/foo+1_0080_bg.exr', {'show'}),
+                 ('/shows/FOO/0080/FOO_0080_bg.exr', {'show'}),
+                 ('/shows/foo/0080/foo_0080_b.exr', {'asset'}),
+                 ('/shows/foo/0080/foo_0080_abcdefgh.exr', set()),
+                 ('/shows/foo/0080/foo_0080_abcdefghi.exr', {'asset'}),
+                 ('/shows/foo/0080/foo_0080_bg9.exr', {'asset'}))
+        for filePathStr, violations in cases:
+            self.assertEqual(set(self.schemaObj.tokenRecord(filePathStr).violations), violations, filePathStr)
+
+    def test_upper(self):
+        schemaObj = schema.Schema('/shows/{@show:upper}/{@show}{.#extension}')
+        self.assertEqual(schemaObj.tokenRecord('/shows/FOO/FOO.exr').violations, {})
+        self.assertEqual(schemaObj.tokenRecord('/shows/Foo/Foo.exr').violations, {'show': 'upper'})
+
+    def test_batch_violation_bits(self):
+        parsed = self.schemaObj.parseMany(['/shows/foo/0080/foo_0080_bg.exr',
+                                           '/shows/foo/80/foo_80_bg.exr',
+                                           '/elsewhere/foo.exr'])
+        self.assertEqual([parsed.violates(row, 'shot') for row in range(3)], [False, True, False])
+        self.assertFalse(any(parsed.violates(row, 'asset') for row in range(3)))
+
+    def test_constraints_in_the_schema_string(self):
+        self.assertEqual([key for key, valueGroup, checkGroup, constraints in self.schemaObj.compiled.checkGroups],
+                         ['show', 'shot', 'asset'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+"""Tests of the schema coverage analyzer."""
+
+# Import built-in modules
+import io
+import os
+import tempfile
+import unittest
+import contextlib
+
+# Import internal modules
+from AssetManager import constants
+from AssetManager import coverage
+from AssetManager import registry
+
+HEAD = '/shows/foo/010/0080/renders/comp/foo_010_0080_comp_bg_v001_2k/foo_010_0080_comp_bg_v001_2k'
+
+
+class AnalyzePathsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.schemaRegistry = registry.SchemaRegistry(constants.SCHEMA_DEFAULT)
+
+    def test_every_padding_notation_round_trips(self):
+        filePaths = [HEAD + '.%04d.exr',
+                     HEAD + '.1001.exr',
+                     HEAD + '.####.exr',
+                     HEAD + '.$F4.exr',
+                     HEAD + '.exr']
+        summary = coverage.analyzePaths(self.schemaRegistry, filePaths)
+        self.assertEqual(summary.counts['total'], 5)
+        self.assertEqual(summary.counts[coverage.COVERAGE_MATCH], 5, summary.examples)
+        self.assertEqual(summary.counts[coverage.COVERAGE_LOSSY], 0)
+
+    def test_invalid_paths_are_errors(self):
+        summary = coverage.analyzePaths(self.schemaRegistry, [HEAD + '.1001.exr', '/tmp/foo.exr'])
+        self.assertEqual(summary.counts[coverage.COVERAGE_MATCH], 1)
+        self.assertEqual(summary.counts[coverage.COVERAGE_ERROR], 1)
+        self.assertEqual(sum(summary.errors.values()), 1)
+
+    def test_written_tokens_keep_the_padding(self):
+        schemaObj = self.schemaRegistry.primary
+        record = schemaObj.tokenRecord(HEAD + '.1001.exr')
+        self.assertEqual(record.tokens['padding'], '%04d')
+        self.assertEqual(coverage.writtenTokens(schemaObj, record)['padding'], '1001')
+
+    def test_main_exits_zero_when_every_path_matches(self):
+        with tempfile.TemporaryDirectory() as directory:
+            sourcePath = os.path.join(directory, 'paths.txt')
+            with open(sourcePath, 'w') as sourceFile:
+                sourceFile.write('\n'.join([HEAD + '.1001.exr', HEAD + '.####.exr', HEAD + '.%04d.exr']))
+            with contextlib.redirect_stdout(io.StringIO()):
+                exitCode = coverage.main(['--schema', constants.SCHEMA_DEFAULT, '--source', sourcePath,
+                                          '--workers', '1'])
+        self.assertEqual(exitCode, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+"""Tests of the diagnostics of paths that don't match their schema."""
+
+# Import built-in modules
+import unittest
+
+# Import internal modules
+from AssetManager import constants
+from AssetManager import diagnostics
+from AssetManager import schema
+
+FILE_PATH = '/shows/foo/010/0080/renders/comp/foo_010_0080_comp_bg_v001_2k/foo_010_0080_comp_bg_v001_2k.%04d.exr'
+DEPTH_PATH = '/elsewhere/foo.exr'
+LEVEL_PATH = FILE_PATH.rsplit('/', 1)[0] + '/junk'
+MISMATCH_PATH = FILE_PATH.replace('_0080_comp_bg_v001_2k/', '_0090_comp_bg_v001_2k/')
+
+
+class RecordDiagnosticsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.schemaObj = schema.Schema(constants.SCHEMA_DEFAULT)
+
+    def test_valid_path_has_none(self):
+        self.assertEqual(self.schemaObj.tokenRecord(FILE_PATH).diagnostics, ())
+
+    def test_diagnostic_per_error(self):
+        Diagnostic = diagnostics.Diagnostic
+        expected = {
+            DEPTH_PATH: (Diagnostic(constants.DIAGNOSTIC_DEPTH, -1, None, 2, 8),),
+            LEVEL_PATH: (Diagnostic(constants.DIAGNOSTIC_LEVEL, 7, None, 'junk', None),),
+            MISMATCH_PATH: (Diagnostic(constants.DIAGNOSTIC_MISMATCH, 6, 'shot', '0090', '0080'),),
+        }
+        for filePathStr, pathDiagnostics in expected.items():
+            record = self.schemaObj.tokenRecord(filePathStr)
+            self.assertFalse(record.isValid, filePathStr)
+            self.assertEqual(record.diagnostics, pathDiagnostics, filePathStr)
+            self.assertEqual(self.schemaObj.tokenRecordFromLevels(filePathStr).diagnostics, pathDiagnostics)
+
+    def test_tooltip_messages(self):
+        # The model shows these as the tooltip of an invalid row.
+        messages = ['\n'.join(diagnostics.describe(diagnostic) for diagnostic in self.schemaObj.tokenRecord(filePathStr).diagnostics)
+                    for filePathStr in (DEPTH_PATH, LEVEL_PATH, MISMATCH_PATH)]
+        self.assertEqual(messages, ["The file path has 2 levels, the schema has 8",
+                                    "Level 8 'junk' does not match the schema",
+                                    "Level 7 has '0090' for token 'shot', the levels before have '0080'"])
+
+    def test_slow_path_matches_the_token_helpers(self):
+        for filePathStr in (DEPTH_PATH, LEVEL_PATH, MISMATCH_PATH):
+            record = self.schemaObj.tokenRecord(filePathStr)
+            self.assertEqual(dict(record.tokens), self.schemaObj.filePathToTokens(filePathStr))
+            self.assertEqual(dict(record.editableTokens), self.schemaObj.filePathToEditableTokens(filePathStr))
+
+    def test_cached_records_are_counted_once(self):
+        for _ in range(3):
+            self.schemaObj.tokenRecord(LEVEL_PATH)
+        self.assertEqual(self.schemaObj.diagnostics.counts, {constants.DIAGNOSTIC_LEVEL: 1})
+
+    def test_records_of_a_replaced_schema_are_counted(self):
+        # A record parsed while the schema changes isn't cached, its
+        # diagnostics are still counted.
+        compiled = self.schemaObj._compiled
+        self.assertTrue(self.schemaObj.updateSchemaFromString(constants.SCHEMA_DEFAULT.replace('{_@resolution}', '')))
+        record = self.schemaObj._buildRecord(compiled, LEVEL_PATH, None, None)
+        self.assertEqual(len(record.diagnostics), 1)
+        self.assertEqual(len(self.schemaObj.parseCache), 0)
+        self.assertEqual(self.schemaObj.diagnostics.counts, {constants.DIAGNOSTIC_LEVEL: 1})
+
+
+class CollectorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.collector = diagnostics.DiagnosticsCollector(logInterval=60.0)
+        self.depth = diagnostics.Diagnostic(constants.DIAGNOSTIC_DEPTH, -1, None, 2, 8)
+        self.level = diagnostics.Diagnostic(constants.DIAGNOSTIC_LEVEL, 7, None, 'junk', None)
+
+    def test_nothing_to_log(self):
+        self.collector.add(())
+        with self.assertNoLogs(level='INFO'):
+            self.assertFalse(self.collector.logSummary())
+
+    def test_summary_is_rate_limited(self):
+        self.collector.add((self.depth,))
+        with self.assertLogs(level='INFO') as logs:
+            self.assertTrue(self.collector.logSummary())
+        self.assertEqual(logs.output, ['INFO:root:File paths that do not match the schema: depth x1'])
+
+        self.collector.add((self.level,))
+        with self.assertNoLogs(level='INFO'):
+            self.assertFalse(self.collector.logSummary())
+        with self.assertLogs(level='INFO') as logs:
+            self.assertTrue(self.collector.logSummary(force=True))
+        # Only what was recorded since the last summary.
+        self.assertEqual(logs.output, ['INFO:root:File paths that do not match the schema: level x1'])
+        self.assertEqual(self.collector.counts, {constants.DIAGNOSTIC_DEPTH: 1, constants.DIAGNOSTIC_LEVEL: 1})
+
+    def test_summary_after_the_interval(self):
+        self.collector.logInterval = 0.0
+        for diagnostic in (self.depth, self.level):
+            self.collector.add((diagnostic,))
+            with self.assertLogs(level='INFO'):
+                self.assertTrue(self.collector.logSummary())
+
+    def test_clear(self):
+        self.collector.add((self.depth, self.level))
+        self.collector.clear()
+        self.assertFalse(self.collector.counts)
+        with self.assertNoLogs(level='INFO'):
+            self.assertFalse(self.collector.logSummary(force=True))
+
+    def test_bad_paths_log_one_summary(self):
+        schemaObj = schema.Schema(constants.SCHEMA_DEFAULT, diagnostics=self.collector)
+        filePaths = [FILE_PATH] + ['/elsewhere/foo{0}.exr'.format(index) for index in range(5)]\
+            + [LEVEL_PATH.replace('junk', 'junk{0}'.format(index)) for index in range(3)] + [MISMATCH_PATH]
+        with self.assertLogs(level='INFO') as logs:
+            schemaObj.parseMany(filePaths)
+            schemaObj.parseMany(filePaths + ['/elsewhere/bar.exr'])
+        self.assertEqual(logs.output, ['INFO:root:File paths that do not match the schema: '
+                                       'depth x5, level x3, mismatch x1'])
+        self.assertEqual(self.collector.counts, {constants.DIAGNOSTIC_DEPTH: 6,
+                                                 constants.DIAGNOSTIC_LEVEL: 3,
+                                                 constants.DIAGNOSTIC_MISMATCH: 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+"""Tests of missing and zero-byte frame detection."""
+
+# Import built-in modules
+import os
+import shutil
+import tempfile
+import unittest
+
+# Import internal modules
+from AssetManager import constants
+from AssetManager import frames
+from AssetManager import scan
+from AssetManager import schema
+from AssetManager import sequence
+
+
+class FrameRangesTest(unittest.TestCase):
+
+    def test_from_frames(self):
+        frameRanges = sequence.FrameRanges.fromFrames([1005, 1001, 1002, 1003, 1002, 1010])
+        self.assertEqual(frameRanges.ranges, ((1001, 1003), (1005, 1005), (1010, 1010)))
+        self.assertEqual(str(frameRanges), '1001-1003,1005,1010')
+        self.assertEqual(len(frameRanges), 5)
+        self.assertEqual(list(frameRanges), [1001, 1002, 1003, 1005, 1010])
+
+    def test_from_range(self):
+        self.assertEqual(sequence.FrameRanges.fromRange(1001, 1100).ranges, ((1001, 1100),))
+        self.assertFalse(sequence.FrameRanges.fromRange(1100, 1001))
+
+    def test_contains(self):
+        frameRanges = sequence.FrameRanges.fromFrames([1, 2, 3, 7])
+        self.assertEqual([frame for frame in range(10) if frame in frameRanges], [1, 2, 3, 7])
+
+    def test_difference(self):
+        expected = sequence.FrameRanges.fromRange(1001, 1010)
+        found = sequence.FrameRanges.fromFrames([999, 1001, 1002, 1005, 1010, 1020])
+        self.assertEqual(str(expected.difference(found)), '1003-1004,1006-1009')
+        self.assertEqual(str(found.difference(expected)), '999,1020')
+        self.assertFalse(expected.difference(expected))
+        self.assertEqual(expected.difference(sequence.FrameRanges()), expected)
+
+    def test_intersection(self):
+        expected = sequence.FrameRanges.fromRange(1001, 1010)
+        found = sequence.FrameRanges.fromFrames([999, 1001, 1002, 1005, 1020])
+        self.assertEqual(str(expected.intersection(found)), '1001-1002,1005')
+
+    def test_equal_and_hashable(self):
+        self.assertEqual(sequence.FrameRanges.fromFrames([1, 2, 3]), sequence.FrameRanges.fromRange(1, 3))
+        self.assertEqual(len({sequence.FrameRanges.fromFrames([1, 2]), sequence.FrameRanges.fromRange(1, 2)}), 1)
+
+
+class CheckSequencesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp().replace('\\', '/')
+        self.directory = '{0}/shows/foo/010/0080/renders/comp/foo_010_0080_comp_bg_v001_2k'.format(self.root)
+        os.makedirs(self.directory)
+        self.head = '{0}/foo_010_0080_comp_bg_v001_2k.'.format(self.directory)
+        # 1003 is missing, 1004 is empty and 1020 is outside of the range.
+        for frame in (1001, 1002, 1004, 1005, 1020):
+            with open('{0}{1}.exr'.format(self.head, frame), 'w') as fileObj:
+                fileObj.write('' if frame == 1004 else 'pixels')
+        self.schemaObj = schema.Schema(self.root + constants.SCHEMA_DEFAULT)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def check(self, rows, checkSizes=False):
+        listed = []
+
+        def scandir(directory, sizes=False):
+            listed.append(directory)
+            return scan.scanDirectory(directory, sizes=sizes)
+
+        statuses = frames.checkSequences(rows, scandir, workers=2, checkSizes=checkSizes)
+        return statuses, listed
+
+    def test_missing_and_extra_frames(self):
+        record = self.schemaObj.tokenRecord(self.head + '####.exr')
+        statuses, _ = self.check({'Read1': (record, (1001, 1005))})
+        status = statuses['Read1']
+        self.assertEqual(status.status, constants.SEQUENCE_PARTIAL)
+        self.assertEqual(str(status.missing), '1003')
+        self.assertEqual(str(status.expected), '1001-1005')
+        # Frames outside of the range are neither found nor missing.
+        self.assertEqual(str(status.found), '1001-1002,1004-1005')
+        self.assertFalse(status.empty)
+
+    def test_empty_frames(self):
+        record = self.schemaObj.tokenRecord(self.head + '%04d.exr')
+        statuses, _ = self.check({'Read1': (record, (1004, 1005))}, checkSizes=True)
+        self.assertEqual(statuses['Read1'].status, constants.SEQUENCE_PARTIAL)
+        self.assertEqual(str(statuses['Read1'].empty), '1004')
+
+    def test_complete_and_absent(self):
+        statuses, _ = self.check({
+            'Read1': (self.schemaObj.tokenRecord(self.head + '%04d.exr'), (1001, 1002)),
+            'Read2': (self.schemaObj.tokenRecord(self.head + '%04d.exr'), (2001, 2002)),
+            'Read3': (self.schemaObj.tokenRecord(self.head + '1003.exr'), None),
+        })
+        self.assertEqual(statuses['Read1'].status, constants.SEQUENCE_COMPLETE)
+        self.assertEqual(statuses['Read2'].status, constants.SEQUENCE_ABSENT)
+        self.assertEqual(statuses['Read3'].status, constants.SEQUENCE_ABSENT)
+
+    def test_frames_on_disk_without_range(self):
+        statuses, _ = self.check({'Read1': (self.schemaObj.tokenRecord(self.head + '$F4.exr'), None)})
+        self.assertEqual(str(statuses['Read1'].expected), '1001-1020')
+        self.assertEqual(len(statuses['Read1'].missing), 15)
+
+    def test_one_listing_per_directory(self):
+        rows = {'Read{0}'.format(index): (self.schemaObj.tokenRecord(self.head + '%04d.exr'), (1001, 1001 + index))
+                for index in range(5)}
+        rows['Invalid'] = (self.schemaObj.tokenRecord('/elsewhere/foo.exr'), None)
+        statuses, listed = self.check(rows)
+        self.assertEqual(listed, [self.directory])
+        self.assertNotIn('Invalid', statuses)
+        self.assertEqual(len(statuses), 5)
+
+    def test_missing_directory(self):
+        record = self.schemaObj.tokenRecord(self.head.replace('_v001_', '_v002_') + '%04d.exr')
+        statuses, _ = self.check({'Read1': (record, (1001, 1002))})
+        self.assertEqual(statuses['Read1'].status, constants.SEQUENCE_ABSENT)
+
+
+if __name__ == '__main__':
+    unittest.main()
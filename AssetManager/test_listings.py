@@ -0,0 +1,200 @@
+"""Tests of the shared directory listing cache."""
+
+# Import built-in modules
+import os
+import sys
+import time
+import shutil
+import tempfile
+import threading
+import unittest
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+# Import internal modules
+from AssetManager import constants
+from AssetManager import listings
+
+
+def names(entries):
+    return sorted(entry.name for entry in entries)
+
+
+class ListingsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.directory = os.path.join(self.root, 'comp')
+        os.mkdir(self.directory)
+        self.touch('foo.1001.exr')
+        self.setOld()
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def touch(self, name):
+        open(os.path.join(self.directory, name), 'w').close()
+
+    def setOld(self, age=60):
+        # Directories changed within constants.LISTING_MTIME_GRACE are never
+        # trusted, backdate them.
+        mtime = time.time() - age
+        os.utime(self.directory, (mtime, mtime))
+
+    def localDevice(self, directoryCache, fileSystemType):
+        device = os.stat(self.directory).st_dev
+        directoryCache._fileSystemTypes = {(os.major(device), os.minor(device)): fileSystemType}
+
+
+class PollingTest(ListingsTestCase):
+
+    def setUp(self):
+        super(PollingTest, self).setUp()
+        self.directoryCache = listings.DirectoryCache(maxSize=2, inotify=False)
+
+    def test_hits_within_the_poll_interval(self):
+        self.assertEqual(names(self.directoryCache.scanDirectory(self.directory)), ['foo.1001.exr'])
+        self.directoryCache.scanDirectory(self.directory)
+        stats = self.directoryCache.stats()
+        self.assertEqual((stats['listings'], stats['hits']), (1, 1))
+
+    def test_changed_mtime_lists_again(self):
+        with mock.patch.object(constants, 'LISTING_POLL_INTERVAL', 0):
+            self.directoryCache.scanDirectory(self.directory)
+            self.directoryCache.scanDirectory(self.directory)
+            self.assertEqual(self.directoryCache.stats()['revalidations'], 1)
+
+            self.touch('foo.1002.exr')
+            self.setOld(age=30)
+            self.assertEqual(names(self.directoryCache.scanDirectory(self.directory)),
+                             ['foo.1001.exr', 'foo.1002.exr'])
+            self.assertEqual(self.directoryCache.stats()['listings'], 2)
+
+    def test_recent_changes_are_not_trusted(self):
+        self.touch('foo.1002.exr')
+        self.directoryCache.scanDirectory(self.directory)
+        self.touch('foo.1003.exr')
+        self.assertEqual(names(self.directoryCache.scanDirectory(self.directory)),
+                         ['foo.1001.exr', 'foo.1002.exr', 'foo.1003.exr'])
+        self.assertEqual(self.directoryCache.stats()['listings'], 2)
+
+    def test_sizes_list_again(self):
+        with open(os.path.join(self.directory, 'foo.1001.exr'), 'w') as fileObj:
+            fileObj.write('pixels')
+        self.setOld()
+        self.assertEqual({entry.size for entry in self.directoryCache.scanDirectory(self.directory)}, {None})
+        self.assertEqual([entry.size for entry in self.directoryCache.scanDirectory(self.directory, sizes=True)], [6])
+        # A listing with sizes serves listings without sizes.
+        self.directoryCache.scanDirectory(self.directory)
+        self.assertEqual(self.directoryCache.stats()['listings'], 2)
+
+    def test_empty_files_are_not_trusted(self):
+        # Files still being written don't change the directory mtime.
+        self.directoryCache.scanDirectory(self.directory, sizes=True)
+        self.directoryCache.scanDirectory(self.directory, sizes=True)
+        self.assertEqual(self.directoryCache.stats()['listings'], 2)
+
+    def test_lru_eviction(self):
+        directories = [os.path.join(self.root, name) for name in ('a', 'b', 'c')]
+        for directory in directories:
+            os.mkdir(directory)
+            self.directoryCache.scanDirectory(directory)
+        stats = self.directoryCache.stats()
+        self.assertEqual((stats['size'], stats['evictions']), (2, 1))
+        self.assertNotIn(directories[0], self.directoryCache.listingCache)
+        self.directoryCache.scanDirectory(directories[0])
+        self.assertEqual(self.directoryCache.stats()['listings'], 4)
+
+    def test_invalidate(self):
+        self.directoryCache.scanDirectory(self.directory)
+        self.directoryCache.invalidate(self.directory)
+        self.directoryCache.scanDirectory(self.directory)
+        self.directoryCache.invalidate()
+        self.directoryCache.scanDirectory(self.directory)
+        stats = self.directoryCache.stats()
+        self.assertEqual((stats['listings'], stats['invalidations']), (3, 2))
+
+    def test_missing_directory(self):
+        with self.assertRaises(OSError):
+            self.directoryCache.scanDirectory(os.path.join(self.root, 'missing'))
+
+    def test_listdir(self):
+        self.assertEqual(self.directoryCache.listdir(self.directory), ['foo.1001.exr'])
+
+
+class FileSystemTypesTest(ListingsTestCase):
+
+    def test_read_file_system_types(self):
+        mountInfoPath = os.path.join(self.root, 'mountinfo')
+        with open(mountInfoPath, 'w') as mountInfo:
+            mountInfo.write('22 1 259:2 / / rw,relatime shared:1 - ext4 /dev/nvme0n1p2 rw\n'
+                            '40 22 0:51 / /jobs rw,relatime shared:20 - nfs4 filer:/jobs rw,vers=4.2\n')
+        self.assertEqual(listings.readFileSystemTypes(mountInfoPath), {(259, 2): 'ext4', (0, 51): 'nfs4'})
+        self.assertEqual(listings.readFileSystemTypes(os.path.join(self.root, 'missing')), {})
+
+    def test_network_file_systems_are_polled(self):
+        directoryCache = listings.DirectoryCache(inotify=True)
+        self.localDevice(directoryCache, 'nfs4')
+        directoryCache.scanDirectory(self.directory)
+        self.assertEqual(directoryCache.stats()['watched'], 0)
+        self.assertIsNone(directoryCache._watcher)
+
+    def test_unknown_mounts_are_polled(self):
+        directoryCache = listings.DirectoryCache(inotify=True)
+        with mock.patch.object(listings, 'readFileSystemTypes', return_value={}):
+            directoryCache.scanDirectory(self.directory)
+        self.assertEqual(directoryCache.stats()['watched'], 0)
+
+
+@unittest.skipUnless(sys.platform.startswith('linux'), 'inotify is only available on Linux')
+class InotifyTest(ListingsTestCase):
+
+    def waitFor(self, condition, timeout=5.0):
+        deadline = time.time() + timeout
+        while not condition():
+            if time.time() > deadline:
+                self.fail('Timed out waiting for inotify')
+            time.sleep(0.01)
+
+    def test_watcher_reports_changes(self):
+        changed = []
+        event = threading.Event()
+
+        def callback(directory):
+            changed.append(directory)
+            event.set()
+
+        watcher = listings.InotifyWatcher(callback)
+        self.assertTrue(watcher.watch(self.directory))
+        self.assertIn(self.directory, watcher)
+        self.touch('foo.1002.exr')
+        self.assertTrue(event.wait(5.0))
+        self.assertEqual(changed[0], self.directory)
+
+        watcher.unwatch(self.directory)
+        self.assertEqual(len(watcher), 0)
+
+    def test_watched_listing_is_refreshed(self):
+        directoryCache = listings.DirectoryCache(inotify=True)
+        self.localDevice(directoryCache, 'ext4')
+        directoryCache.scanDirectory(self.directory)
+        if not directoryCache.stats()['watched']:
+            self.skipTest('inotify is not available')
+
+        # Served from memory without an mtime check, even after the poll
+        # interval.
+        with mock.patch.object(constants, 'LISTING_POLL_INTERVAL', 0):
+            directoryCache.scanDirectory(self.directory)
+        self.assertEqual(directoryCache.stats()['hits'], 1)
+
+        self.touch('foo.1002.exr')
+        self.waitFor(lambda: self.directory not in directoryCache.listingCache)
+        self.assertEqual(names(directoryCache.scanDirectory(self.directory)), ['foo.1001.exr', 'foo.1002.exr'])
+        self.assertEqual(directoryCache.stats()['listings'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
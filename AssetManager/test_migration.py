@@ -0,0 +1,53 @@
+"""Tests of path migration between schemas."""
+
+# Import built-in modules
+import unittest
+
+# Import internal modules
+from AssetManager import constants
+from AssetManager import migration
+from AssetManager import registry
+from AssetManager import schema
+
+CAMERA_SCHEMA = '/shows/{@show}/cameras/{@show}{_@asset}{_@version}{.#extension}'
+TARGET_SCHEMA = '/shows/{@show}/{@asset}/{@show}{_@asset}{_@version}{.#extension}'
+CAMERA_PATH = '/shows/foo/cameras/foo_cam_v001.abc'
+RENDER_PATH = '/shows/foo/010/0080/renders/comp/foo_010_0080_comp_bg_v001_2k/foo_010_0080_comp_bg_v001_2k.%04d.exr'
+
+
+class MigrationTest(unittest.TestCase):
+
+    def setUp(self):
+        self.schemaRegistry = registry.SchemaRegistry(
+            constants.SCHEMA_SEPARATOR.join((CAMERA_SCHEMA, constants.SCHEMA_DEFAULT)))
+        self.target = schema.Schema(TARGET_SCHEMA)
+
+    def test_registry_source_parses_each_path_with_its_schema(self):
+        schemaMigration = migration.Migration(self.schemaRegistry, self.target)
+        results = list(schemaMigration.migrateMany([CAMERA_PATH, RENDER_PATH, '/elsewhere/foo.exr']))
+        self.assertEqual([result.targetPath for result in results],
+                         ['/shows/foo/cam/foo_cam_v001.abc', '/shows/foo/bg/foo_bg_v001.exr', None])
+        self.assertEqual(results[2].error, 'Does not match the source schema')
+        self.assertEqual((schemaMigration.migrated, schemaMigration.failed), (2, 1))
+
+    def test_schema_source_only_parses_its_own_paths(self):
+        schemaMigration = migration.Migration(self.schemaRegistry.primary, self.target)
+        self.assertIsNone(schemaMigration.migrate(RENDER_PATH).targetPath)
+        self.assertIs(schemaMigration.sourceForPath(RENDER_PATH), self.schemaRegistry.primary)
+
+    def test_missing_required_key(self):
+        target = schema.Schema('/shows/{@show}/{@episode}/{@show}{_@asset}{_@version}{.#extension}')
+        result = migration.Migration(self.schemaRegistry, target).migrate(CAMERA_PATH)
+        self.assertIsNone(result.targetPath)
+        self.assertIn('episode', result.error)
+
+    def test_defaults_and_key_map(self):
+        target = schema.Schema('/shows/{@show}/{@episode}/{@show}{_@role}{_@version}{.#extension}')
+        schemaMigration = migration.Migration(self.schemaRegistry, target,
+                                              keyMap={'role': 'asset'},
+                                              defaults={'episode': '101'})
+        self.assertEqual(schemaMigration.migrate(CAMERA_PATH).targetPath, '/shows/foo/101/foo_cam_v001.abc')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+"""Tests of the node table model, run them in a Nuke session with Qt."""
+
+# Import built-in modules
+import unittest
+from unittest import mock
+
+# Import internal modules
+from AssetManager import constants
+
+try:
+    # Import third-party modules
+    import nuke  # pylint: disable=import-error
+    # Import local modules
+    from AssetManager import model
+except ImportError:
+    model = None
+
+FILE_PATH = '/shows/foo/010/{0:04d}/renders/comp/foo_010_{0:04d}_comp_bg_v001_2k/foo_010_{0:04d}_comp_bg_v001_2k.%04d.exr'
+NODE_COUNT = 10
+
+
+@unittest.skipUnless(model, 'Needs Nuke and Qt')
+class RetokenizeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.nodes = [nuke.nodes.Read(file=FILE_PATH.format(index)) for index in range(NODE_COUNT)]
+        self.model = model.NodeTableModel(self.nodes, constants.SCHEMA_DEFAULT)
+        self.registry = self.model.registry
+        patchers = [mock.patch.object(self.model, 'setupModelData'),
+                    mock.patch.object(self.model, 'refreshFromDisk'),
+                    mock.patch.object(self.registry, 'tokenRecordFromLevels',
+                                      wraps=self.registry.tokenRecordFromLevels)]
+        self.setupModelData, self.refreshFromDisk, self.tokenRecordFromLevels = \
+            [patcher.start() for patcher in patchers]
+        for patcher in patchers:
+            self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        for node in self.nodes:
+            nuke.delete(node)
+
+    def test_model_is_set_up_once(self):
+        self.assertEqual(list(self.model.iterSetupModelData(chunkSize=3)), [3, 6, 9])
+        self.assertEqual(self.tokenRecordFromLevels.call_count, NODE_COUNT)
+        self.setupModelData.assert_called_once()
+        records = self.setupModelData.call_args[0][0]
+        self.assertEqual(sorted(records), sorted(node.name() for node in self.nodes))
+        self.assertTrue(all(record.isValid for record in records.values()))
+        self.refreshFromDisk.assert_called_once_with()
+
+    def test_schema_change_stops_the_pass(self):
+        passes = self.model.iterSetupModelData(chunkSize=3)
+        self.assertEqual(next(passes), 3)
+        self.assertTrue(self.registry.updateSchemasFromString(constants.SCHEMA_DEFAULT.replace('{_@resolution}', '')))
+        self.assertEqual(list(passes), [])
+        # The pass stopped at the next chunk, its records are never used.
+        self.assertEqual(self.tokenRecordFromLevels.call_count, 3)
+        self.setupModelData.assert_not_called()
+        self.refreshFromDisk.assert_not_called()
+
+    def test_schema_change_after_the_last_chunk(self):
+        passes = self.model.iterSetupModelData(chunkSize=3)
+        self.assertEqual([next(passes) for _ in range(3)], [3, 6, 9])
+        self.registry.updateSchemasFromString(constants.SCHEMA_DEFAULT.replace('{_@resolution}', ''))
+        self.assertEqual(list(passes), [])
+        self.setupModelData.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+"""Tests of the schema registry."""
+
+# Import built-in modules
+import unittest
+
+# Import internal modules
+from AssetManager import constants
+from AssetManager import registry
+
+
+class CompiledColumnsTest(unittest.TestCase):
+
+    def test_latest_version_column(self):
+        compiled = registry.SchemaRegistry(constants.SCHEMA_DEFAULT).compiled
+        self.assertEqual(compiled.columnHeaders[-2:], ('file', constants.LATEST_VERSION_COLUMN))
+        self.assertEqual(compiled.columnIndex[constants.LATEST_VERSION_COLUMN], len(compiled.columnHeaders) - 1)
+
+    def test_no_latest_version_column_without_version(self):
+        compiled = registry.SchemaRegistry('/shows/{@show}/{@shot}/{@shot}{.#extension}').compiled
+        self.assertEqual(compiled.columnHeaders, ('show', 'shot', 'file'))
+        self.assertNotIn(constants.LATEST_VERSION_COLUMN, compiled.columnIndex)
+
+    def test_token_colors_follow_the_primary_schema(self):
+        cameraSchemaStr = '/shows/{@show}/cameras/{@camera}{_@show}{_@asset}{_@version}{.#extension}'
+        schemaRegistry = registry.SchemaRegistry(
+            constants.SCHEMA_SEPARATOR.join((constants.SCHEMA_DEFAULT, cameraSchemaStr)))
+        compiled = schemaRegistry.compiled
+        primaryColors = schemaRegistry.primary.compiled.tokenColors
+        for key, color in primaryColors.items():
+            self.assertEqual(compiled.tokenColors[key], color, key)
+        self.assertEqual(compiled.tokenColors['camera'],
+                         constants.TOKEN_COLORS_LIST[len(primaryColors) % len(constants.TOKEN_COLORS_LIST)])
+
+    def test_columns_are_compiled_once(self):
+        schemaRegistry = registry.SchemaRegistry(constants.SCHEMA_DEFAULT)
+        self.assertIs(schemaRegistry.compiled.columnHeaders, schemaRegistry.compiled.columnHeaders)
+
+
+CAMERA_SCHEMA = '/shows/{@show}/cameras/{@show}{_@asset}{_@version}{.#extension}'
+ELEMENT_SCHEMA = '/shows/{@show}/{@sequence}/{@element}{_@version}{.#extension}'
+CAMERA_PATH = '/shows/foo/cameras/foo_cam_v001.abc'
+RENDER_PATH = '/shows/foo/010/0080/renders/comp/foo_010_0080_comp_bg_v001_2k/foo_010_0080_comp_bg_v001_2k.%04d.exr'
+ELEMENT_PATH = '/shows/foo/010/smoke_v003.exr'
+
+
+class DispatchTest(unittest.TestCase):
+
+    def setUp(self):
+        self.schemaRegistry = registry.SchemaRegistry(constants.SCHEMA_SEPARATOR.join(
+            (constants.SCHEMA_DEFAULT, ELEMENT_SCHEMA, CAMERA_SCHEMA)))
+        self.renderSchema, self.elementSchema, self.cameraSchema = self.schemaRegistry.schemas
+
+    def test_schema_strings(self):
+        self.assertEqual(registry.schemaStringsFromString(' /a/{@b} ;; /c/{@d}'), ['/a/{@b}', '/c/{@d}'])
+
+    def test_constant_prefix(self):
+        self.assertEqual(registry.constantPrefix(self.cameraSchema.tokensList), ('shows',))
+
+    def test_paths_are_parsed_with_their_schema(self):
+        self.assertIs(self.schemaRegistry.schemaForPath(RENDER_PATH), self.renderSchema)
+        self.assertIs(self.schemaRegistry.schemaForPath(CAMERA_PATH), self.cameraSchema)
+        self.assertIs(self.schemaRegistry.schemaForPath(ELEMENT_PATH), self.elementSchema)
+        self.assertEqual(self.schemaRegistry.tokenRecord(CAMERA_PATH).tokens['asset'], 'cam')
+        self.assertEqual(self.schemaRegistry.tokenRecord(ELEMENT_PATH).tokens['element'], 'smoke')
+
+    def test_same_depth_schemas_are_tried_in_order(self):
+        # The camera and element schemas both have four levels below /shows.
+        self.assertEqual(len(self.schemaRegistry.compiled.trie.candidates(CAMERA_PATH)), 2)
+        self.assertTrue(self.schemaRegistry.tokenRecord(CAMERA_PATH).isValid)
+        self.assertTrue(self.schemaRegistry.tokenRecord(ELEMENT_PATH).isValid)
+
+    def test_unmatched_path_falls_back(self):
+        self.assertIs(self.schemaRegistry.schemaForPath('/elsewhere/foo.exr'), self.renderSchema)
+        self.assertFalse(self.schemaRegistry.tokenRecord('/elsewhere/foo.exr').isValid)
+
+    def test_parse_many_uses_the_union_of_keys(self):
+        parsed = self.schemaRegistry.parseMany([RENDER_PATH, CAMERA_PATH, ELEMENT_PATH])
+        self.assertEqual([parsed.isValid(row) for row in range(3)], [True, True, True])
+        self.assertEqual(parsed.value(2, 'element'), 'smoke')
+        self.assertIsNone(parsed.value(0, 'element'))
+        self.assertEqual([parsed.value(row, 'show') for row in range(3)], ['foo'] * 3)
+
+    def test_levels_dispatch_like_the_whole_path(self):
+        for filePathStr in (RENDER_PATH, CAMERA_PATH, ELEMENT_PATH):
+            self.assertEqual(self.schemaRegistry.tokenRecordFromLevels(filePathStr).tokens,
+                             self.schemaRegistry.tokenRecord(filePathStr).tokens)
+
+
+class UpdateSchemasTest(unittest.TestCase):
+
+    def setUp(self):
+        self.renderSchemaStr = constants.SCHEMA_DEFAULT
+        self.cameraSchemaStr = CAMERA_SCHEMA
+        self.schemaRegistry = registry.SchemaRegistry(
+            constants.SCHEMA_SEPARATOR.join((self.cameraSchemaStr, self.renderSchemaStr)))
+
+    def test_unchanged_schemas_are_kept(self):
+        cameraSchema, renderSchema = self.schemaRegistry.schemas
+        self.assertFalse(self.schemaRegistry.updateSchemasFromString(
+            constants.SCHEMA_SEPARATOR.join((self.cameraSchemaStr, self.renderSchemaStr))))
+        self.assertTrue(self.schemaRegistry.updateSchemasFromString(self.renderSchemaStr))
+        self.assertIs(self.schemaRegistry.primary, renderSchema)
+
+    def test_edited_schema_is_updated_in_place(self):
+        cameraSchema, renderSchema = self.schemaRegistry.schemas
+        filePathStr = CAMERA_PATH
+        cameraSchema.tokenRecord(filePathStr)
+        self.assertEqual(len(cameraSchema.parseCache), 1)
+
+        editedSchemaStr = self.cameraSchemaStr.replace('{_@asset}', '{_@role}')
+        generation = self.schemaRegistry.generation
+        self.assertTrue(self.schemaRegistry.updateSchemasFromString(
+            constants.SCHEMA_SEPARATOR.join((editedSchemaStr, self.renderSchemaStr))))
+        self.assertEqual(self.schemaRegistry.generation, generation + 1)
+        self.assertEqual(self.schemaRegistry.schemas, (cameraSchema, renderSchema))
+        self.assertEqual(cameraSchema.generation, 1)
+        self.assertEqual(len(cameraSchema.parseCache), 0)
+        self.assertEqual(self.schemaRegistry.schemaForPath(filePathStr).tokenRecord(filePathStr).tokens['role'], 'cam')
+        self.assertEqual(renderSchema.generation, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
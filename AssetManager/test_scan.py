@@ -0,0 +1,77 @@
+"""Tests of file system scans of a schema."""
+
+# Import built-in modules
+import os
+import time
+import shutil
+import tempfile
+import unittest
+
+# Import internal modules
+from AssetManager import constants
+from AssetManager import scan
+from AssetManager import schema
+
+
+class ScanTest(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp().replace('\\', '/')
+        self.filePaths = []
+        for shot in ('0080', '0090', '0100'):
+            directory = '{0}/shows/foo/010/{1}/renders/comp/foo_010_{1}_comp_bg_v001_2k'.format(self.root, shot)
+            os.makedirs(directory)
+            os.makedirs('{0}/shows/foo/010/{1}/notes'.format(self.root, shot))
+            for frame in (1001, 1002):
+                filePathStr = '{0}/foo_010_{1}_comp_bg_v001_2k.{2}.exr'.format(directory, shot, frame)
+                open(filePathStr, 'w').close()
+                self.filePaths.append(filePathStr)
+        self.schemaObj = schema.Schema(self.root + constants.SCHEMA_DEFAULT)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_scan_paths_matches_walk_plan(self):
+        plan = self.schemaObj.scanPlan({'show': 'foo'})
+        self.assertEqual(sorted(scan.scanPaths(plan, workers=2)), sorted(self.filePaths))
+        self.assertEqual(sorted(scan.walkPlan(plan)), sorted(self.filePaths))
+
+    def test_scan_records_prunes_directories(self):
+        listed = []
+
+        def scandir(directory):
+            listed.append(directory)
+            return scan.scanDirectory(directory)
+
+        records = list(scan.scanRecords(self.schemaObj, {'show': 'foo', 'shot': '0090'}, scandir))
+        self.assertEqual(sorted(record.filePath for record in records),
+                         [filePathStr for filePathStr in self.filePaths if '_0090_' in filePathStr])
+        self.assertFalse(any('/0080' in directory or '/0100' in directory for directory in listed))
+
+    def test_stop_early_cancels_queued_listings(self):
+        plan = self.schemaObj.scanPlan({})
+        listed = []
+
+        def scandir(directory):
+            listed.append(directory)
+            time.sleep(0.01)
+            return scan.scanDirectory(directory)
+
+        filePaths = scan.scanPaths(plan, scandir, workers=1)
+        next(filePaths)
+        filePaths.close()
+        time.sleep(0.1)
+        stopped = len(listed)
+        del listed[:]
+        list(scan.scanPaths(plan, scandir, workers=1))
+        self.assertLess(stopped, len(listed))
+
+    def test_scan_directory_sizes(self):
+        directory = os.path.dirname(self.filePaths[0])
+        entries = scan.scanDirectory(directory, sizes=True)
+        self.assertEqual(sorted(entry.size for entry in entries), [0, 0])
+        self.assertEqual({entry.size for entry in scan.scanDirectory(directory)}, {None})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+"""Tests of parsing paths into tokens and rendering them back."""
+
+# Import built-in modules
+import unittest
+
+# Import internal modules
+from AssetManager import constants
+from AssetManager import schema
+
+FILE_PATH = '/shows/foo/010/0080/renders/comp/foo_010_0080_comp_bg_v001_2k/foo_010_0080_comp_bg_v001_2k.%04d.exr'
+VARIANT_PATH = '/shows/foo/010/0080/renders/comp/foo_010_0080_comp_bg_alt_v001_2k/foo_010_0080_comp_bg_alt_v001_2k.%04d.exr'
+
+
+class RoundTripTest(unittest.TestCase):
+
+    def setUp(self):
+        self.schemaObj = schema.Schema(constants.SCHEMA_DEFAULT)
+
+    def test_tokens_render_the_same_path(self):
+        for filePathStr in (FILE_PATH, VARIANT_PATH, FILE_PATH.replace('.%04d', '')):
+            tokens = self.schemaObj.filePathToTokens(filePathStr)
+            self.assertNotIn(constants.TOKEN_ERROR, tokens.values(), filePathStr)
+            self.assertEqual(self.schemaObj.tokensToFilePath(tokens), filePathStr)
+
+    def test_render_many(self):
+        rows = [self.schemaObj.filePathToTokens(filePathStr) for filePathStr in (FILE_PATH, VARIANT_PATH)]
+        self.assertEqual(self.schemaObj.renderMany(rows), [FILE_PATH, VARIANT_PATH])
+
+    def test_optional_token(self):
+        self.assertEqual(self.schemaObj.tokenRecord(VARIANT_PATH).tokens['variant'], 'alt')
+        self.assertFalse(self.schemaObj.tokenRecord(FILE_PATH).tokens['variant'])
+
+    def test_edit_file_path_changes_every_occurrence(self):
+        self.assertEqual(self.schemaObj.editFilePath(FILE_PATH, {'version': 'v002'}),
+                         FILE_PATH.replace('_v001_', '_v002_'))
+        self.assertEqual(self.schemaObj.editMany([FILE_PATH, '/elsewhere/foo.exr'], {'shot': '0090'}),
+                         [FILE_PATH.replace('0080', '0090'), None])
+
+    def test_invalid_path(self):
+        record = self.schemaObj.tokenRecord('/elsewhere/foo.exr')
+        self.assertFalse(record.isValid)
+        self.assertEqual(set(record.tokens.values()), {constants.TOKEN_ERROR})
+
+    def test_levels_parse_like_the_whole_path(self):
+        for filePathStr in (FILE_PATH, VARIANT_PATH, '/elsewhere/foo.exr'):
+            self.assertEqual(self.schemaObj.tokenRecordFromLevels(filePathStr).tokens,
+                             self.schemaObj.tokenRecord(filePathStr).tokens)
+
+
+class ParseCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.schemaObj = schema.Schema(constants.SCHEMA_DEFAULT, cacheSize=2)
+
+    def test_records_are_shared(self):
+        self.assertIs(self.schemaObj.tokenRecord(FILE_PATH), self.schemaObj.tokenRecord(FILE_PATH))
+        self.assertEqual(self.schemaObj.parseCache.stats()['hits'], 1)
+
+    def test_parse_many_parses_each_path_once(self):
+        parsed = self.schemaObj.parseMany([FILE_PATH, '/elsewhere/foo.exr', FILE_PATH])
+        self.assertEqual(len(parsed), 3)
+        self.assertEqual([parsed.isValid(row) for row in range(3)], [True, False, True])
+        self.assertEqual(parsed.value(2, 'shot'), '0080')
+        self.assertEqual(self.schemaObj.parseCache.stats()['misses'], 2)
+
+    def test_cache_is_bounded(self):
+        self.schemaObj.parseMany([FILE_PATH, VARIANT_PATH, '/elsewhere/foo.exr'])
+        stats = self.schemaObj.parseCache.stats()
+        self.assertEqual((stats['size'], stats['evictions']), (2, 1))
+
+    def test_schema_change_clears_the_cache(self):
+        self.schemaObj.tokenRecord(FILE_PATH)
+        self.assertEqual(self.schemaObj.updateSchemaFromString(constants.SCHEMA_DEFAULT), ())
+        self.assertEqual(len(self.schemaObj.parseCache), 1)
+        self.assertTrue(self.schemaObj.updateSchemaFromString(constants.SCHEMA_DEFAULT.replace('{_@resolution}', '')))
+        self.assertEqual(len(self.schemaObj.parseCache), 0)
+        self.assertEqual(self.schemaObj.generation, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+"""Tests of frame padding notations and frame paths."""
+
+# Import built-in modules
+import itertools
+import unittest
+
+# Import internal modules
+from AssetManager import constants
+from AssetManager import schema
+from AssetManager import sequence
+
+SEQUENCE_HEAD = '/shows/foo/010/0080/renders/comp/foo_010_0080_comp_bg_v001_2k/foo_010_0080_comp_bg_v001_2k.'
+
+
+class PaddingTest(unittest.TestCase):
+
+    def test_parse_padding(self):
+        self.assertEqual(sequence.parsePadding('%04d'), (4, None))
+        self.assertEqual(sequence.parsePadding('%d'), (0, None))
+        self.assertEqual(sequence.parsePadding('####'), (4, None))
+        self.assertEqual(sequence.parsePadding('$F4'), (4, None))
+        self.assertEqual(sequence.parsePadding('1001'), (4, 1001))
+        self.assertIsNone(sequence.parsePadding('v001'))
+
+    def test_canonical_padding(self):
+        self.assertEqual(sequence.canonicalPadding(4), '%04d')
+        self.assertEqual(sequence.canonicalPadding(1), '%d')
+
+
+class SchemaSequenceTest(unittest.TestCase):
+
+    def setUp(self):
+        self.schemaObj = schema.Schema(constants.SCHEMA_DEFAULT)
+
+    def test_notations_share_the_sequence_path(self):
+        for paddingStr in ('%04d', '####', '$F4', '1001'):
+            filePathStr = SEQUENCE_HEAD + paddingStr + '.exr'
+            record = self.schemaObj.tokenRecord(filePathStr)
+            self.assertEqual(record.tokens['padding'], '%04d', paddingStr)
+            self.assertEqual(sequence.sequencePath(record.sequence), SEQUENCE_HEAD + '%04d.exr')
+            # The raw value is kept, so paths render as they were written.
+            tokens = self.schemaObj.filePathToTokens(filePathStr)
+            self.assertEqual(tokens['padding'], paddingStr)
+            self.assertEqual(self.schemaObj.tokensToFilePath(tokens), filePathStr)
+
+    def test_frame_number(self):
+        self.assertEqual(self.schemaObj.tokenRecord(SEQUENCE_HEAD + '1001.exr').sequence.frame, 1001)
+        self.assertIsNone(self.schemaObj.tokenRecord(SEQUENCE_HEAD + '####.exr').sequence.frame)
+
+    def test_frame_paths_are_lazy(self):
+        framePaths = self.schemaObj.framePaths(SEQUENCE_HEAD + '$F4.exr', 1001, 10 ** 9)
+        self.assertEqual(list(itertools.islice(framePaths, 2)),
+                         [SEQUENCE_HEAD + '1001.exr', SEQUENCE_HEAD + '1002.exr'])
+
+    def test_frame_paths_step(self):
+        self.assertEqual(list(self.schemaObj.framePaths(SEQUENCE_HEAD + '%04d.exr', 1, 5, 2)),
+                         [SEQUENCE_HEAD + '{0:04d}.exr'.format(frame) for frame in (1, 3, 5)])
+
+    def test_no_padding_token(self):
+        with self.assertRaisesRegex(Exception, 'no .padding. token'):
+            self.schemaObj.framePaths(SEQUENCE_HEAD[:-1] + '.exr', 1, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,163 @@
+"""Find the latest version of many file paths with few directory listings."""
+
+# Import built-in modules
+import re
+import collections
+import concurrent.futures
+
+# Import internal modules
+from AssetManager import constants
+from AssetManager import listings
+from AssetManager import schema
+
+VERSION_VALUE = re.compile(r'(\D*)(\d+)').fullmatch
+
+
+# Where the versions of a path are listed. directory is the parent of the
+# first level with a version, versions of the path's asset are the entries
+# of directory that match pattern.
+VersionQuery = collections.namedtuple('VersionQuery', [
+    'directory',
+    'pattern',
+    'key',
+    'value',
+])
+
+# Latest version of a path. value is the version string, i.e. 'v012',
+# filePath the path with every occurrence of the version replaced.
+LatestVersion = collections.namedtuple('LatestVersion', [
+    'value',
+    'filePath',
+    'isLatest',
+])
+
+
+def versionKey(record, key=constants.VERSION_KEY):
+    """Return the version key of a parsed path, None if it has none."""
+    for spanKey in record.spans:
+        if spanKey.lower() == key:
+            return spanKey
+    return None
+
+
+def versionQuery(record, key=constants.VERSION_KEY):
+    """Return where to look for the versions of a parsed path.
+
+    The level of the first occurrence of the version is matched against
+    its siblings with every other character kept, so only versions of the
+    same asset are found.
+
+    Examples:
+        >>> versionQuery(schema.tokenRecord('/shows/foo/comp/foo_v001/foo_v001.exr'))
+        VersionQuery(directory='/shows/foo/comp', pattern='foo_v([0-9]+)', key='version', value='v001')
+
+    Args:
+        record (schema.TokenRecord): Parse result of the path.
+        key (str, optional): Version key, case insensitive.
+
+    Returns:
+        VersionQuery|None: The query, None if the path isn't valid or has no
+            version that ends with digits.
+
+    """
+    if not record.isValid:
+        return None
+    spanKey = versionKey(record, key)
+    if spanKey is None:
+        return None
+    filePathStr = record.filePath
+    start, end, delimeter = record.spans[spanKey][0]
+    start += len(delimeter)
+    value = filePathStr[start:end]
+    match = VERSION_VALUE(value)
+    if match is None:
+        return None
+
+    directoryEnd = filePathStr.rfind('/', 0, start)
+    levelEnd = filePathStr.find('/', end)
+    if levelEnd == -1:
+        levelEnd = len(filePathStr)
+    # Every occurrence of the version in the level is the same number.
+    pieces = []
+    position = directoryEnd + 1
+    for occurrenceStart, occurrenceEnd, occurrenceDelimeter in record.spans[spanKey]:
+        occurrenceStart += len(occurrenceDelimeter)
+        if occurrenceStart >= levelEnd:
+            break
+        pieces.append(re.escape(filePathStr[position:occurrenceStart] + match.group(1)))
+        pieces.append('([0-9]+)' if len(pieces) == 1 else '\\1')
+        position = occurrenceEnd
+    pieces.append(re.escape(filePathStr[position:levelEnd]))
+    return VersionQuery(filePathStr[:directoryEnd] or '/', ''.join(pieces), spanKey, value)
+
+
+def latestInEntries(query, names):
+    """Return the latest version among the names of a directory listing.
+
+    Returns:
+        str: The highest version value, query.value if no name matches.
+
+    """
+    matcher = re.compile(query.pattern).fullmatch
+    prefix = VERSION_VALUE(query.value).group(1)
+    latest = query.value
+    latestNumber = int(VERSION_VALUE(query.value).group(2))
+    for name in names:
+        match = matcher(name)
+        if match is not None and int(match.group(1)) > latestNumber:
+            latestNumber = int(match.group(1))
+            latest = prefix + match.group(1)
+    return latest
+
+
+def resolveLatestVersions(records, key=constants.VERSION_KEY, scandir=listings.scanDirectory,
+                          workers=constants.SCAN_WORKERS):
+    """Find the latest version of many parsed paths.
+
+    Paths are grouped by the directory their version varies in, every
+    directory is listed once and the directories are listed in parallel.
+
+    Examples:
+        >>> latest = resolveLatestVersions({'Read1': record})
+        >>> latest['Read1'].value
+        'v012'
+
+    Args:
+        records (dict): schema.TokenRecord by any row key, i.e. node name.
+        key (str, optional): Version key, case insensitive.
+        scandir (callable, optional): Lists a directory as scan.DirEntry
+            objects, defaults to the listings shared by the process.
+        workers (int, optional): Number of threads listing directories.
+
+    Returns:
+        dict: LatestVersion by row key, rows without a version are left out.
+
+    """
+    queries = {}
+    directories = collections.defaultdict(list)
+    for rowKey, record in records.items():
+        query = versionQuery(record, key)
+        if query is not None:
+            queries[rowKey] = (record, query)
+            directories[query.directory].append(rowKey)
+
+    def listNames(directory):
+        try:
+            return directory, [entry.name for entry in scandir(directory)]
+        except OSError:
+            return directory, []
+
+    latestVersions = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        for directory, names in executor.map(listNames, directories):
+            latestByPattern = {}
+            for rowKey in directories[directory]:
+                record, query = queries[rowKey]
+                if (query.pattern, query.value) not in latestByPattern:
+                    latestByPattern[(query.pattern, query.value)] = latestInEntries(query, names)
+                latest = latestByPattern[(query.pattern, query.value)]
+                filePathStr = record.filePath
+                if latest != query.value:
+                    filePathStr = schema.spliceFilePath(filePathStr, record.spans, {query.key: latest})
+                latestVersions[rowKey] = LatestVersion(latest, filePathStr, latest == query.value)
+    return latestVersions
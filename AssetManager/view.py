@@ -5,6 +5,7 @@
 import nuke
 import os
 import imp
+import logging
 
 # Keeping this for development to enable auto-completion.
 from Qt import QtCore, QtGui, QtWidgets, __binding__  # pylint: disable=no-name-in-module
@@ -13,6 +14,8 @@ from Qt import QtCore, QtGui, QtWidgets, __binding__  # pylint: disable=no-name-
 from AssetManager import constants
 from AssetManager import nukeUtils
 from AssetManager import model
+from AssetManager import schema
+from AssetManager import migration as schemaMigration
 from AssetManager import delegate
 imp.reload(delegate)
 
@@ -394,6 +397,18 @@ class AssetManagerWidget(QtWidgets.QWidget):
         self._nodeList = []  # make sure it's iterable
         self._grouped_nodes = False
         self._nodeFilter = None
+        self._retokenizeJob = None
+
+        # Apply the schema override once typing pauses.
+        self._schemaOverrideTimer = QtCore.QTimer(self)
+        self._schemaOverrideTimer.setSingleShot(True)
+        self._schemaOverrideTimer.setInterval(constants.SCHEMA_OVERRIDE_DEBOUNCE_MS)
+        self._schemaOverrideTimer.timeout.connect(self.applySchemaOverride)
+
+        # Re-tokenize one chunk of nodes per event loop iteration.
+        self._retokenizeTimer = QtCore.QTimer(self)
+        self._retokenizeTimer.setInterval(0)
+        self._retokenizeTimer.timeout.connect(self._retokenizeStep)
 
         # Content
         # TODO: untangle this bad mix of ui and controller functions.
@@ -420,6 +435,8 @@ class AssetManagerWidget(QtWidgets.QWidget):
                                                     <b>{#token}</b> for non-editiable token variable<br>
                                                     <b>{*@token}</b> for optional user editable token variable<br>
                                                     <b>{*#token}</b> for optional non-editable token variable<br>
+                                                    <b>{@token:digits,len=4}</b> for a token variable with constraints, values that violate them are highlighted<br>
+                                                    Constraints: <i>digits</i>, <i>alpha</i>, <i>alnum</i>, <i>chars=-</i>, <i>lower</i>, <i>upper</i>, <i>len=4</i>, <i>len=2-8</i><br>
                                                     Anything else in the string is constant<br><br>
                                                     
                                                     Syntax examples:<br><br>
@@ -434,6 +451,8 @@ class AssetManagerWidget(QtWidgets.QWidget):
                                                     If your pipeline uses multiple schemas (e.g. separate schemas for cameras, CG renders, client deliveravles, etc) consider storing the token strings inside your own environment variables.
                                                     Enter the environment variable in shell format:
                                                     <br><br><i>$CAMERA_SCHEMA</i> or <i>$RENDER_SCHEMA</i> or <i>$DELIVERABLES_SCHEMA</i> etc<br><br>
+                                                    Separate several schemas with ';' to load them side by side, each file is parsed by the schema it matches:
+                                                    <br><br><i>$CAMERA_SCHEMA;$RENDER_SCHEMA;$DELIVERABLES_SCHEMA</i><br><br>
                                                 
                                                     <b style="color:red">THE ABOVE SCHEMAS ARE EXAMPLES ONLY - IF YOU ARE USING THIS TOOL TO PROTOTYPE A PIPELINE, THINK LONG AND HARD AND BEFORE COMMITTING TO A SCHEMA.<br><br>
                                                     A SUCCESSFUL PIPELINE COULD LEAVE YOU ENCUMBERED WITH YOUR SCHEMA DECISIONS FOR A VERY LONG TIME &#128540;</b><br><br>
@@ -508,6 +527,15 @@ class AssetManagerWidget(QtWidgets.QWidget):
         self.loadSelectedButton.released.connect(self.loadSelected)
         self.buttonBarLayout.addWidget(self.loadSelectedButton)
 
+        # Migrate Schema
+        self.buttonBarLayout.addSpacing(constants.BUTTON_SPACER)
+        self.migrateSchemaButton = QtWidgets.QPushButton('migrate schema...')
+        self.migrateSchemaButton.setMaximumWidth(constants.BUTTON_WIDTH)
+        self.migrateSchemaButton.setSizePolicy(QtWidgets.QSizePolicy.Expanding,QtWidgets.QSizePolicy.Maximum)
+        self.migrateSchemaButton.setToolTip('Rewrite the file paths of the loaded nodes to follow <b>another schema</b>. Tokens with the same name are kept, all changes are one undo step.')
+        self.migrateSchemaButton.released.connect(self.migrateSchemaDialog)
+        self.buttonBarLayout.addWidget(self.migrateSchemaButton)
+
         ''''
         # Colorize Tokens
         self.colorizeTokens = QtWidgets.QCheckBox('Colorize tokens')
@@ -598,7 +626,7 @@ class AssetManagerWidget(QtWidgets.QWidget):
         self.nodeFilterModel.setSourceModel(self.tableModel)
         self.tableView.setModel(self.nodeFilterModel)
 
-        self.schemaOverrideChanged()
+        self.applySchemaOverride()
 
     def loadSelected(self):
         """Sets the node list to current selection."""
@@ -849,23 +877,125 @@ class AssetManagerWidget(QtWidgets.QWidget):
         self.tableView.horizontalHeader().setSortIndicatorShown(True)
 
 
+    def migrateSchema(self, targetSchemaStr, keyMap=None, defaults=None):
+        """Migrate every loaded node from the current schemas to another one.
+
+        Every path is parsed with the schema of the registry it belongs to.
+        All file knobs are changed in one undo group. Afterwards the panel
+        uses the target schema.
+
+        Args:
+            targetSchemaStr (str): Schema the paths should follow.
+            keyMap (dict, optional): Target key to source key.
+            defaults (dict, optional): Target key to value for new keys.
+
+        Returns:
+            list: migration.MigrationResult of the paths that could not be
+                migrated.
+
+        """
+        migration = schemaMigration.Migration(self.tableModel.registry,
+                                              schema.Schema(targetSchemaStr),
+                                              keyMap=keyMap,
+                                              defaults=defaults)
+        failures = self.tableModel.migrateNodes(migration)
+        for result in failures:
+            logging.warning('Unable to migrate {0}: {1}'.format(result.sourcePath, result.error))
+
+        # Parse the migrated paths once, with the target schema.
+        self.cancelRetokenize()
+        self._schemaOverrideTimer.stop()
+        if hasattr(self, 'schemaOverrideLineEdit'):
+            self.schemaOverrideLineEdit.blockSignals(True)
+            self.schemaOverrideLineEdit.setText(targetSchemaStr)
+            self.schemaOverrideLineEdit.blockSignals(False)
+        self.tableModel.registry.updateSchemasFromString(targetSchemaStr)
+        self.updateSchemaLabels()
+        self.tableModel.setupModelData()
+        self.tableModel.refreshFromDisk()
+        return failures
+
+    def migrateSchemaDialog(self):
+        """Ask for a target schema and migrate the loaded nodes to it."""
+        currentSchemaStr = ''
+        if hasattr(self, 'schemaOverrideLineEdit'):
+            currentSchemaStr = self.schemaOverrideLineEdit.text()
+        if currentSchemaStr == '':
+            currentSchemaStr = str(os.environ.get('ASSET_MANAGER_SCHEMA', constants.SCHEMA_DEFAULT))
+
+        targetSchemaStr = nukeUtils.getInput('Migrate the loaded nodes to schema:', currentSchemaStr)
+        if not targetSchemaStr or targetSchemaStr == currentSchemaStr:
+            return
+
+        if not schema.Schema(targetSchemaStr).compiled.isValid:
+            nukeUtils.message('Invalid schema {0}'.format(targetSchemaStr))
+            return
+        failures = self.migrateSchema(targetSchemaStr)
+        if failures:
+            nukeUtils.message('Unable to migrate {0} nodes:\n\n{1}'.format(
+                len(failures),
+                '\n'.join('{0}: {1}'.format(result.sourcePath, result.error) for result in failures)))
+
     @QtCore.Slot(str)
     def schemaOverrideChanged(self):
-        """Update the node class filter.
+        """Apply the schema override once typing pauses.
 
-        Args:
-            node_classes (str): delimited str list of node Classes to display.
+        Cancels re-tokenizing for the previous schema, see
+        applySchemaOverride.
+
+        """
+        self.cancelRetokenize()
+        self._schemaOverrideTimer.start()
+
+    def applySchemaOverride(self):
+        """Load the schema override and re-tokenize the nodes in the background.
+
+        The nodes are re-tokenized in chunks between events, see
+        model.NodeTableModel.iterSetupModelData, so the panel stays
+        interactive. Nothing is re-tokenized if the schemas didn't change.
 
         """
-        schemaStr = self.schemaOverrideLineEdit.text()
+        self._schemaOverrideTimer.stop()
+        schemaStr = ''
+        if hasattr(self, 'schemaOverrideLineEdit'):
+            schemaStr = self.schemaOverrideLineEdit.text()
         if schemaStr == '':
             schemaStr = str(os.environ.get('ASSET_MANAGER_SCHEMA', constants.SCHEMA_DEFAULT))
 
-        self.tableModel.schema.updateSchemaFromString(schemaStr)
+        try:
+            changed = self.tableModel.registry.updateSchemasFromString(schemaStr)
+        except Exception as error:
+            # Half typed schemas are expected, keep the last valid one.
+            logging.info('Invalid schema {0}: {1}'.format(schemaStr, error))
+            return
+
+        self.updateSchemaLabels()
 
-        self.tokenDirVarsLabel2.setText(self.tableModel.schema.schemaPathHeadColor)
-        self.tokenFileVarsLabel2.setText(self.tableModel.schema.schemaPathTailColor)
-        self.tableView.horizontalHeader().setSortIndicatorShown(False)
-        self.tableView.resizeColumnsToContents()
-        self.tableView.horizontalHeader().setSortIndicatorShown(True)
+        if changed:
+            self.cancelRetokenize()
+            self._retokenizeJob = self.tableModel.iterSetupModelData()
+            self._retokenizeTimer.start()
+
+    def updateSchemaLabels(self):
+        """Show the directory and file tokens of the primary schema."""
+        compiled = self.tableModel.registry.primary.compiled
+        self.tokenDirVarsLabel2.setText(compiled.schemaPathHeadColor)
+        self.tokenFileVarsLabel2.setText(compiled.schemaPathTailColor)
+
+    def cancelRetokenize(self):
+        """Stop re-tokenizing the nodes, the model keeps its current data."""
+        self._retokenizeTimer.stop()
+        if self._retokenizeJob is not None:
+            self._retokenizeJob.close()
+            self._retokenizeJob = None
+
+    def _retokenizeStep(self):
+        try:
+            next(self._retokenizeJob)
+        except StopIteration:
+            self._retokenizeTimer.stop()
+            self._retokenizeJob = None
+            self.tableView.horizontalHeader().setSortIndicatorShown(False)
+            self.tableView.resizeColumnsToContents()
+            self.tableView.horizontalHeader().setSortIndicatorShown(True)
 
@@ -5,6 +5,28 @@ EDITABLE_CHAR = '@'
 OPTIONAL_CHAR = '?'
 TOKEN_MATCH_BRACES = r'\{(.*?)\}|([^{]+)'
 VERSION_MATCH_BRACES = r'([^[]+)\[([^\]]+)\]'
+# Version syntax: literal prefix followed by the number of digits, i.e. 'v3'
+VERSION_SYNTAX_MATCH = r'^(\D*)(\d+)$'
+
+# Resolver cache: max entries, seconds resolved and unknown urls stay cached
+RESOLVER_CACHE_SIZE = 100000
+RESOLVER_CACHE_TTL = 300.0
+RESOLVER_NEGATIVE_TTL = 30.0
+
+# Schema builder: ms without typing before validating, seconds spent on the
+# sample preview, paths loaded from a sample, paths between cancel/budget
+# checks and failures shown
+PREVIEW_DEBOUNCE_MS = 300
+PREVIEW_TIME_BUDGET = 0.5
+PREVIEW_SAMPLE_LIMIT = 100000
+PREVIEW_CHECK_INTERVAL = 256
+PREVIEW_MAX_FAILURES = 5
+
+# Schema inference: values kept per position sketch, path shapes tracked
+# and the share of paths a shape needs to add an optional token
+INFER_SKETCH_SIZE = 32
+INFER_MAX_SHAPES = 256
+INFER_MIN_SHARE = 0.01
 
 SCHEMA_STYLE = 0
 match SCHEMA_STYLE:
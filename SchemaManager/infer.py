@@ -0,0 +1,495 @@
+"""Propose a schema string from existing paths.
+
+Paths are streamed once. Every path is split into its shape, the
+delimiters of each level, and the values between them. Each shape keeps a
+bounded sketch of the values at every position, so memory depends on the
+number of shapes and positions, not on the number of paths.
+
+Usage:
+    python infer.py paths.txt
+    python infer.py /jobs/show --verify
+    find /jobs/show -type f | python infer.py -
+"""
+
+# Import third party modules
+import argparse
+import itertools
+import re
+import sys
+from collections import Counter, namedtuple
+from pathlib import PureWindowsPath
+
+# Import internal modules
+import constants as K
+import validation
+from schema import SchemaManager
+
+FIELD_SPLIT = re.compile('([' + re.escape(''.join(K.DELIMETERS[1:])) + '])')
+VERSION_VALUE = re.compile(r'([vV])(\d+)')
+PADDING_VALUE = re.compile(r'%0?\d*d|#+|\$F\d*')
+MAX_OPTIONALS = 8
+# Most positions a shape may have on top of the base shape to add optionals.
+MAX_OPTIONAL_POSITIONS = 2
+
+# A position of the proposed schema. value is the constant or the key,
+# syntax the version syntax of version tokens.
+Field = namedtuple('Field', [
+    'delimeter',
+    'value',
+    'is_constant',
+    'is_hidden',
+    'is_optional',
+    'syntax',
+])
+
+# Positions only some shapes have, each inserted before base position
+# index. is_shared if the positions always had the same value, they are one
+# token key then.
+Optional = namedtuple('Optional', ['positions', 'sketches', 'is_shared', 'count'])
+
+# Result of infer. shapes is the number of distinct shapes tracked, other
+# the paths whose shape wasn't tracked, covered the paths whose shape the
+# schema can express.
+Inference = namedtuple('Inference', [
+    'schema_str',
+    'total',
+    'base_count',
+    'covered',
+    'shapes',
+    'other',
+    'optionals',
+])
+
+
+def value_kind(value) -> str:
+    if PADDING_VALUE.fullmatch(value):
+        return 'padding'
+    matches = VERSION_VALUE.fullmatch(value)
+    if matches:
+        return f"version:{matches.group(1)}{len(matches.group(2))}"
+    if value.isdigit():
+        return 'digits'
+    return 'word'
+
+
+class ValueSketch():
+    """Bounded summary of the values seen at one position.
+
+    Keeps exact counts for up to size distinct values, then the most
+    frequent values as a Misra-Gries summary.
+    """
+    def __init__(self, size=K.INFER_SKETCH_SIZE) -> None:
+        super(ValueSketch, self).__init__()
+        self.size = size
+        self.count = 0
+        self.counters = {}
+        self.overflow = False
+        self.kinds = Counter()
+
+    def add(self, value) -> None:
+        self.count += 1
+        self.kinds[value_kind(value)] += 1
+        counters = self.counters
+        if value in counters:
+            counters[value] += 1
+        elif len(counters) < self.size:
+            counters[value] = 1
+        else:
+            self.overflow = True
+            for key in list(counters):
+                counters[key] -= 1
+                if not counters[key]:
+                    del counters[key]
+
+    @property
+    def is_constant(self) -> bool:
+        return not self.overflow and len(self.counters) == 1
+
+    @property
+    def constant(self) -> str:
+        return next(iter(self.counters))
+
+    @property
+    def kind(self) -> str:
+        return self.kinds.most_common(1)[0][0]
+
+    def similarity(self, other) -> float:
+        # Shared frequent values and the same kind of value.
+        values = set(self.counters)
+        other_values = set(other.counters)
+        union = values | other_values
+        shared = len(values & other_values) / len(union) if union else 0.0
+        return shared + (self.kind == other.kind)
+
+
+class ShapeStats():
+    """Sketches of every position of the paths of one shape."""
+    def __init__(self, anchor, shape, size) -> None:
+        super(ShapeStats, self).__init__()
+        self.anchor = anchor
+        self.shape = shape
+        self.count = 0
+        self.sketches = [ValueSketch(size) for _ in shape_positions(shape)]
+        # Pairs of positions that had the same value in every path so far.
+        self.equal_pairs = None
+
+    def add(self, values) -> None:
+        self.count += 1
+        for sketch, value in zip(self.sketches, values):
+            sketch.add(value)
+        if self.equal_pairs is None:
+            indices = {}
+            for index, value in enumerate(values):
+                indices.setdefault(value, []).append(index)
+            self.equal_pairs = [pair for same in indices.values()
+                                for pair in itertools.combinations(same, 2)]
+        elif self.equal_pairs:
+            self.equal_pairs = [(a, b) for a, b in self.equal_pairs if values[a] == values[b]]
+
+
+def split_path(path) -> tuple:
+    """Return the anchor, shape and values of a path.
+
+    Example:
+        >>> split_path('/shows/foo/foo_v001.exr')
+        ('', ('', '', '_.'), ['shows', 'foo', 'foo', 'v001', 'exr'])
+    """
+    path = path.strip().replace('\\', K.DELIMETERS[0])
+    anchor = PureWindowsPath(path).anchor.replace('\\', K.DELIMETERS[0])[:-1]
+    levels = [level for level in path[len(anchor):].split(K.DELIMETERS[0]) if level]
+    shape = []
+    values = []
+    for level in levels:
+        parts = FIELD_SPLIT.split(level)
+        values += parts[0::2]
+        shape.append(''.join(parts[1::2]))
+    return anchor, tuple(shape), values
+
+
+def shape_positions(shape) -> list:
+    # (level, delimeter) of every value of a shape.
+    positions = []
+    for level, delimeters in enumerate(shape):
+        positions.append((level, K.DELIMETERS[0]))
+        positions += [(level, delimeter) for delimeter in delimeters]
+    return positions
+
+
+def remove_position(shape, index) -> tuple:
+    """Return the shape without one position and that position's delimeter.
+
+    Returns:
+        tuple: (shape, delimeter), None if the rest of the shape changes,
+            i.e. for the first of several values of a level.
+    """
+    start = 0
+    for level, delimeters in enumerate(shape):
+        count = len(delimeters) + 1
+        if index < start + count:
+            field = index - start
+            if field == 0:
+                if count == 1:
+                    return shape[:level] + shape[level + 1:], K.DELIMETERS[0]
+                return None
+            delimeters = delimeters[:field - 1] + delimeters[field:]
+            return shape[:level] + (delimeters,) + shape[level + 1:], shape[level][field - 1]
+        start += count
+    return None
+
+
+def insert_position(shape, index, delimeter) -> tuple:
+    """Return the shape with a position inserted before position index."""
+    positions = shape_positions(shape)
+    if delimeter == K.DELIMETERS[0]:
+        level = positions[index][0] if index < len(positions) else len(shape)
+        return shape[:level] + ('',) + shape[level:]
+    level = positions[index - 1][0]
+    field = index - 1 - positions.index((level, K.DELIMETERS[0]))
+    delimeters = shape[level]
+    return shape[:level] + (delimeters[:field] + delimeter + delimeters[field:],) + shape[level + 1:]
+
+
+class SchemaInferrer():
+    """Stream paths and propose a schema string for them.
+
+    Example:
+        >>> inferrer = SchemaInferrer()
+        >>> inferrer.add_many(validation.iter_sample('paths.txt'))
+        >>> inferrer.infer().schema_str
+        '//jobs.local/sharename/shows{/@token1}{/@token2}...'
+    """
+    def __init__(self, sketch_size=K.INFER_SKETCH_SIZE, max_shapes=K.INFER_MAX_SHAPES,
+                 min_share=K.INFER_MIN_SHARE) -> None:
+        super(SchemaInferrer, self).__init__()
+        self._sketch_size = sketch_size
+        self._max_shapes = max_shapes
+        self._min_share = min_share
+        self._shapes = {}
+        self._other = 0
+        self._total = 0
+
+    def add(self, path) -> None:
+        anchor, shape, values = split_path(path)
+        if not values:
+            return
+        self._total += 1
+        stats = self._shapes.get((anchor, shape))
+        if stats is None:
+            if len(self._shapes) >= self._max_shapes:
+                self._other += 1
+                return
+            stats = ShapeStats(anchor, shape, self._sketch_size)
+            self._shapes[(anchor, shape)] = stats
+        stats.add(values)
+
+    def add_many(self, paths) -> None:
+        for path in paths:
+            self.add(path)
+
+    def _alignment(self, base, stats) -> tuple:
+        """Return the best way to remove the extra positions of a shape.
+
+        Returns:
+            tuple: (positions, sketches, is_shared), positions are (base
+                index, delimeter) pairs. None if removing no combination of
+                positions gives the base shape.
+        """
+        extra = len(stats.sketches) - len(base.sketches)
+        equal_pairs = set(stats.equal_pairs or [])
+        best = None
+        for indices in itertools.combinations(range(len(stats.sketches)), extra):
+            shape = stats.shape
+            delimeters = []
+            for index in reversed(indices):
+                removed = remove_position(shape, index)
+                if removed is None:
+                    break
+                shape = removed[0]
+                delimeters.insert(0, removed[1])
+            if shape != base.shape or len(delimeters) != extra:
+                continue
+            # Positions of the base that always repeat a value should repeat
+            # it in this shape as well, then values should look alike.
+            kept = [index for index in range(len(stats.sketches)) if index not in indices]
+            score = sum((kept[a], kept[b]) in equal_pairs for a, b in base.equal_pairs or [])
+            score += sum(sketch.similarity(stats.sketches[index]) for sketch, index in zip(base.sketches, kept))
+            if best is None or score > best[0]:
+                best = (score, indices, tuple(delimeters))
+        if best is None:
+            return None
+        _, indices, delimeters = best
+        positions = tuple((index - offset, delimeter)
+                          for offset, (index, delimeter) in enumerate(zip(indices, delimeters)))
+        is_shared = all(pair in (stats.equal_pairs or []) for pair in itertools.combinations(indices, 2))
+        return positions, tuple(stats.sketches[index] for index in indices), is_shared
+
+    def _optionals(self, base) -> list:
+        """Return the optional tokens of shapes with a few positions more."""
+        candidates = {}
+        for stats in self._shapes.values():
+            extra = len(stats.sketches) - len(base.sketches)
+            if stats.anchor != base.anchor or not 0 < extra <= MAX_OPTIONAL_POSITIONS:
+                continue
+            if stats.count < self._min_share * self._total:
+                continue
+            alignment = self._alignment(base, stats)
+            if alignment is None:
+                continue
+            positions, sketches, is_shared = alignment
+            count = candidates[positions].count if positions in candidates else 0
+            candidates[positions] = Optional(positions, sketches, is_shared, count + stats.count)
+
+        # Shapes with several optionals also count for each single one.
+        for optional in list(candidates.values()):
+            for other in candidates.values():
+                if other is not optional and set(optional.positions) < set(other.positions):
+                    candidates[optional.positions] = optional = optional._replace(count=optional.count + other.count)
+
+        # SchemaManager allows one optional token per delimeted group.
+        optionals = []
+        groups = set()
+        base_positions = shape_positions(base.shape)
+        for optional in sorted(candidates.values(), key=lambda item: -item.count):
+            optional_groups = set()
+            for index, delimeter in optional.positions:
+                if delimeter == K.DELIMETERS[0]:
+                    optional_groups.add(('level', index))
+                else:
+                    level = base_positions[index - 1][0]
+                    field = index - base_positions.index((level, K.DELIMETERS[0]))
+                    optional_groups.add((level, base.shape[level][:field].count(K.DELIMETERS[2])))
+            if len(optional_groups) == len(optional.positions) and not optional_groups & groups:
+                groups |= optional_groups
+                optionals.append(optional)
+            if len(optionals) == MAX_OPTIONALS:
+                break
+        return optionals
+
+    def _fields(self, base, optionals) -> list:
+        positions = shape_positions(base.shape)
+        last = len(positions) - 1
+
+        # Positions that always had the same value share a key.
+        roots = list(range(len(positions)))
+
+        def root(index):
+            while roots[index] != index:
+                index = roots[index]
+            return index
+
+        for a, b in base.equal_pairs or []:
+            if not (base.sketches[a].is_constant or base.sketches[b].is_constant):
+                roots[root(b)] = root(a)
+
+        names = {}
+        counter = itertools.count(1)
+        fields = []
+        for index, ((level, delimeter), sketch) in enumerate(zip(positions, base.sketches)):
+            # The extension is a token even if every path has the same one.
+            is_extension = index == last and delimeter == K.DELIMETERS[2] and sketch.kind == 'word'
+            if sketch.is_constant and re.match(K.TOKEN_KEY_MATCH, sketch.constant) and not is_extension:
+                fields.append(Field(delimeter, sketch.constant, True, False, False, None))
+                continue
+            kind = sketch.kind
+            group = root(index)
+            if group not in names:
+                if is_extension:
+                    names[group] = ('extension', True, None)
+                elif index == last - 1 and delimeter == K.DELIMETERS[2] and kind in ('padding', 'digits'):
+                    names[group] = ('padding', True, None)
+                elif kind.startswith('version:'):
+                    names[group] = ('version', False, kind.split(':', 1)[1])
+                else:
+                    names[group] = (f"token{next(counter)}", False, None)
+            key, is_hidden, syntax = names[group]
+            fields.append(Field(delimeter, key, False, is_hidden, False, syntax))
+
+        inserts = []
+        for optional in optionals:
+            key = f"token{next(counter)}" if optional.is_shared else None
+            for (index, delimeter), sketch in zip(optional.positions, optional.sketches):
+                if delimeter == K.DELIMETERS[2] and sketch.kind == 'padding':
+                    field = Field(delimeter, 'padding', False, True, True, None)
+                else:
+                    field = Field(delimeter, key or f"token{next(counter)}", False, False, True, None)
+                inserts.append((index, field))
+        for index, field in sorted(inserts, key=insert_order):
+            fields.insert(index, field)
+        return fields
+
+    def _covered(self, base, optionals) -> int:
+        """Return the number of paths whose shape the base and optionals express."""
+        expressible = set()
+        for size in range(len(optionals) + 1):
+            for subset in itertools.combinations(optionals, size):
+                shape = base.shape
+                positions = [position for optional in subset for position in optional.positions]
+                for index, delimeter in sorted(positions, key=insert_order):
+                    shape = insert_position(shape, index, delimeter)
+                expressible.add(shape)
+        return sum(stats.count for stats in self._shapes.values()
+                   if stats.anchor == base.anchor and stats.shape in expressible)
+
+    def infer(self) -> Inference:
+        """Return the proposed schema and its coverage of the paths seen.
+
+        Optionals are positions a shape has on top of the base shape, so an
+        optional token in most paths is only found from the shape without
+        it. Every frequent shape is tried as the base, the one covering the
+        most paths wins.
+        """
+        if not self._shapes:
+            return Inference('', self._total, 0, 0, 0, self._other, ())
+        most_common = max(self._shapes.values(), key=lambda stats: stats.count)
+        best = None
+        for base in self._shapes.values():
+            if base is not most_common and base.count < self._min_share * self._total:
+                continue
+            optionals = self._optionals(base)
+            covered = self._covered(base, optionals)
+            if best is None or (covered, base.count) > (best[0], best[1].count):
+                best = (covered, base, optionals)
+        covered, base, optionals = best
+        fields = self._fields(base, optionals)
+        schema_str = base.anchor + ''.join(field_str(field) for field in fields)
+        return Inference(schema_str, self._total, base.count, covered, len(self._shapes),
+                         self._other, tuple(optionals))
+
+
+def insert_order(item) -> tuple:
+    # Insert from the end so earlier indices stay valid. At the same index
+    # a new level goes first, so a value inserted there ends the level before.
+    index, value = item
+    delimeter = value.delimeter if isinstance(value, Field) else value
+    return (-index, delimeter != K.DELIMETERS[0])
+
+
+def field_str(field) -> str:
+    if field.is_constant:
+        if field.delimeter == K.DELIMETERS[0]:
+            return f"{field.delimeter}{field.value}"
+        return f"{{{field.delimeter}{field.value}}}"
+    token_str = K.OPTIONAL_CHAR if field.is_optional else ''
+    token_str += field.delimeter
+    token_str += K.HIDDEN_CHAR if field.is_hidden else K.EDITABLE_CHAR
+    token_str += field.value
+    if field.syntax:
+        token_str += f"[{field.syntax}]"
+    return f"{{{token_str}}}"
+
+
+def verify(schema_str, paths) -> tuple:
+    """Return how many of paths the schema parses and how many there are."""
+    schema_manager = SchemaManager(path_str=schema_str)
+    parsed = total = 0
+    for path in paths:
+        total += 1
+        try:
+            schema_manager.dict_from_path(path_str=path)
+            parsed += 1
+        except (KeyError, ValueError, IndexError):
+            pass
+    return parsed, total
+
+
+def report_string(inference, verified=None) -> str:
+    def share(count):
+        return f"{count} ({100.0 * count / inference.total:.1f}%)" if inference.total else '0'
+
+    report = f"SCHEMA: {inference.schema_str}\n\n\
+paths={inference.total} shapes={inference.shapes} untracked={share(inference.other)}\n\
+base shape={share(inference.base_count)}\n\
+covered shapes={share(inference.covered)}\n\
+optional tokens={len(inference.optionals)}\n"
+    if verified is not None:
+        report += f"parsed={share(verified[0])}\n"
+    return report
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('source', help="path list file, directory or '-' for stdin")
+    parser.add_argument('--verify', action='store_true',
+                        help='read the source again and parse it with the proposed schema')
+    parser.add_argument('--sketch-size', type=int, default=K.INFER_SKETCH_SIZE)
+    parser.add_argument('--max-shapes', type=int, default=K.INFER_MAX_SHAPES)
+    parser.add_argument('--min-share', type=float, default=K.INFER_MIN_SHARE)
+    args = parser.parse_args(argv)
+
+    if args.source == '-':
+        paths = (line.strip() for line in sys.stdin if line.strip())
+    else:
+        paths = validation.iter_sample(args.source)
+    inferrer = SchemaInferrer(args.sketch_size, args.max_shapes, args.min_share)
+    inferrer.add_many(paths)
+    inference = inferrer.infer()
+
+    verified = None
+    if args.verify and args.source != '-':
+        verified = verify(inference.schema_str, validation.iter_sample(args.source))
+    print(report_string(inference, verified))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
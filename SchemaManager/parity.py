@@ -0,0 +1,297 @@
+"""Compare the AssetManager and SchemaManager schema engines.
+
+Both engines parse and format the same generated path corpus. Every
+behavioural divergence is reported, with the paths per second and peak
+memory of each engine, so one engine can replace the other without
+regressions.
+
+Usage:
+    python parity.py --count 10000 --seed 0 --json parity.json
+"""
+
+# Import third party modules
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import time
+import tracemalloc
+from collections import namedtuple
+
+# The AssetManager package lives next to this directory.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Import internal modules
+from AssetManager import schema as asset_manager_schema
+from schema import SchemaManager
+
+SCHEMA_DEFAULT = '//jobs.local/sharename/shows\
+{/@show}{/@episode}{/@sequence}{/@shot}/{#product}{/@role}{/@task}\
+{/@show}{_@episode}{_@sequence}{_@shot}{_@role}{_@task}{_@asset}{?_@variant}{_@version[v3]}{_@resolution}\
+{/@show}{_@episode}{_@sequence}{_@shot}{_@role}{_@task}{_@asset}{?_@variant}{_@version[v3]}{_@resolution}{?.#padding}{.#extension}'
+
+# Values generated for keys that need a specific kind of value.
+KEY_VALUES = {'padding': ['%04d'],
+              'extension': ['exr', 'dpx', 'mov', 'png'],
+              'resolution': ['1080p', '2k', '4k']}
+VALUE_CHARS = 'abcdefghijklmnopqrstuvwxyz0123456789'
+MUTATIONS = ('delimiter', 'truncate', 'repeat', 'version')
+EXAMPLES_PER_KIND = 5
+
+# A generated path, mutation is None for paths of valid token dicts.
+CorpusItem = namedtuple('CorpusItem', ['path', 'token_dict', 'mutation'])
+
+
+def asset_manager_schema_str(schema_str) -> str:
+    """Translate a SchemaManager schema to the AssetManager syntax.
+
+    Directory delimiters move outside the braces, optional tokens use '*'
+    instead of '?' and version syntax is dropped, AssetManager versions are
+    plain strings.
+
+    Example:
+        >>> asset_manager_schema_str('//jobs{/@show}{?_@variant}{_@version[v3]}')
+        '//jobs/{@show}{*_@variant}{_@version}'
+    """
+    def translate(match):
+        body = re.sub(r'\[[^\]]*\]$', '', match.group(1))
+        optional = body.startswith('?')
+        body = body.lstrip('?')
+        directory = body.startswith('/')
+        body = body.lstrip('/')
+        if optional:
+            body = '*' + body
+        return ('/' if directory else '') + '{' + body + '}'
+    return re.sub(r'\{(.*?)\}', translate, schema_str.replace('\\', '/'))
+
+
+class Engines():
+    """Both engines set up with the same schema."""
+    def __init__(self, schema_str) -> None:
+        super(Engines, self).__init__()
+        self.schema_str = schema_str
+        self.asset_manager_str = asset_manager_schema_str(schema_str)
+        self.schema_manager = SchemaManager(path_str=schema_str)
+        self.variable_tokens = {}
+        for token in self.schema_manager.token_list_flattened:
+            if not token.is_constant:
+                self.variable_tokens.setdefault(token.key, token)
+
+    def asset_manager(self) -> asset_manager_schema.Schema:
+        # A new schema per run, so the parse cache starts empty.
+        return asset_manager_schema.Schema(self.asset_manager_str)
+
+    def normalize_schema_manager(self, token_dict) -> dict:
+        normalized = {}
+        for key, token in self.variable_tokens.items():
+            value = token_dict.get(key)
+            if value is None:
+                continue
+            if token.is_version and isinstance(value, int):
+                value = token.format_version(value)
+            normalized[key] = str(value)
+        return normalized
+
+    def normalize_asset_manager(self, tokens) -> dict:
+        return {key: str(tokens[key]) for key in self.variable_tokens
+                if tokens.get(key) not in (None, '')}
+
+    def parse_schema_manager(self, path):
+        try:
+            return self.normalize_schema_manager(self.schema_manager.dict_from_path(path_str=path))
+        except (KeyError, ValueError, IndexError) as error:
+            return type(error).__name__
+
+    def parse_asset_manager(self, path, schema_obj):
+        record = schema_obj.tokenRecord(path)
+        if not record.isValid:
+            return 'invalid'
+        return self.normalize_asset_manager(record.tokens)
+
+
+def random_value(rng, token) -> object:
+    if token.is_version:
+        return rng.randint(1, 999)
+    if token.key in KEY_VALUES:
+        return rng.choice(KEY_VALUES[token.key])
+    return ''.join(rng.choice(VALUE_CHARS) for _ in range(rng.randint(2, 6)))
+
+
+def random_token_dict(rng, engines) -> dict:
+    token_dict = {}
+    for key, token in engines.variable_tokens.items():
+        if token.is_optional and rng.random() < 0.5:
+            continue
+        token_dict[key] = random_value(rng, token)
+    return token_dict
+
+
+def mutate(rng, engines, path, token_dict, mutation) -> str:
+    """Return a path that one or both engines should reject."""
+    match mutation:
+        case 'delimiter':
+            key = rng.choice([key for key in token_dict if not engines.variable_tokens[key].is_version])
+            value = re.escape(str(token_dict[key]))
+            return re.sub(rf'(?<=[/_.]){value}(?=[/_.]|$)', r'\g<0>_x', path, count=1)
+        case 'truncate':
+            return path.rsplit('/', 1)[0]
+        case 'repeat':
+            # Directory levels of one token dict, file name of another.
+            other = dict(token_dict)
+            key = rng.choice(list(other))
+            other[key] = random_value(rng, engines.variable_tokens[key])
+            other_path = engines.schema_manager.path_from_dict(token_dict=other)
+            return path.rsplit('/', 1)[0] + '/' + other_path.rsplit('/', 1)[1]
+        case 'version':
+            return re.sub(r'(\D)(\d+)(?=\D*$)', r'\1x\2', path, count=1)
+    return path
+
+
+def generate_corpus(engines, count, seed=0, invalid_ratio=0.2) -> list:
+    """Return count paths, invalid_ratio of them mutated."""
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(count):
+        token_dict = random_token_dict(rng, engines)
+        path = engines.schema_manager.path_from_dict(token_dict=token_dict)
+        mutation = None
+        if rng.random() < invalid_ratio:
+            mutation = rng.choice(MUTATIONS)
+            path = mutate(rng, engines, path, token_dict, mutation)
+        corpus.append(CorpusItem(path, token_dict, mutation))
+    return corpus
+
+
+def find_divergences(engines, corpus) -> dict:
+    """Parse and format the corpus with both engines and diff the results.
+
+    Returns:
+        dict: kind of divergence to {'count': int, 'examples': list}.
+    """
+    divergences = {}
+
+    def add(kind, example):
+        divergence = divergences.setdefault(kind, {'count': 0, 'examples': []})
+        divergence['count'] += 1
+        if len(divergence['examples']) < EXAMPLES_PER_KIND:
+            divergence['examples'].append(example)
+
+    schema_obj = engines.asset_manager()
+    for item in corpus:
+        schema_manager_result = engines.parse_schema_manager(item.path)
+        asset_manager_result = engines.parse_asset_manager(item.path, schema_obj)
+        schema_manager_valid = isinstance(schema_manager_result, dict)
+        asset_manager_valid = isinstance(asset_manager_result, dict)
+        example = {'path': item.path, 'mutation': item.mutation,
+                   'schema_manager': schema_manager_result,
+                   'asset_manager': asset_manager_result}
+        if schema_manager_valid != asset_manager_valid:
+            add('only_schema_manager_parses' if schema_manager_valid else 'only_asset_manager_parses', example)
+        elif schema_manager_valid and schema_manager_result != asset_manager_result:
+            add('parse_values', example)
+
+        if item.mutation is None:
+            formatted = engines.normalize_schema_manager(item.token_dict)
+            asset_manager_path = schema_obj.tokensToFilePath(formatted)
+            if asset_manager_path != item.path:
+                add('format', {'token_dict': formatted, 'schema_manager': item.path,
+                               'asset_manager': asset_manager_path})
+    return divergences
+
+
+def measure(function, items) -> dict:
+    """Return the paths per second and peak memory of a function over items.
+
+    Time and memory are measured in separate runs, tracing allocations
+    slows the function down.
+    """
+    start = time.perf_counter()
+    function(items)
+    seconds = time.perf_counter() - start
+    tracemalloc.start()
+    try:
+        function(items)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {'paths_per_second': round(len(items) / seconds) if seconds else None,
+            'peak_memory_bytes': peak}
+
+
+def benchmark(engines, corpus) -> dict:
+    paths = [item.path for item in corpus]
+    token_dicts = [engines.normalize_schema_manager(item.token_dict) for item in corpus
+                   if item.mutation is None]
+
+    def schema_manager_parse(paths):
+        for path in paths:
+            engines.parse_schema_manager(path)
+
+    def asset_manager_parse(paths):
+        schema_obj = engines.asset_manager()
+        for path in paths:
+            schema_obj.tokenRecord(path)
+
+    def schema_manager_format(token_dicts):
+        for token_dict in token_dicts:
+            engines.schema_manager.path_from_dict(token_dict=token_dict)
+
+    def asset_manager_format(token_dicts):
+        engines.asset_manager().renderMany(token_dicts)
+
+    return {'parse': {'schema_manager': measure(schema_manager_parse, paths),
+                      'asset_manager': measure(asset_manager_parse, paths)},
+            'format': {'schema_manager': measure(schema_manager_format, token_dicts),
+                       'asset_manager': measure(asset_manager_format, token_dicts)}}
+
+
+def run(schema_str=SCHEMA_DEFAULT, count=10000, seed=0, invalid_ratio=0.2) -> dict:
+    engines = Engines(schema_str)
+    corpus = generate_corpus(engines, count, seed=seed, invalid_ratio=invalid_ratio)
+    return {'schema_manager_schema': engines.schema_str,
+            'asset_manager_schema': engines.asset_manager_str,
+            'count': count,
+            'seed': seed,
+            'timestamp': time.time(),
+            'divergences': find_divergences(engines, corpus),
+            'performance': benchmark(engines, corpus)}
+
+
+def print_report(report) -> None:
+    print(f"SchemaManager schema: {report['schema_manager_schema']}")
+    print(f"AssetManager schema:  {report['asset_manager_schema']}")
+    print(f"{report['count']} paths, seed {report['seed']}\n")
+    if not report['divergences']:
+        print('No divergences')
+    for kind, divergence in sorted(report['divergences'].items()):
+        print(f"{kind}: {divergence['count']}")
+        for example in divergence['examples']:
+            print(f"    {example}")
+    print()
+    for operation, engines in report['performance'].items():
+        for engine, result in engines.items():
+            print(f"{operation:<7}{engine:<16}{result['paths_per_second']:>10} paths/s"
+                  f"{result['peak_memory_bytes'] / 1024:>12.1f} KiB peak")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--schema', default=SCHEMA_DEFAULT, help='SchemaManager schema string')
+    parser.add_argument('--count', type=int, default=10000, help='number of generated paths')
+    parser.add_argument('--seed', type=int, default=0, help='corpus random seed')
+    parser.add_argument('--invalid-ratio', type=float, default=0.2, help='share of mutated paths')
+    parser.add_argument('--json', help='append the report as a line to this file')
+    args = parser.parse_args(argv)
+
+    report = run(args.schema, args.count, args.seed, args.invalid_ratio)
+    print_report(report)
+    if args.json:
+        with open(args.json, 'a') as json_file:
+            json_file.write(json.dumps(report) + '\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,295 @@
+"""Resolve asset urls to token dicts through a database backend.
+
+Backends are looked up by the scheme of the database url a SchemaManager is
+given, i.e. 'sqlite:////jobs/assets.db' for the database file
+'/jobs/assets.db' or 'sqlite:///assets.db' for 'assets.db' in the working
+directory, as in SQLAlchemy. The SQLite backend is a local
+stand-in for a production asset database.
+"""
+
+# Import third party modules
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import quote, unquote, urlsplit
+
+# Import internal modules
+import constants as K
+
+
+class ResolverUnavailable(ConnectionError):
+    """The resolver's database can't be reached."""
+
+
+class ResolverBackend():
+    """Base class of resolver backends.
+
+    Backends only need to answer batches, so resolving many urls is a
+    single round trip to the database.
+    """
+    def __init__(self, url_str='') -> None:
+        super(ResolverBackend, self).__init__()
+        self._url_str = url_str
+
+    @property
+    def url(self) -> str:
+        return self._url_str
+
+    def resolve_many(self, urls) -> dict:
+        """Return the token dicts of urls.
+
+        Returns:
+            dict: url to token dict, urls the database doesn't know are left
+                out.
+
+        Raises:
+            ResolverUnavailable: The database can't be reached.
+        """
+        raise NotImplementedError
+
+    def urls_many(self, token_dicts) -> dict:
+        """Return the urls of token dicts.
+
+        Returns:
+            dict: canonical string of a token dict, see canonical_tokens, to
+                url. Token dicts the database doesn't know are left out.
+
+        Raises:
+            ResolverUnavailable: The database can't be reached.
+        """
+        raise NotImplementedError
+
+    def register_many(self, items) -> None:
+        """Store (url, token dict) pairs.
+
+        Raises:
+            ResolverUnavailable: The database can't be reached.
+        """
+        raise NotImplementedError
+
+
+def sqlite_path(url_str) -> str:
+    """Return the database file of a sqlite url, ':memory:' if it has none.
+
+    The path follows the scheme's '//' and a third '/', as in SQLAlchemy: it
+    is relative to the working directory unless it starts with a fourth '/'.
+
+    Example:
+        >>> sqlite_path('sqlite:////jobs/assets.db')
+        '/jobs/assets.db'
+        >>> sqlite_path('sqlite:///jobs/assets.db')
+        'jobs/assets.db'
+    """
+    path = unquote(urlsplit(url_str).path)[1:]
+    return path or ':memory:'
+
+
+class SQLiteBackend(ResolverBackend):
+    """Resolver backend storing urls and token dicts in a SQLite file.
+
+    Example:
+        >>> backend = SQLiteBackend('sqlite:////jobs/assets.db', create=True)
+        >>> backend.register_many([('ams://rrr/1234/bg', {'show': 'rrr', 'shot': 1234})])
+    """
+    def __init__(self, url_str='', create=False) -> None:
+        super(SQLiteBackend, self).__init__(url_str=url_str)
+        self._db_path = sqlite_path(url_str)
+        self._create = create
+        self._connection = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            mode = 'rwc' if self._create else 'rw'
+            # '?' and '#' in the path would end it in the uri.
+            db_uri = self._db_path if self._db_path == ':memory:' else quote(self._db_path, safe='/:')
+            try:
+                connection = sqlite3.connect(f"file:{db_uri}?mode={mode}",
+                                             uri=True, check_same_thread=False)
+                connection.execute('CREATE TABLE IF NOT EXISTS assets '
+                                   '(url TEXT PRIMARY KEY, tokens TEXT UNIQUE NOT NULL)')
+            except sqlite3.Error as error:
+                raise ResolverUnavailable (f"Unable to open resolver database: {self._url_str}") from error
+            self._connection = connection
+        return self._connection
+
+    def _execute(self, query, parameters=()) -> list:
+        with self._lock:
+            try:
+                connection = self._connect()
+                with connection:
+                    return connection.execute(query, parameters).fetchall()
+            except sqlite3.Error as error:
+                self._connection = None
+                raise ResolverUnavailable (f"Resolver database query failed: {error}") from error
+
+    def resolve_many(self, urls) -> dict:
+        rows = self._execute('SELECT url, tokens FROM assets '
+                             'WHERE url IN (SELECT value FROM json_each(?))',
+                             (json.dumps(list(urls)),))
+        return {url: json.loads(tokens) for url, tokens in rows}
+
+    def urls_many(self, token_dicts) -> dict:
+        rows = self._execute('SELECT tokens, url FROM assets '
+                             'WHERE tokens IN (SELECT value FROM json_each(?))',
+                             (json.dumps([canonical_tokens(token_dict) for token_dict in token_dicts]),))
+        return dict(rows)
+
+    def register_many(self, items) -> None:
+        rows = [(url, canonical_tokens(token_dict)) for url, token_dict in items]
+        with self._lock:
+            try:
+                connection = self._connect()
+                with connection:
+                    connection.executemany('INSERT OR REPLACE INTO assets (url, tokens) VALUES (?, ?)', rows)
+            except sqlite3.Error as error:
+                self._connection = None
+                raise ResolverUnavailable (f"Resolver database write failed: {error}") from error
+
+
+# Backend class by database url scheme, see register_backend.
+BACKENDS = {'sqlite': SQLiteBackend}
+
+
+def register_backend(scheme, backend_class) -> None:
+    BACKENDS[scheme] = backend_class
+
+
+def backend_from_url(url_str) -> ResolverBackend:
+    """Return a backend for a database url, None for an empty url.
+
+    Raises:
+        ValueError: No backend is registered for the url's scheme.
+    """
+    if not url_str:
+        return None
+    scheme = urlsplit(url_str).scheme
+    if scheme not in BACKENDS:
+        raise ValueError (f"No resolver backend for scheme '{scheme}' in url: {url_str}")
+    return BACKENDS[scheme](url_str)
+
+
+def canonical_tokens(token_dict) -> str:
+    # Equal token dicts have the same string whatever their key order.
+    return json.dumps(token_dict, sort_keys=True, separators=(',', ':'))
+
+
+class TTLCache():
+    """Bounded least recently used cache whose entries expire.
+
+    Known misses are cached as None with their own, usually shorter, time to
+    live so urls that don't resolve aren't looked up on every call.
+    """
+    MISSING = object()
+
+    def __init__(self, max_size=K.RESOLVER_CACHE_SIZE, ttl=K.RESOLVER_CACHE_TTL,
+                 negative_ttl=K.RESOLVER_NEGATIVE_TTL) -> None:
+        super(TTLCache, self).__init__()
+        self._max_size = max_size
+        self._ttl = ttl
+        self._negative_ttl = negative_ttl
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get(self, key):
+        """Return the cached value, None for a known miss, MISSING if the
+        key isn't cached or has expired."""
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return self.MISSING
+            expires, value = item
+            if expires < time.monotonic():
+                del self._items[key]
+                return self.MISSING
+            self._items.move_to_end(key)
+            return value
+
+    def set(self, key, value) -> None:
+        ttl = self._negative_ttl if value is None else self._ttl
+        with self._lock:
+            self._items[key] = (time.monotonic() + ttl, value)
+            self._items.move_to_end(key)
+            while len(self._items) > self._max_size:
+                self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+
+class Resolver():
+    """Cached, batched url resolution through a backend.
+
+    Example:
+        >>> resolver = Resolver(backend_from_url('sqlite:////jobs/assets.db'))
+        >>> resolver.resolve_many(['ams://rrr/1234/bg', 'ams://rrr/1234/fg'])
+        [{'show': 'rrr', 'shot': 1234, ...}, None]
+    """
+    def __init__(self, backend, cache=None) -> None:
+        super(Resolver, self).__init__()
+        self._backend = backend
+        self._cache = cache if cache is not None else TTLCache()
+
+    @property
+    def backend(self) -> ResolverBackend:
+        return self._backend
+
+    @property
+    def cache(self) -> TTLCache:
+        return self._cache
+
+    def _cached_many(self, keys, fetch) -> list:
+        # Look up keys in the cache, fetch every miss in one backend call.
+        values = [self._cache.get(key) for key in keys]
+        misses = list(dict.fromkeys(key[1] for key, value in zip(keys, values)
+                                    if value is TTLCache.MISSING))
+        if misses:
+            fetched = fetch(misses)
+            kind = keys[0][0]
+            for miss in misses:
+                self._cache.set((kind, miss), fetched.get(miss))
+            values = [fetched.get(key[1]) if value is TTLCache.MISSING else value
+                      for key, value in zip(keys, values)]
+        return values
+
+    def resolve_many(self, urls) -> list:
+        """Return the token dict of every url, None for unknown urls.
+
+        Raises:
+            ResolverUnavailable: Some urls aren't cached and the database
+                can't be reached.
+        """
+        urls = list(urls)
+        if not urls:
+            return []
+        values = self._cached_many([('url', url) for url in urls], self._backend.resolve_many)
+        return [dict(value) if value is not None else None for value in values]
+
+    def urls_many(self, token_dicts) -> list:
+        """Return the url of every token dict, None for unknown token dicts.
+
+        Raises:
+            ResolverUnavailable: Some token dicts aren't cached and the
+                database can't be reached.
+        """
+        canonicals = [canonical_tokens(token_dict) for token_dict in token_dicts]
+        if not canonicals:
+            return []
+
+        def fetch(misses):
+            return self._backend.urls_many([json.loads(miss) for miss in misses])
+
+        return self._cached_many([('tokens', canonical) for canonical in canonicals], fetch)
+
+    def register_many(self, items) -> None:
+        items = list(items)
+        self._backend.register_many(items)
+        for url, token_dict in items:
+            self._cache.set(('url', url), dict(token_dict))
+            self._cache.set(('tokens', canonical_tokens(token_dict)), url)
@@ -4,24 +4,62 @@
 import logging
 import sys
 import re
+import weakref
+from collections import namedtuple
+from types import MappingProxyType
 from pathlib import PureWindowsPath #Path, PurePosixPath, PosixPath,
 
 # Import internal modules
 import constants as K
+import resolver as R
 
 class Token():
-    def __init__(self, token_str='') -> None:
-        self._key = None
-        self._value = None
-        self._delimeter = None
-        self._is_optional = False
-        self._is_constant = False
-        self._is_hidden = False
-        self._is_version = False
-        self._version_syntax = None
-        self._is_valid = False
-        self._validate(token_str=token_str)
-        self._is_valid = True
+    """Immutable, interned schema token.
+
+    Tokens are value objects: constructing a token that is equal to an
+    existing one returns the existing object, so every distinct token
+    exists once per process and tokens can be compared by identity.
+
+    Example:
+        >>> Token('_@shot') is Token('_@shot')
+        True
+    """
+    __slots__ = ('_key', '_delimeter', '_is_optional', '_is_constant',
+                 '_is_hidden', '_is_version', '_version_syntax',
+                 '_version_prefix', '_version_width', '_dict', '__weakref__')
+
+    # Every live token by its fields, tokens no schema uses are dropped.
+    _registry = weakref.WeakValueDictionary()
+
+    def __new__(cls, token_str=''):
+        fields = cls._validate(token_str=token_str)
+        token = cls._registry.get(fields)
+        if token is None:
+            token = super(Token, cls).__new__(cls)
+            for name, field in zip(cls.__slots__, fields):
+                object.__setattr__(token, name, field)
+            token_dict = {'key': token._key,
+                          'value': token.value,
+                          'delimeter': token._delimeter,
+                          'is_optional': token._is_optional,
+                          'is_constant': token._is_constant,
+                          'is_hidden': token._is_hidden,
+                          'is_version': token._is_version,
+                          'version_syntax': token._version_syntax}
+            object.__setattr__(token, '_dict', MappingProxyType(token_dict))
+            # Another thread may have registered the same token meanwhile.
+            token = cls._registry.setdefault(fields, token)
+        return token
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"Token is immutable, can't set '{name}'")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"Token is immutable, can't delete '{name}'")
+
+    def __reduce__(self):
+        # Copies and unpickled tokens resolve to the interned token.
+        return (Token, (self.token_str,))
 
     def __str__(self) -> str:
         return (self._short_description)
@@ -53,6 +91,21 @@ class Token():
         #return f"schema.Token object; {self._short_description}"
         return f"Token='{self._short_description}'"
 
+    @property
+    def token_str(self) -> str:
+        """str: Token string that constructs this token."""
+        string = self._delimeter or ''
+        if self._is_hidden:
+            string += K.HIDDEN_CHAR
+        elif not self._is_constant:
+            string += K.EDITABLE_CHAR
+        string += self._key
+        if self._is_optional:
+            string += K.OPTIONAL_CHAR
+        if self._is_version:
+            string += f"[{self._version_syntax}]"
+        return string
+
     @property
     def key(self):
         return self._key
@@ -61,7 +114,7 @@ class Token():
     def value(self):
         if self._is_constant:
             return self.key
-        return self._value
+        return None
 
     @property
     def delimeter(self):
@@ -85,24 +138,46 @@ class Token():
     
     @property
     def is_valid(self):
-        return self._is_valid
+        # Invalid token strings raise, every token that exists is valid.
+        return True
 
     @property
     def is_version(self):
         return self._is_version
 
     @property
-    def dict(self) -> dict:
-        token_dict = {}
-        token_dict['key'] = self._key
-        token_dict['value'] = self._value
-        token_dict['delimeter'] = self._delimeter
-        token_dict['is_optional'] = self._is_optional
-        token_dict['is_constant'] = self._is_constant
-        token_dict['is_hidden'] = self._is_hidden
-        token_dict['is_version'] = self._is_version
-        token_dict['version_syntax'] = self._version_syntax
-        return token_dict
+    def version_syntax(self):
+        return self._version_syntax
+
+    def parse_version(self, value_str) -> int:
+        """Parse a version value written in the token's version syntax.
+
+        Example:
+            >>> Token('_@version[v3]').parse_version('v012')
+            12
+
+        Raises:
+            ValueError: value_str doesn't follow the version syntax.
+        """
+        number_str = value_str[len(self._version_prefix):]
+        if not value_str.startswith(self._version_prefix) or not number_str.isdigit():
+            raise ValueError (f"'{value_str}' doesn't match the version syntax \
+'{self._version_syntax}' of token key: {self._key}")
+        return int(number_str)
+
+    def format_version(self, version) -> str:
+        """Format a version number through the token's version syntax.
+
+        Example:
+            >>> Token('_@version[v3]').format_version(12)
+            'v012'
+        """
+        return f"{self._version_prefix}{int(version):0{self._version_width}d}"
+
+    @property
+    def dict(self) -> MappingProxyType:
+        """MappingProxyType: Read-only fields of the token, shared by all callers."""
+        return self._dict
     
     @property
     def path(self) -> str:
@@ -111,52 +186,191 @@ class Token():
     def path_from_str(self, value_str='') -> str:
         return self.delimeter + value_str
 
-    def _validate(self, token_str='') -> bool:
+    @staticmethod
+    def _validate(token_str='') -> tuple:
+        """Parse a token string.
+
+        Returns:
+            tuple: (key, delimeter, is_optional, is_constant, is_hidden,
+                is_version, version_syntax, version_prefix, version_width)
+                in the order of __slots__.
+        """
         hide = K.HIDDEN_CHAR
         edit = K.EDITABLE_CHAR
         option = K.OPTIONAL_CHAR
         original_str = token_str
+        delimeter = None
+        is_optional = False
+        is_constant = False
+        is_hidden = False
+        is_version = False
+        version_syntax = None
+        version_prefix = None
+        version_width = None
 
         matches = re.match(K.VERSION_MATCH_BRACES, token_str)
         if matches:
             token_str = matches.group(1)
-            self._is_version = True
-            self._version_syntax = matches.group(2)
+            is_version = True
+            version_syntax = matches.group(2)
+            syntax_matches = re.match(K.VERSION_SYNTAX_MATCH, version_syntax)
+            if not syntax_matches:
+                error_string = f"Invalid version syntax '{version_syntax}' in token string: '{original_str}'"
+                logging.critical(error_string)
+                raise Exception (error_string)
+            version_prefix = syntax_matches.group(1)
+            version_width = int(syntax_matches.group(2))
 
         if option in token_str:
             if not K.ALLOW_MULTIDELIMITED_TOKEN or '.' in token_str:
-                self._is_optional = True
+                is_optional = True
                 token_str = token_str.replace(option, '')
             else:
                 error_string = f"K.ALLOW_MULTIDELIMITED_TOKEN is set to True.\
 Failed to create a optional token from string: '{original_str}'" 
                 logging.critical(error_string)
                 raise LookupError (error_string)
-        if token_str[0] in K.DELIMETERS:
-            self._delimeter = token_str[0]
+        if token_str and token_str[0] in K.DELIMETERS:
+            delimeter = token_str[0]
             token_str = token_str[1:]
         if edit not in token_str and hide not in token_str:
-            self._is_constant = True
+            is_constant = True
         if hide in token_str:
-            self._is_hidden = True
+            is_hidden = True
             token_str = token_str.replace(hide, '')
         if edit in token_str:
             token_str = token_str.replace(edit, '')
         if token_str and re.match(K.TOKEN_KEY_MATCH, token_str):
-            self._key = token_str
-            #logging.debug('call _validate(%s)\nTOKEN: %s\n', self, self.dict)
-            return True
+            return (token_str, delimeter, is_optional, is_constant,
+                    is_hidden, is_version, version_syntax, version_prefix,
+                    version_width)
         error_string = f"Failed to create a token from string: \'{original_str}\'"
         logging.critical(error_string)
         raise Exception (error_string)
 
 
+# One K.DELIMETERS[2] delimited group of tokens in a path level.
+# tokens_without_optional is None if the group has no optional token.
+GroupPlan = namedtuple('GroupPlan', [
+    'tokens',
+    'tokens_without_optional',
+    'version_indices',
+])
+
+# Everything dict_from_path needs, built once per schema by
+# SchemaManager._validate and never modified afterwards.
+# levels_without_optional is None if the schema has no optional level.
+MatchPlan = namedtuple('MatchPlan', [
+    'anchor',
+    'levels',
+    'levels_without_optional',
+    'tokens_flattened',
+    'keys',
+    'keys_non_optional',
+])
+
+
+def lists_from_path(path_str, anchor) -> list:
+    """Split a path into values per level and delimited group.
+
+    Args:
+        path_str (str): File system path.
+        anchor (str): Anchor of the schema, removed from the path.
+
+    Returns:
+        list: per level, a list of value lists per delimited group.
+    """
+    if path_str.startswith(anchor):
+        path_str = path_str.replace(anchor, '', 1)
+    dels = K.DELIMETERS
+    path_lists = []
+    level1_list = []
+    level2_list = []
+    for left_str in path_str.split(dels[0]):
+        if left_str:
+            if dels[2] in left_str:
+                split = left_str.split(dels[2],1)
+                left_str = split[0]
+                right_str = split[1]
+                level2_list = right_str.split(dels[2])
+                level1_list.append(level2_list)
+                level2_list = []
+            level2_list = left_str.split(dels[1])
+            level1_list.insert(0, level2_list)
+            path_lists.append(level1_list)
+            level1_list = []
+            level2_list = []
+    return path_lists
+
+
+def dict_from_path(plan, path_str) -> dict:
+    """Match a path against a matching plan.
+
+    A pure function of its arguments: neither the plan nor any token is
+    modified, so one plan can be shared by any number of threads.
+
+    Args:
+        plan (MatchPlan): Matching plan of a schema, see
+            SchemaManager.match_plan.
+        path_str (str): File system path.
+
+    Returns:
+        dict: token key to value. Values of version tokens are ints, see
+            Token.parse_version.
+
+    Raises:
+        ValueError: A repeated token key has different values, a version
+            doesn't follow its version syntax, or a value contains a
+            delimeter while K.ALLOW_MULTIDELIMITED_TOKEN is False.
+        KeyError: A non optional token key has no value.
+    """
+    lists = lists_from_path(path_str, plan.anchor)
+    levels = plan.levels
+    if len(lists) != len(levels) and plan.levels_without_optional is not None:
+        levels = plan.levels_without_optional
+    token_dict = {}
+
+    for values_groups, level in zip(lists, levels):
+        for values, group in zip(values_groups, level):
+            tokens = group.tokens
+            if len(values) != len(tokens):
+                if K.ALLOW_MULTIDELIMITED_TOKEN:
+                    # Join the surplus values into the token before the version.
+                    for index in group.version_indices:
+                        values_left = values[0:index-1]
+                        values_right = values[-len(tokens)+index:]
+                        values_middle = values[index-1:-len(tokens)+index]
+                        concatenate_middle_values = K.DELIMETERS[1].join(values_middle)
+                        values = values_left + [concatenate_middle_values] + values_right
+                else:
+                    if group.tokens_without_optional is not None:
+                        tokens = group.tokens_without_optional
+                    if len(values) > len(tokens):
+                        raise ValueError ('Path contains more values than tokens, token values can\'t contain \'%s\' '
+                                          'unless K.ALLOW_MULTIDELIMITED_TOKEN is True: %s'
+                                          % (K.DELIMETERS[1], K.DELIMETERS[1].join(values)))
+            for value, token in zip(values, tokens):
+                if token.is_version:
+                    value = token.parse_version(value)
+                if token.key not in token_dict:
+                    token_dict[token.key] = value
+                elif value != token_dict[token.key]:
+                    raise ValueError ('Path contains diffent values for token key: %s' % (token.key))
+
+    if not plan.keys_non_optional.issubset(token_dict):
+        raise KeyError ('Missing keys in path. Used keys: %s\nRequired token keys: %s'
+                        % (list(token_dict), list(plan.keys_non_optional)))
+    return token_dict
+
+
 class SchemaManager():
     def __init__(self, path_str='', url_str='') -> None:
         super(SchemaManager, self).__init__()
         self._path_str = path_str
         self._url_str = url_str
+        self._resolver = None
         self._tokens_list = []
+        self._plan = None
         self._errors = []
         self._validate()
 
@@ -199,12 +413,20 @@ class SchemaManager():
     def errors(self) -> list:
         return self._errors
 
+    @property
+    def resolver(self) -> R.Resolver:
+        # Created on first use from the database url, None without one.
+        if self._resolver is None and self._url_str:
+            self._resolver = R.Resolver(R.backend_from_url(self._url_str))
+        return self._resolver
+
+    @property
+    def match_plan(self) -> MatchPlan:
+        return self._plan
+
     @property
     def keys(self) -> list:
-        key_list = []
-        for token in self.token_list_flattened:
-            key_list.append(token.key)
-        return list(set(key_list))
+        return list(self._plan.keys)
 
     @property
     def keys_editable(self) -> list:
@@ -231,13 +453,17 @@ class SchemaManager():
         return list(set(key_list))
 
     @property
-    def keys_non_optional(self) -> list:
+    def keys_version(self) -> list:
         key_list = []
         for token in self.token_list_flattened:
-            if not token.is_optional:
+            if token.is_version:
                 key_list.append(token.key)
         return list(set(key_list))
 
+    @property
+    def keys_non_optional(self) -> list:
+        return list(self._plan.keys_non_optional)
+
     @property
     def keys_non_editable(self) -> list:
         key_list = []
@@ -268,7 +494,7 @@ class SchemaManager():
 
     @property
     def token_list_flattened(self) -> list:
-        return list(self._flatten_list(self._tokens_list))
+        return list(self._plan.tokens_flattened)
 
     def _flatten_list(self, list_in):
         if isinstance(list_in, list):
@@ -297,94 +523,51 @@ class SchemaManager():
         return None
 
     def _lists_from_path(self, path_str='') -> list:
-        if path_str.startswith(self.anchor):
-            path_str = path_str.replace(self.anchor, '', 1)
-        dels = K.DELIMETERS
-        path_lists = []
-        level1_list = []
-        level2_list = []
-        for left_str in path_str.split(dels[0]):
-            if left_str:
-                if dels[2] in left_str:
-                    split = left_str.split(dels[2],1)
-                    left_str = split[0]
-                    right_str = split[1]
-                    level2_list = right_str.split(dels[2])
-                    level1_list.append(level2_list)
-                    level2_list = []
-                level2_list = left_str.split(dels[1])
-                level1_list.insert(0, level2_list)
-                path_lists.append(level1_list)
-                level1_list = []
-                level2_list = []
-        return path_lists
+        return lists_from_path(path_str, self._plan.anchor)
 
     def dict_from_path(self, path_str='') -> dict:
-        lists = self._lists_from_path(path_str=path_str)
-        tokens_list = self.tokens_list
-        available_keys = self.keys
-        used_keys = []
-        token_dict = {}
-
-        if len(lists) != len(tokens_list):
-            index = 0
-            for tokens in tokens_list:
-                first_token = tokens[0][0]
-                if first_token.delimeter == K.DELIMETERS[0]\
-                and first_token.is_optional:
-                    del tokens_list[index]
-                    break
-                index += 1
-        for list, tokens_list in zip(lists, self.tokens_list):
-            for values, tokens in zip(list, tokens_list):
-                if len(values) != len(tokens):
-                    index = 0
-                    if K.ALLOW_MULTIDELIMITED_TOKEN:
-                        for token in tokens:
-                            if token.is_version:
-                                values_left = values[0:index-1]
-                                values_right = values[-len(tokens)+index:]
-                                values_middle = values[index-1:-len(tokens)+index]
-                                concatenate_middle_values = K.DELIMETERS[1].join(values_middle)
-                                values_left.append(concatenate_middle_values)
-                                values = values_left+values_right
-                            index += 1
-                    else:
-                        for token in tokens:
-                            if token.is_optional:
-                                del tokens[index]
-                                break
-                            index += 1
-                for value, token in zip(values, tokens):
-                    if token.key in available_keys:
-                        token_dict[token.key] = value
-                        used_keys.append(token.key)
-                        available_keys.remove(token.key)
-                    else:
-                        if value != token_dict[token.key]:
-                            raise ValueError ('Path contains diffent values for token key: %s' % (token.key))
-                    #print ('VALUES:', values)
-                    #print ('TOKENS: ', tokens)
+        return dict_from_path(self._plan, path_str)
+
+    def _dict_from_path_or_none(self, path_str) -> dict:
+        try:
+            return self.dict_from_path(path_str=path_str)
+        except (KeyError, ValueError):
+            return None
+
+    def resolve_many(self, urls) -> list:
+        """Return the token dicts of many urls with one database query.
 
-        if not set(self.keys_non_optional).issubset(set(used_keys)):
-            raise KeyError ('Missing keys in path. Used keys: %s\nRequired token keys: %s'
-                            % (used_keys, (self.keys_non_optional)))
-        return token_dict
+        Urls are resolved through the database and parsed as paths of the
+        schema if the database can't be reached or there is none.
+
+        Returns:
+            list: token dict of every url, None for urls that don't resolve.
+        """
+        urls = list(urls)
+        if self.resolver is not None:
+            try:
+                return self.resolver.resolve_many(urls)
+            except R.ResolverUnavailable as error:
+                logging.warning(f"{error}, resolving {len(urls)} urls as paths")
+        return [self._dict_from_path_or_none(url) for url in urls]
 
-    def url_to_dict(self, path_str) -> list:
-        pass
+    def url_to_dict(self, path_str) -> dict:
+        return self.resolve_many([path_str])[0]
 
     def path_from_dict(self, token_dict=None) -> str:
         errors = []
         if not token_dict:
             token_dict = {}
-        path = self.anchor
-        for token in self.token_list_flattened:
+        path = self._plan.anchor
+        for token in self._plan.tokens_flattened:
             if token.is_constant:
                 path += token.path
             else:
                 if token.key in token_dict.keys():
-                    path += token.path_from_str(str(token_dict[token.key]))
+                    value = token_dict[token.key]
+                    if token.is_version and isinstance(value, int):
+                        value = token.format_version(value)
+                    path += token.path_from_str(str(value))
                 else:
                     if not token.is_optional:
                         error = f"Unable to create path from token_dict. \
@@ -397,8 +580,24 @@ Missing token.key: {token.key} in dict: {token_dict}"
             raise KeyError (str(errors))
         return path
     
+    def dicts_to_urls(self, token_dicts) -> list:
+        """Return the urls of many token dicts with one database query.
+
+        Token dicts the database doesn't know, or all of them if it can't be
+        reached, fall back to their path, see path_from_dict.
+        """
+        token_dicts = list(token_dicts)
+        urls = [None] * len(token_dicts)
+        if self.resolver is not None:
+            try:
+                urls = self.resolver.urls_many(token_dicts)
+            except R.ResolverUnavailable as error:
+                logging.warning(f"{error}, using paths of {len(token_dicts)} token dicts")
+        return [url if url is not None else self.path_from_dict(token_dict=token_dict)
+                for url, token_dict in zip(urls, token_dicts)]
+
     def dict_to_url(self, token_dict) -> str:
-        pass
+        return self.dicts_to_urls([token_dict])[0]
 
     def _pretokens_from_path(self, path='') -> list:
         """Return pre-tokens/components of a path
@@ -432,8 +631,9 @@ Missing token.key: {token.key} in dict: {token_dict}"
             if component.count('/') > 1:
                 for s in component.split('/'):
                     if s != '':
-                        prepend = True
                         filtered_components.append('/'+s)
+                # 'comp/rrr' continues the level 'rrr' with the next token.
+                prepend = component.endswith('/')
             else:
                 if component == '/':
                     prepend = True
@@ -519,8 +719,48 @@ Too many optional tokens at delimeter level: "{}"\n'
                     ,self, path_groupings)'''
         return path_groupings
 
+    def _group_plan(self, tokens) -> GroupPlan:
+        tokens = tuple(tokens)
+        tokens_without_optional = None
+        index = self.optional_token_index(tokens_list=tokens)
+        if index is not None:
+            tokens_without_optional = tokens[:index] + tokens[index+1:]
+        version_indices = tuple(index for index, token in enumerate(tokens)
+                                if token.is_version)
+        return GroupPlan(tokens, tokens_without_optional, version_indices)
+
+    def _build_plan(self, tokens_list) -> MatchPlan:
+        """Build the immutable matching plan of a grouped tokens list.
+
+        Covers the optional level, the optional token of every group and
+        the version tokens multi delimited values are joined before, so
+        dict_from_path never has to change the schema while matching.
+        """
+        levels = tuple(tuple(self._group_plan(tokens) for tokens in level)
+                       for level in tokens_list)
+        levels_without_optional = None
+        for index, level in enumerate(tokens_list):
+            first_token = level[0][0]
+            if first_token.delimeter == K.DELIMETERS[0]\
+            and first_token.is_optional:
+                levels_without_optional = levels[:index] + levels[index+1:]
+                break
+        tokens_flattened = tuple(self._flatten_list(tokens_list))
+        return MatchPlan(
+            anchor=self.anchor,
+            levels=levels,
+            levels_without_optional=levels_without_optional,
+            tokens_flattened=tokens_flattened,
+            keys=frozenset(token.key for token in tokens_flattened),
+            keys_non_optional=frozenset(token.key for token in tokens_flattened
+                                        if not token.is_optional))
+
     def _validate(self) -> None:
         self._errors = []
         components = self._pretokens_from_path(path=self.unanchored_path)
         tokens = self._tokens_from_components(components=components)
-        self._tokens_list = self._group_tokens(tokens=tokens)
\ No newline at end of file
+        tokens_list = self._group_tokens(tokens=tokens)
+        # Swap the plan in as a whole, concurrent dict_from_path calls see
+        # either the old or the new schema.
+        self._plan = self._build_plan(tokens_list)
+        self._tokens_list = tokens_list
\ No newline at end of file
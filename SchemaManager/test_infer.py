@@ -0,0 +1,76 @@
+"""Tests of schema inference from existing paths."""
+
+# Import third party modules
+import random
+import unittest
+
+# Import internal modules
+import infer
+import parity
+from schema import SchemaManager
+
+
+def paths_with_variant(count, share, seed=0) -> list:
+    # Shot paths, share of them with a variant after the asset.
+    rng = random.Random(seed)
+    paths = []
+    for _ in range(count):
+        shot = f"{rng.randint(1, 99) * 10:04d}"
+        asset = rng.choice(['bg', 'fg', 'char', 'fx'])
+        variant = f"_{rng.choice(['main', 'alt', 'fog'])}" if rng.random() < share else ''
+        version = f"v{rng.randint(1, 40):03d}"
+        paths.append(f"//jobs.local/sharename/shows/rrr/{shot}/comp/rrr_{shot}_{asset}{variant}_{version}.exr")
+    return paths
+
+
+class SchemaInferrerTest(unittest.TestCase):
+
+    def assert_covers(self, paths):
+        inferrer = infer.SchemaInferrer()
+        inferrer.add_many(paths)
+        inference = inferrer.infer()
+        self.assertEqual(inference.covered, len(paths), inference.schema_str)
+        self.assertEqual(infer.verify(inference.schema_str, paths), (len(paths), len(paths)),
+                         inference.schema_str)
+        return inference
+
+    def test_generated_corpus_is_covered(self):
+        engines = parity.Engines(parity.SCHEMA_DEFAULT)
+        for seed in (0, 5):
+            corpus = parity.generate_corpus(engines, 2000, seed=seed, invalid_ratio=0)
+            inference = self.assert_covers([item.path for item in corpus])
+            self.assertIn('{_@version[v3]}', inference.schema_str)
+            self.assertIn('{?.#padding}', inference.schema_str)
+
+    def test_optional_in_most_paths(self):
+        inference = self.assert_covers(paths_with_variant(1000, 0.9))
+        self.assertEqual(len(inference.optionals), 1)
+        self.assertLess(inference.base_count, 200)
+
+    def test_optional_in_few_paths(self):
+        inference = self.assert_covers(paths_with_variant(1000, 0.1))
+        self.assertEqual(len(inference.optionals), 1)
+
+    def test_values_are_assigned_to_their_tokens(self):
+        paths = paths_with_variant(1000, 0.9)
+        schema_manager = SchemaManager(path_str=self.assert_covers(paths).schema_str)
+        for path in paths[:50]:
+            name = path.rsplit('/', 1)[1].split('.')[0]
+            values = [value for key, value in schema_manager.dict_from_path(path_str=path).items()
+                      if key not in ('shows', 'comp', 'extension', 'version')]
+            self.assertEqual('_'.join(values), name.rsplit('_', 1)[0], path)
+
+    def test_no_paths(self):
+        inference = infer.SchemaInferrer().infer()
+        self.assertEqual((inference.schema_str, inference.total), ('', 0))
+
+
+class SplitPathTest(unittest.TestCase):
+
+    def test_split_path(self):
+        self.assertEqual(infer.split_path('/shows/foo/foo_v001.exr'),
+                         ('', ('', '', '_.'), ['shows', 'foo', 'foo', 'v001', 'exr']))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+"""Tests of the url resolver and its SQLite backend."""
+
+# Import third party modules
+import os
+import tempfile
+import unittest
+
+# Import internal modules
+import resolver as R
+from schema import SchemaManager
+
+SCHEMA_STR = '//jobs.local/sharename/shows{/@show}{/@shot}{/@asset}'
+
+
+class SQLitePathTest(unittest.TestCase):
+
+    def test_absolute_path(self):
+        self.assertEqual(R.sqlite_path('sqlite:////jobs/assets.db'), '/jobs/assets.db')
+        self.assertEqual(R.sqlite_path('sqlite:///C:/jobs/assets.db'), 'C:/jobs/assets.db')
+
+    def test_relative_path(self):
+        self.assertEqual(R.sqlite_path('sqlite:///jobs/assets.db'), 'jobs/assets.db')
+        self.assertEqual(R.sqlite_path('sqlite:///assets.db'), 'assets.db')
+
+    def test_quoted_path(self):
+        self.assertEqual(R.sqlite_path('sqlite:////jobs/my%20assets.db'), '/jobs/my assets.db')
+
+    def test_memory(self):
+        self.assertEqual(R.sqlite_path('sqlite://'), ':memory:')
+        self.assertEqual(R.sqlite_path('sqlite:///'), ':memory:')
+        self.assertEqual(R.sqlite_path('sqlite:///:memory:'), ':memory:')
+
+
+class SQLiteBackendTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.directory.name, 'assets db.sqlite').replace('\\', '/')
+        self.url_str = f"sqlite:///{self.db_path}"
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_documented_url_form(self):
+        backend = R.SQLiteBackend(f"sqlite:////{self.db_path.lstrip('/')}", create=True)
+        backend.register_many([('ams://rrr/1234/bg', {'show': 'rrr', 'shot': 1234})])
+        self.assertTrue(os.path.isfile(self.db_path))
+        self.assertEqual(backend.resolve_many(['ams://rrr/1234/bg']),
+                         {'ams://rrr/1234/bg': {'show': 'rrr', 'shot': 1234}})
+
+    def test_relative_url_form(self):
+        working_directory = os.getcwd()
+        os.chdir(self.directory.name)
+        try:
+            backend = R.SQLiteBackend('sqlite:///assets%20db.sqlite', create=True)
+            backend.register_many([('ams://rrr/1234/bg', {'show': 'rrr', 'shot': 1234})])
+        finally:
+            os.chdir(working_directory)
+        self.assertTrue(os.path.isfile(self.db_path))
+
+    def test_round_trip_through_the_file(self):
+        R.SQLiteBackend(self.url_str, create=True).register_many(
+            [('ams://rrr/1234/bg', {'show': 'rrr', 'shot': 1234, 'asset': 'bg'}),
+             ('ams://rrr/1234/fg', {'show': 'rrr', 'shot': 1234, 'asset': 'fg'})])
+        # A new connection only reads what was written to the file.
+        backend = R.backend_from_url(self.url_str)
+        self.assertEqual(backend.resolve_many(['ams://rrr/1234/fg', 'ams://unknown'])['ams://rrr/1234/fg'],
+                         {'show': 'rrr', 'shot': 1234, 'asset': 'fg'})
+        self.assertEqual(backend.urls_many([{'asset': 'bg', 'shot': 1234, 'show': 'rrr'}]),
+                         {R.canonical_tokens({'show': 'rrr', 'shot': 1234, 'asset': 'bg'}): 'ams://rrr/1234/bg'})
+
+    def test_missing_file_is_unavailable(self):
+        backend = R.backend_from_url(self.url_str)
+        with self.assertRaises(R.ResolverUnavailable):
+            backend.resolve_many(['ams://rrr/1234/bg'])
+        self.assertFalse(os.path.exists(self.db_path))
+
+    def test_unknown_scheme(self):
+        with self.assertRaises(ValueError):
+            R.backend_from_url('postgres://jobs/assets')
+
+
+class ResolverTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.url_str = f"sqlite:///{self.directory.name}/assets.db".replace('\\', '/')
+        R.SQLiteBackend(self.url_str, create=True).register_many(
+            [('ams://rrr/1234/bg', {'show': 'rrr', 'shot': '1234', 'asset': 'bg'})])
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_cached_and_negative_results(self):
+        resolver = R.Resolver(R.backend_from_url(self.url_str))
+        self.assertEqual(resolver.resolve_many(['ams://rrr/1234/bg', 'ams://unknown']),
+                         [{'show': 'rrr', 'shot': '1234', 'asset': 'bg'}, None])
+        self.directory.cleanup()
+        # Both the hit and the miss are served from the cache.
+        self.assertEqual(resolver.resolve_many(['ams://unknown', 'ams://rrr/1234/bg'])[1]['asset'], 'bg')
+
+    def test_schema_manager_uses_the_database(self):
+        schema_manager = SchemaManager(path_str=SCHEMA_STR, url_str=self.url_str)
+        self.assertEqual(schema_manager.url_to_dict('ams://rrr/1234/bg'),
+                         {'show': 'rrr', 'shot': '1234', 'asset': 'bg'})
+        self.assertEqual(schema_manager.dict_to_url({'show': 'rrr', 'shot': '1234', 'asset': 'bg'}),
+                         'ams://rrr/1234/bg')
+
+    def test_schema_manager_falls_back_to_paths(self):
+        schema_manager = SchemaManager(path_str=SCHEMA_STR, url_str=self.url_str)
+        self.assertEqual(schema_manager.dict_to_url({'show': 'rrr', 'shot': '0010', 'asset': 'fg'}),
+                         '//jobs.local/sharename/shows/rrr/0010/fg')
+
+
+if __name__ == '__main__':
+    unittest.main()
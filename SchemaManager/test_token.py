@@ -0,0 +1,91 @@
+"""Tests of interned, immutable schema tokens."""
+
+# Import third party modules
+import copy
+import gc
+import pickle
+import threading
+import unittest
+
+# Import internal modules
+from schema import Token
+
+
+class TokenInterningTest(unittest.TestCase):
+
+    def test_equal_tokens_are_the_same_object(self):
+        self.assertIs(Token('_@shot'), Token('_@shot'))
+        self.assertIs(Token('_@version[v3]'), Token('_@version[v3]'))
+        self.assertIs(Token('?_@variant'), Token('_@variant?'))
+        self.assertIsNot(Token('_@shot'), Token('/@shot'))
+        self.assertIsNot(Token('_@version[v3]'), Token('_@version[v4]'))
+
+    def test_copies_resolve_to_the_interned_token(self):
+        token = Token('_@version[v3]')
+        for other in (copy.copy(token), copy.deepcopy(token), pickle.loads(pickle.dumps(token))):
+            self.assertIs(other, token)
+
+    def test_hash_and_eq_are_consistent(self):
+        token = Token('_@asset')
+        others = [Token('_@asset'), Token(token.token_str), copy.deepcopy(token),
+                  pickle.loads(pickle.dumps(token))]
+        for other in others:
+            self.assertEqual(other, token)
+            self.assertEqual(hash(other), hash(token))
+        lookup = {token: 'asset'}
+        self.assertEqual([lookup[other] for other in others], ['asset'] * len(others))
+        self.assertNotEqual(Token('_@asset'), Token('_#asset'))
+        self.assertEqual(len({Token('_@asset'), Token('_#asset'), Token('_@asset')}), 2)
+
+    def test_token_str_round_trip(self):
+        for token_str in ('_@shot', '/#product', '.#padding?', '_@version[v3]', '/shows', '?_@variant'):
+            token = Token(token_str)
+            self.assertIs(Token(token.token_str), token)
+
+    def test_unused_tokens_are_dropped(self):
+        fields = Token._validate('_@droppedtoken')
+        token = Token('_@droppedtoken')
+        self.assertIs(Token._registry.get(fields), token)
+        del token
+        gc.collect()
+        self.assertIsNone(Token._registry.get(fields))
+
+    def test_interning_from_threads(self):
+        tokens = []
+
+        def construct():
+            tokens.extend(Token('_@thread' + 'abcdefghij'[index % 10]) for index in range(1000))
+
+        threads = [threading.Thread(target=construct) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len({id(token) for token in tokens}), 10)
+
+
+class TokenImmutabilityTest(unittest.TestCase):
+
+    def test_assigning_an_attribute_raises(self):
+        token = Token('_@shot')
+        for name in ('key', '_key', 'delimeter', 'new_attribute'):
+            with self.assertRaises(AttributeError):
+                setattr(token, name, 'x')
+        self.assertEqual(token.key, 'shot')
+
+    def test_deleting_an_attribute_raises(self):
+        with self.assertRaises(AttributeError):
+            del Token('_@shot')._key
+
+    def test_no_instance_dict(self):
+        self.assertFalse(hasattr(Token('_@shot'), '__dict__'))
+
+    def test_dict_is_read_only(self):
+        token = Token('_@shot')
+        with self.assertRaises(TypeError):
+            token.dict['key'] = 'sequence'
+        self.assertEqual(token.dict['key'], 'shot')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,179 @@
+"""Tests of version tokens and batch version queries."""
+
+# Import third party modules
+import copy
+import threading
+import unittest
+from unittest import mock
+
+# Import internal modules
+import constants as K
+import schema
+from schema import SchemaManager, Token
+from versions import VersionTable
+
+SCHEMA_STR = '//jobs.local/sharename/shows\
+{/@show}{/@episode}{/@sequence}{/@shot}/{#product}{/@role}{/@task}{?/@user}\
+{/@show}{_@episode}{_@sequence}{_@shot}{_@role}{_@task}{_@asset}{?_@variant}{_@version[v3]}{_@resolution}\
+{/@show}{_@episode}{_@sequence}{_@shot}{_@role}{_@task}{_@asset}{?_@variant}{_@version[v3]}{_@resolution}{?.#padding}{.#extension}'
+
+TOKEN_DICT = {'show': 'rrr',
+              'episode': '101',
+              'sequence': 'fb2',
+              'shot': '1234',
+              'product': 'renders',
+              'role': 'comp',
+              'task': 'precomp',
+              'asset': 'testAsset',
+              'version': 1,
+              'padding': '%04d',
+              'resolution': '1080p',
+              'extension': 'exr'}
+
+
+class TokenVersionTest(unittest.TestCase):
+
+    def test_parse_and_format(self):
+        token = Token('_@version[v3]')
+        self.assertEqual(token.version_syntax, 'v3')
+        self.assertEqual(token.parse_version('v012'), 12)
+        self.assertEqual(token.parse_version('v1234'), 1234)
+        self.assertEqual(token.format_version(12), 'v012')
+
+    def test_parse_rejects_other_syntax(self):
+        token = Token('_@version[v3]')
+        for value_str in ('012', 'x012', 'v', 'v01a'):
+            with self.assertRaises(ValueError):
+                token.parse_version(value_str)
+
+    def test_invalid_syntax(self):
+        with self.assertRaises(Exception):
+            Token('_@version[3v]')
+
+
+class DictFromPathTest(unittest.TestCase):
+
+    def setUp(self):
+        self.schema_manager = SchemaManager(path_str=SCHEMA_STR)
+
+    def test_round_trip(self):
+        path = self.schema_manager.path_from_dict(token_dict=TOKEN_DICT)
+        self.assertIn('_v001_1080p.%04d.exr', path)
+        self.assertEqual(self.schema_manager.dict_from_path(path_str=path)['version'], 1)
+        self.assertEqual(self.schema_manager.path_from_dict(
+            token_dict=self.schema_manager.dict_from_path(path_str=path)), path)
+
+    def test_version_strings_are_formatted(self):
+        token_dict = dict(TOKEN_DICT, version='v007')
+        path = self.schema_manager.path_from_dict(token_dict=token_dict)
+        self.assertEqual(self.schema_manager.dict_from_path(path_str=path)['version'], 7)
+
+    def test_multidelimited_asset(self):
+        # The smoke script in tests.py: values can't contain the delimeter.
+        token_dict = dict(TOKEN_DICT, asset='testAsset_with_multidelimited_name')
+        path = self.schema_manager.path_from_dict(token_dict=token_dict)
+        with self.assertRaisesRegex(ValueError, 'more values than tokens'):
+            self.schema_manager.dict_from_path(path_str=path)
+
+    def test_optional_token(self):
+        path = self.schema_manager.path_from_dict(token_dict=dict(TOKEN_DICT, variant='fog'))
+        parsed = self.schema_manager.dict_from_path(path_str=path)
+        self.assertEqual((parsed['asset'], parsed['variant'], parsed['version']), ('testAsset', 'fog', 1))
+        self.assertNotIn('variant', self.schema_manager.dict_from_path(
+            path_str=self.schema_manager.path_from_dict(token_dict=TOKEN_DICT)))
+
+    def test_bad_version_is_rejected(self):
+        path = self.schema_manager.path_from_dict(token_dict=TOKEN_DICT).replace('_v001_', '_x001_')
+        with self.assertRaises(ValueError):
+            self.schema_manager.dict_from_path(path_str=path)
+
+
+def plan_snapshot(value):
+    """Copy of a matching plan with every token replaced by its fields."""
+    if isinstance(value, Token):
+        return dict(value.dict)
+    if isinstance(value, (tuple, list)):
+        return [plan_snapshot(item) for item in value]
+    if isinstance(value, frozenset):
+        return sorted(value)
+    return value
+
+
+class MatchPlanSharingTest(unittest.TestCase):
+
+    def setUp(self):
+        self.schema_manager = SchemaManager(path_str=SCHEMA_STR)
+        self.plan = self.schema_manager.match_plan
+        path_from_dict = self.schema_manager.path_from_dict
+        self.paths = [path_from_dict(token_dict=TOKEN_DICT),
+                      path_from_dict(token_dict=dict(TOKEN_DICT, variant='fog')),
+                      path_from_dict(token_dict=dict(TOKEN_DICT, shot='5678', version=12)),
+                      path_from_dict(token_dict=dict(TOKEN_DICT, asset='testAsset_with_multidelimited_name'))]
+
+    def parse_all(self):
+        results = []
+        for path in self.paths:
+            try:
+                results.append(schema.dict_from_path(self.plan, path))
+            except (KeyError, ValueError) as error:
+                results.append(type(error))
+        return results
+
+    def test_parsing_leaves_the_plan_unchanged(self):
+        before = copy.deepcopy(plan_snapshot(self.plan))
+        self.parse_all()
+        with mock.patch.object(K, 'ALLOW_MULTIDELIMITED_TOKEN', True):
+            self.parse_all()
+        self.assertEqual(plan_snapshot(self.plan), before)
+        self.assertIs(self.schema_manager.match_plan, self.plan)
+
+    def test_results_cover_optional_and_multidelimited_paths(self):
+        results = self.parse_all()
+        self.assertNotIn('variant', results[0])
+        self.assertEqual(results[1]['variant'], 'fog')
+        self.assertEqual((results[2]['shot'], results[2]['version']), ('5678', 12))
+        self.assertIs(results[3], ValueError)
+
+    def test_parsing_from_threads(self):
+        expected = self.parse_all()
+        before = plan_snapshot(self.plan)
+        results = []
+        barrier = threading.Barrier(8)
+
+        def parse():
+            barrier.wait()
+            results.extend(self.parse_all() for _ in range(200))
+
+        threads = [threading.Thread(target=parse) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(results), 8 * 200)
+        for result in results:
+            self.assertEqual(result, expected)
+        self.assertEqual(plan_snapshot(self.plan), before)
+
+
+class VersionTableTest(unittest.TestCase):
+
+    def setUp(self):
+        self.schema_manager = SchemaManager(path_str=SCHEMA_STR)
+        self.paths = [self.schema_manager.path_from_dict(token_dict=dict(TOKEN_DICT, asset=asset, version=version))
+                      for asset, version in (('bg', 3), ('bg', 12), ('fg', 2), ('bg', 1))]
+        self.table = VersionTable(self.schema_manager, self.paths)
+
+    def test_latest_and_stale_rows(self):
+        self.assertEqual(list(self.table.versions), [3, 12, 2, 1])
+        self.assertEqual(self.table.latest_rows(), [1, 2])
+        self.assertEqual(self.table.stale_rows(), [0, 3])
+        self.assertEqual(sorted(self.table.latest_versions().values()), [2, 12])
+
+    def test_version_up(self):
+        self.assertEqual(list(self.table.next_versions()), [13, 13, 3, 13])
+        path = self.schema_manager.path_from_dict(token_dict=self.table.version_up(0))
+        self.assertEqual(path, self.paths[1].replace('_v012_', '_v013_'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,6 @@
 import logging
 import sys
+import constants as K
 from schema import SchemaManager
 
 def test(asset):
@@ -36,9 +37,19 @@ def test(asset):
     path_from_dict = schema_manager.path_from_dict(token_dict=token_dict)
     print (path_from_dict, '\n\n')
 
-    dict_from_path = schema_manager.dict_from_path(path_str=path_from_dict)
+    multidelimited = '_' in asset and not K.ALLOW_MULTIDELIMITED_TOKEN
+    try:
+        dict_from_path = schema_manager.dict_from_path(path_str=path_from_dict)
+    except ValueError as error:
+        # Delimited values are refused unless K.ALLOW_MULTIDELIMITED_TOKEN
+        if multidelimited:
+            print ('Expected ValueError:', error, '\n\n')
+            return
+        raise
+    if multidelimited:
+        raise AssertionError('Parsed a multi-delimited asset: %s' % (dict_from_path))
     print (dict_from_path, '\n\n')
 
 
 test('testAsset_with_multidelimited_name')
-#test('testAssetUndelimitedName')
\ No newline at end of file
+test('testAssetUndelimitedName')
\ No newline at end of file
@@ -0,0 +1,176 @@
+"""Validate a schema in progress and preview it against sample paths.
+
+Nothing here touches Qt, so the functions run on a worker thread, see
+view.SchemaBuilderWidget. Long running functions take a cancelled callable
+and return early once it returns True.
+"""
+
+# Import third party modules
+import os
+import time
+from collections import namedtuple
+
+# Import internal modules
+import constants as K
+from schema import SchemaManager
+
+# Result of checking sample paths against a schema. checked paths are
+# either parsed or rejected, parsed paths that format back to the same
+# path round trip. failures holds the first (path, reason) pairs.
+SampleReport = namedtuple('SampleReport', [
+    'total',
+    'checked',
+    'parsed',
+    'round_trips',
+    'rejected',
+    'failures',
+    'timed_out',
+    'seconds',
+])
+
+# Result of validating a schema string, see validate.
+Validation = namedtuple('Validation', [
+    'schema_str',
+    'schema_manager',
+    'feedback',
+    'sample_report',
+])
+
+
+def never_cancelled() -> bool:
+    return False
+
+
+def iter_sample(path):
+    """Lazily yield the paths of a path list file or a directory.
+
+    A file is read as one path per line, a directory is walked in sorted
+    order for the paths of its files.
+    """
+    if os.path.isdir(path):
+        for directory, directory_names, file_names in os.walk(path):
+            directory_names.sort()
+            directory = directory.replace('\\', '/')
+            for file_name in sorted(file_names):
+                yield f"{directory}/{file_name}"
+    else:
+        with open(path, encoding='utf-8', errors='replace') as sample_file:
+            for line in sample_file:
+                line = line.strip()
+                if line:
+                    yield line
+
+
+def load_sample(path, limit=K.PREVIEW_SAMPLE_LIMIT, cancelled=never_cancelled) -> tuple:
+    """Return up to limit sample paths, see iter_sample."""
+    paths = []
+    for sample_path in iter_sample(path):
+        paths.append(sample_path)
+        if len(paths) >= limit or (len(paths) % K.PREVIEW_CHECK_INTERVAL == 0 and cancelled()):
+            break
+    return tuple(paths)
+
+
+def check_sample(schema_manager, paths, budget=K.PREVIEW_TIME_BUDGET,
+                 cancelled=never_cancelled) -> SampleReport:
+    """Parse and round trip sample paths until the time budget runs out.
+
+    Args:
+        schema_manager (SchemaManager): The schema to check.
+        paths (sequence): Sample paths.
+        budget (float): Seconds to spend, paths after it are not checked.
+        cancelled (callable): Returns True to stop early.
+
+    Returns:
+        SampleReport: Counts of the checked paths.
+    """
+    start = time.perf_counter()
+    deadline = start + budget
+    checked = parsed = round_trips = 0
+    failures = []
+    timed_out = False
+    for path in paths:
+        if checked % K.PREVIEW_CHECK_INTERVAL == 0 and checked:
+            if cancelled():
+                break
+            if time.perf_counter() > deadline:
+                timed_out = True
+                break
+        checked += 1
+        try:
+            token_dict = schema_manager.dict_from_path(path_str=path)
+        except (KeyError, ValueError, IndexError) as error:
+            if len(failures) < K.PREVIEW_MAX_FAILURES:
+                failures.append((path, f"{type(error).__name__}: {error}"))
+            continue
+        parsed += 1
+        try:
+            round_trip = schema_manager.path_from_dict(token_dict=token_dict)
+        except KeyError as error:
+            round_trip = f"KeyError: {error}"
+        if round_trip == path:
+            round_trips += 1
+        elif len(failures) < K.PREVIEW_MAX_FAILURES:
+            failures.append((path, f"round trips to: {round_trip}"))
+    return SampleReport(len(paths), checked, parsed, round_trips, checked - parsed,
+                        failures, timed_out, time.perf_counter() - start)
+
+
+def feedback_string(schema_manager) -> str:
+    """Return the anchor, groupings, tokens and errors of a schema as text."""
+    groupings_string = ''
+    for tokens in schema_manager.tokens_list:
+        groupings_string += f"{tokens}\n"
+
+    max_length = 0
+    keys = set(schema_manager.keys)
+    for key in keys:
+        max_length = max(max_length, len(key))
+    tokens_string = ''
+    for token in schema_manager.token_list_flattened:
+        if token.key in keys:
+            keys.remove(token.key)
+            tokens_string += f"key='{token.key}' \
+{' '*(max_length-len(token.key))}\
+constant={(str(not token.is_editable)+' ')[0:5]} \
+editable={(str(token.is_editable)+' ')[0:5]} \
+optional={(str(token.is_optional)+' ')[0:5]}\n"
+    error_string = ''
+    for error in schema_manager.errors:
+        error_string += f"{error}\n"
+
+    return f"ANCHOR: {schema_manager.anchor}\n\n\
+GROUPINGS:\n{groupings_string}\n\
+TOKENS:\n{tokens_string}\n\
+ERRORS:\n{error_string}"
+
+
+def sample_report_string(report) -> str:
+    if report is None:
+        return ''
+    status = ' (time budget reached)' if report.timed_out else ''
+    failures_string = ''
+    for path, reason in report.failures:
+        failures_string += f"{path}\n    {reason}\n"
+    return f"SAMPLE: checked {report.checked} of {report.total} paths \
+in {report.seconds:.2f}s{status}\n\
+parsed={report.parsed} round_trips={report.round_trips} rejected={report.rejected}\n\n\
+FAILURES:\n{failures_string}"
+
+
+def validate(schema_str, sample_paths=(), budget=K.PREVIEW_TIME_BUDGET,
+             cancelled=never_cancelled) -> Validation:
+    """Build a schema and check it against the sample paths.
+
+    Returns:
+        Validation: The result, None if cancelled before the schema was
+            built. sample_report is None without sample paths or if
+            cancelled before checking them.
+    """
+    schema_manager = SchemaManager(path_str=schema_str)
+    if cancelled():
+        return None
+    sample_report = None
+    if sample_paths and schema_manager.is_valid:
+        sample_report = check_sample(schema_manager, sample_paths, budget, cancelled)
+    return Validation(schema_str, schema_manager, feedback_string(schema_manager), sample_report)
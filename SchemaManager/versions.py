@@ -0,0 +1,120 @@
+"""Batch version queries over paths parsed by a SchemaManager."""
+
+# Import third party modules
+from array import array
+
+
+class VersionTable():
+    """Token dicts of many paths with their versions as an integer column.
+
+    Rows are grouped into assets by the values of every key but the version
+    key, so finding the latest version of every asset, the stale rows or the
+    next version of an asset is integer arithmetic over the version column
+    instead of sorting version strings.
+
+    Example:
+        >>> table = VersionTable(schema_manager, paths)
+        >>> table.stale_rows()
+        [0, 3]
+        >>> schema_manager.path_from_dict(table.version_up(0))
+        '//jobs.local/.../rrr_101_fb2_1234_comp_precomp_asset_v004_1080p'
+    """
+    def __init__(self, schema_manager, paths=None, version_key=None) -> None:
+        self._schema_manager = schema_manager
+        self._version_key = version_key or self._default_version_key()
+        self._group_keys = [key for key in schema_manager.keys if key != self._version_key]
+        self._token_dicts = []
+        self._versions = array('q')
+        self._groups = array('l')
+        self._group_values = []
+        self._group_indices = {}
+        self._maxima = array('q')
+        for path in paths or []:
+            self.append(path)
+
+    def __len__(self) -> int:
+        return len(self._token_dicts)
+
+    def _default_version_key(self) -> str:
+        keys_version = self._schema_manager.keys_version
+        if len(keys_version) != 1:
+            raise ValueError (f"Schema has {len(keys_version)} version keys, \
+pass the version_key to use: {keys_version}")
+        return keys_version[0]
+
+    @property
+    def version_key(self) -> str:
+        return self._version_key
+
+    @property
+    def versions(self) -> array:
+        return self._versions
+
+    @property
+    def groups(self) -> array:
+        return self._groups
+
+    def append(self, path) -> int:
+        """Parse a path and add it as a row.
+
+        Returns:
+            int: index of the new row.
+
+        Raises:
+            ValueError: The path doesn't match the schema or has no version.
+        """
+        token_dict = self._schema_manager.dict_from_path(path_str=path)
+        version = token_dict.get(self._version_key)
+        if not isinstance(version, int):
+            raise ValueError (f"Path has no {self._version_key}: {path}")
+        group_value = tuple(token_dict.get(key) for key in self._group_keys)
+        group = self._group_indices.get(group_value)
+        if group is None:
+            group = len(self._group_values)
+            self._group_indices[group_value] = group
+            self._group_values.append(group_value)
+            self._maxima.append(version)
+        elif version > self._maxima[group]:
+            self._maxima[group] = version
+        self._token_dicts.append(token_dict)
+        self._versions.append(version)
+        self._groups.append(group)
+        return len(self._token_dicts) - 1
+
+    def token_dict(self, row) -> dict:
+        return dict(self._token_dicts[row])
+
+    def latest_versions(self) -> dict:
+        """Return the latest version of every asset.
+
+        Returns:
+            dict: tuple of the asset's values, in the order of the schema's
+                keys without the version key, to its latest version.
+        """
+        return dict(zip(self._group_values, self._maxima))
+
+    def latest_rows(self) -> list:
+        maxima = self._maxima
+        return [row for row, (group, version) in enumerate(zip(self._groups, self._versions))
+                if version == maxima[group]]
+
+    def stale_rows(self) -> list:
+        """Return the rows that aren't the latest version of their asset."""
+        maxima = self._maxima
+        return [row for row, (group, version) in enumerate(zip(self._groups, self._versions))
+                if version < maxima[group]]
+
+    def next_versions(self, step=1) -> array:
+        """Return the version after the latest one of every row's asset."""
+        maxima = self._maxima
+        return array('q', [maxima[group] + step for group in self._groups])
+
+    def version_up(self, row, step=1) -> dict:
+        """Return the token dict of the next version of a row's asset.
+
+        The version is an int, SchemaManager.path_from_dict formats it
+        through the version syntax.
+        """
+        token_dict = self.token_dict(row)
+        token_dict[self._version_key] = self._maxima[self._groups[row]] + step
+        return token_dict
@@ -3,8 +3,42 @@ from PySide6 import QtWidgets, QtCore, QtGui
 import sys
 
 # Import internal modules
+import constants as K
+import validation
 from schema import SchemaManager
 
+class WorkerSignals(QtCore.QObject):
+    # Generation of the request and its result
+    finished = QtCore.Signal(int, object)
+
+
+class Worker(QtCore.QRunnable):
+    """Run a function on the thread pool and emit its result.
+
+    The function is passed a cancelled callable, it returns True once a
+    newer request has made the result stale.
+    """
+    def __init__(self, generation, is_current, function, *args):
+        super(Worker, self).__init__()
+        self.signals = WorkerSignals()
+        self._generation = generation
+        self._is_current = is_current
+        self._function = function
+        self._args = args
+
+    def cancelled(self):
+        return not self._is_current(self._generation)
+
+    def run(self):
+        if self.cancelled():
+            return
+        try:
+            result = self._function(*self._args, cancelled=self.cancelled)
+        except Exception as error:
+            result = error
+        self.signals.finished.emit(self._generation, result)
+
+
 class SchemaBuilderWidget(QtWidgets.QWidget):
 
     def __init__(self, parent=None):
@@ -12,6 +46,17 @@ class SchemaBuilderWidget(QtWidgets.QWidget):
 
         # Variables:
         self.schema_manager = SchemaManager()
+        self.sample_paths = ()
+        # Incremented by every request, workers of older ones are stale.
+        self._validation_generation = 0
+        self._sample_generation = 0
+        self._thread_pool = QtCore.QThreadPool(self)
+        self._thread_pool.setMaxThreadCount(2)
+
+        self._validation_timer = QtCore.QTimer(self)
+        self._validation_timer.setSingleShot(True)
+        self._validation_timer.setInterval(K.PREVIEW_DEBOUNCE_MS)
+        self._validation_timer.timeout.connect(self.start_validation)
 
         # Content
         self.main_layout = QtWidgets.QVBoxLayout()
@@ -34,6 +79,27 @@ class SchemaBuilderWidget(QtWidgets.QWidget):
 
         self.main_layout.addWidget(self.schema_edit_widget)
 
+        # Sample edit - path list file or directory to preview the schema on
+        self.sample_edit_widget = QtWidgets.QWidget(self)
+        self.sample_edit_layout = QtWidgets.QHBoxLayout()
+        self.sample_edit_widget.setLayout(self.sample_edit_layout)
+        self.sample_edit_layout.setContentsMargins(0, 0, 0, 0)
+
+        self.sample_label = QtWidgets.QLabel('Sample:')
+        self.sample_edit_layout.addWidget(self.sample_label)
+        self.sample_line_edit = QtWidgets.QLineEdit()
+        self.sample_line_edit.setPlaceholderText("Path list file or directory")
+        self.sample_line_edit.editingFinished.connect(self.load_sample)
+        self.sample_edit_layout.addWidget(self.sample_line_edit)
+        self.sample_file_button = QtWidgets.QPushButton('File...')
+        self.sample_file_button.clicked.connect(self.browse_sample_file)
+        self.sample_edit_layout.addWidget(self.sample_file_button)
+        self.sample_directory_button = QtWidgets.QPushButton('Directory...')
+        self.sample_directory_button.clicked.connect(self.browse_sample_directory)
+        self.sample_edit_layout.addWidget(self.sample_directory_button)
+
+        self.main_layout.addWidget(self.sample_edit_widget)
+
         # Feedback widget - view results of schema edit
         self.feedback_widget = QtWidgets.QWidget(self)
         self.feedback_widget.setMinimumWidth(800)
@@ -47,36 +113,82 @@ class SchemaBuilderWidget(QtWidgets.QWidget):
         self.feedback_label.setFont(font)
         self.feedback_layout.addWidget(self.feedback_label)
 
+        self.sample_feedback_label = QtWidgets.QLabel('')
+        self.sample_feedback_label.setWordWrap(True)
+        self.sample_feedback_label.setFont(font)
+        self.feedback_layout.addWidget(self.sample_feedback_label)
+
         self.main_layout.addWidget(self.feedback_widget)
         self.main_layout.addStretch()
 
+    def _is_current_validation(self, generation):
+        return generation == self._validation_generation
+
+    def _is_current_sample(self, generation):
+        return generation == self._sample_generation
+
     @QtCore.Slot(str)
     def schema_line_edit_changed(self):
-        self.schema_manager.path = self.schema_line_edit.text()
-
-        groupings_string = ''
-        for tokens in self.schema_manager.tokens_list:
-            groupings_string += f"{tokens}\n"
-
-        max_length = 0
-        keys = set(self.schema_manager.keys)
-        for key in keys:
-            max_length = max(max_length, len(key))
-        tokens_string = ''
-        for token in self.schema_manager.token_list_flattened:
-            if token.key in keys:
-                keys.remove(token.key)
-                tokens_string += f"key='{token.key}' \
-{' '*(max_length-len(token.key))}\
-constant={(str(not token.is_editable)+' ')[0:5]} \
-editable={(str(token.is_editable)+' ')[0:5]} \
-optional={(str(token.is_optional)+' ')[0:5]}\n"
-        error_string = ''
-        for error in self.schema_manager.errors:
-            error_string += f"{error}\n"
-
-        label_string = f"ANCHOR: {self.schema_manager.anchor}\n\n\
-GROUPINGS:\n{groupings_string}\n\
-TOKENS:\n{tokens_string}\n\
-ERRORS:\n{error_string}"
-        self.feedback_label.setText(label_string)
+        # Stale validations stop at their next check, the new one starts
+        # once typing pauses.
+        self._validation_generation += 1
+        self._validation_timer.start()
+
+    @QtCore.Slot()
+    def start_validation(self):
+        self._validation_generation += 1
+        worker = Worker(self._validation_generation, self._is_current_validation,
+                        validation.validate, self.schema_line_edit.text(),
+                        self.sample_paths, K.PREVIEW_TIME_BUDGET)
+        worker.signals.finished.connect(self.validation_finished)
+        self._thread_pool.start(worker)
+
+    @QtCore.Slot(int, object)
+    def validation_finished(self, generation, result):
+        if not self._is_current_validation(generation) or result is None:
+            return
+        if isinstance(result, Exception):
+            self.feedback_label.setText(f"ERRORS:\n{result}\n")
+            return
+        self.schema_manager = result.schema_manager
+        self.feedback_label.setText(result.feedback)
+        self.sample_feedback_label.setText(validation.sample_report_string(result.sample_report))
+
+    @QtCore.Slot()
+    def browse_sample_file(self):
+        path, _ = QtWidgets.QFileDialog.getOpenFileName(self, 'Sample path list')
+        if path:
+            self.sample_line_edit.setText(path)
+            self.load_sample()
+
+    @QtCore.Slot()
+    def browse_sample_directory(self):
+        path = QtWidgets.QFileDialog.getExistingDirectory(self, 'Sample directory')
+        if path:
+            self.sample_line_edit.setText(path)
+            self.load_sample()
+
+    @QtCore.Slot()
+    def load_sample(self):
+        self._sample_generation += 1
+        self.sample_paths = ()
+        path = self.sample_line_edit.text()
+        if not path:
+            self.sample_feedback_label.setText('')
+            self.start_validation()
+            return
+        self.sample_feedback_label.setText(f"Loading sample: {path}")
+        worker = Worker(self._sample_generation, self._is_current_sample,
+                        validation.load_sample, path, K.PREVIEW_SAMPLE_LIMIT)
+        worker.signals.finished.connect(self.sample_loaded)
+        self._thread_pool.start(worker)
+
+    @QtCore.Slot(int, object)
+    def sample_loaded(self, generation, result):
+        if not self._is_current_sample(generation):
+            return
+        if isinstance(result, Exception):
+            self.sample_feedback_label.setText(f"Unable to load sample: {result}")
+            return
+        self.sample_paths = result
+        self.start_validation()